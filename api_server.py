@@ -1,27 +1,82 @@
 import os
+import math
 import json
 import logging
-from flask import Flask, request, jsonify
-from twilio.twiml.messaging_response import MessagingResponse
+from flask import Flask, Response, request, jsonify
 
 from utils.command_parser import CommandParser
 from utils.google_drive_client import GoogleDriveClient
 from utils.document_summarizer import DocumentSummarizer
+from utils.rate_limiter import RateLimiter
+from utils.job_queue import JobQueue, QueueFullError
+from utils.settings import get_section, project_path
+from utils.lazy import LazyObject
+from utils import metrics
+from utils.metrics import STAGE_LATENCY
+from utils.tracing import tracer, current_span
+from utils.structured_logging import configure_logging, reset_logging, stop_logging, dropped_records
 
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# JSON lines with the request ID, written by a background thread (LOG_* settings)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
 command_parser = CommandParser()
-drive_client = GoogleDriveClient()
-summarizer = DocumentSummarizer()
+
+# Drive authentication and Gemini setup are slow, so the clients are built on
+# first use. CLIENT_INIT=background (default) starts building them right away
+# without holding up startup, "lazy" waits for the first command and "eager"
+# builds them during import so credential problems stop the server. Under
+# gunicorn (SERVER_PRELOAD) the master builds them before forking instead.
+CLIENT_INIT = os.environ.get('CLIENT_INIT', 'background').lower()
+
+drive_client = LazyObject(GoogleDriveClient, "drive_client")
+summarizer = LazyObject(lambda: DocumentSummarizer(drive_client=drive_client.resolve()), "summarizer")
+
+if CLIENT_INIT == 'eager':
+    summarizer.resolve()
+elif CLIENT_INIT == 'background' and not os.environ.get('SERVER_PRELOAD'):
+    summarizer.warm_up()
+
+# Twilio rejects WhatsApp message bodies longer than this
+MAX_RESPONSE_CHARS = int(os.environ.get('MAX_RESPONSE_CHARS', 1600))
+LIST_MAX_FILES = int(os.environ.get('LIST_MAX_FILES', 20))
+
+security_settings = get_section('security')
+MAX_MESSAGE_LENGTH = int(os.environ.get('MAX_MESSAGE_LENGTH', security_settings.get('max_message_length', 1000)))
+
+# Token buckets per WhatsApp sender and across all senders; summaries cost more than LIST.
+# They are kept in RATE_LIMIT_DB_PATH so the limits hold across gunicorn workers
+RATE_LIMIT_DB_PATH = os.environ.get('RATE_LIMIT_DB_PATH', 'data/rate_limits.sqlite3')
+rate_limiter = RateLimiter(
+    per_sender_per_minute=float(os.environ.get('RATE_LIMIT_PER_MINUTE', security_settings.get('rate_limit_per_minute', 10))),
+    global_per_minute=float(os.environ.get('GLOBAL_RATE_LIMIT_PER_MINUTE', security_settings.get('global_rate_limit_per_minute', 300))),
+    command_costs=security_settings.get('rate_limit_costs'),
+    db_path=project_path(RATE_LIMIT_DB_PATH) if RATE_LIMIT_DB_PATH else None
+)
+# A pattern may match up to DRIVE_BULK_MAX_ITEMS files, so it is charged as this many items
+RATE_LIMIT_GLOB_ITEMS = int(os.environ.get('RATE_LIMIT_GLOB_ITEMS', security_settings.get('rate_limit_glob_items', 10)))
+
+# Summary commands run on background workers when the caller can take the
+# result later, from JOB_CALLBACK_URL / callback_url or by polling /api/jobs/<id>
+JOB_PRIORITIES = {"FILESUMMARY": 1, "FOLDERSUMMARY": 2}
+JOB_CALLBACK_URL = os.environ.get('JOB_CALLBACK_URL')
+# Results contain Drive content, so callers may only name URLs the operator listed
+JOB_CALLBACK_ALLOWED_URLS = {
+    url.strip() for url in os.environ.get('JOB_CALLBACK_ALLOWED_URLS', '').split(',') if url.strip()
+}
+
+job_queue = JobQueue(
+    workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queued=int(os.environ.get('JOB_MAX_QUEUED', 100)),
+    result_ttl=float(os.environ.get('JOB_RESULT_TTL_SECONDS', 3600))
+)
 
 
 
@@ -31,8 +86,20 @@ summarizer = DocumentSummarizer()
 
 @app.route('/api/execute', methods=['POST'])
 def api_execute():
+    # Every span and log line of this request carries its ID
+    with tracer.start_trace(
+        "api.execute",
+        request_id=request.headers.get('X-Request-ID'),
+        traceparent=request.headers.get('traceparent')
+    ) as span:
+        response = app.make_response(_handle_execute())
+        span.set_attribute("http.status_code", response.status_code)
+    response.headers['X-Request-ID'] = span.request_id
+    return response
+
+
+def _handle_execute():
     try:
-        print("api_execute" , request.get_json())
         data = request.get_json()
         
         if not data:
@@ -41,6 +108,10 @@ def api_execute():
         message_body = data.get('message', '')
         if not message_body:
             return jsonify({"error": "No message provided"}), 400
+
+        rejection = _check_message_length(message_body)
+        if rejection:
+            return jsonify(rejection)
         
         # Parse the command
         parsed_command = command_parser.parse_message(message_body)
@@ -54,11 +125,20 @@ def api_execute():
             })
         
         command = parsed_command.get("command")
+        current_span().set_attribute("command", command)
+
+        # Over-limit requests are answered straight away instead of waiting for a worker
+        rejection = _check_rate_limit(data, command, parsed_command)
+        if rejection:
+            return jsonify(rejection)
+
+        ack = _submit_job(data, command, parsed_command)
+        if ack:
+            return jsonify(ack)
 
         response_text = _execute_command(command, parsed_command)
-        print("response_text" , response_text)
+        logger.info("%s answered", command, extra={"command": command, "response_chars": len(response_text or "")})
 
-        
         return jsonify({
             "success": True,
             "command": command,
@@ -66,7 +146,7 @@ def api_execute():
         })
         
     except Exception as e:
-        logger.error(f"Error in API execute: {e}")
+        logger.error("Error in API execute: %s", e)
         return jsonify({
             "success": False,
             "error": str(e),
@@ -74,89 +154,191 @@ def api_execute():
 
 
 
+def _get_sender(data: dict) -> str:
+    """WhatsApp ID of the chat (the n8n workflow sends it as To)"""
+    return data.get('To') or data.get('WaId')
+
+
+def _check_message_length(message_body: str):
+    if len(message_body) <= MAX_MESSAGE_LENGTH:
+        return None
+
+    return {
+        "success": False,
+        "error": "Message too long",
+        "response": f"❌ Message too long. Please keep commands under {MAX_MESSAGE_LENGTH} characters.",
+    }
+
+
+def _rate_limit_items(parsed_command: dict) -> int:
+    """How many items a command is charged for: one per path, more per pattern"""
+    paths = parsed_command.get("file_paths") or parsed_command.get("source_paths") or []
+    return sum(RATE_LIMIT_GLOB_ITEMS if command_parser.is_glob(path) else 1 for path in paths) or 1
+
+
+def _check_rate_limit(data: dict, command: str, parsed_command: dict):
+    limit = rate_limiter.acquire(_get_sender(data), command, _rate_limit_items(parsed_command))
+    if limit["allowed"]:
+        return None
+
+    retry_after = max(1, math.ceil(limit["retry_after"]))
+    if limit["scope"] == "sender":
+        response_text = f"⏳ You're sending commands too quickly. Please try again in {retry_after} seconds."
+    else:
+        response_text = f"⏳ The assistant is busy right now. Please try again in {retry_after} seconds."
+
+    return {
+        "success": False,
+        "error": "Rate limit exceeded",
+        "response": response_text,
+        "retry_after": retry_after,
+    }
+
+
+def _submit_job(data: dict, command: str, parsed_command: dict):
+    """Queue a summary command as a background job and return the acknowledgement.
+
+    Returns None when the command should run inline: it is not a summary, or
+    the caller gave no way to receive the result later.
+    """
+    if command not in JOB_PRIORITIES:
+        return None
+
+    callback_url = data.get('callback_url')
+    if callback_url and callback_url not in JOB_CALLBACK_ALLOWED_URLS:
+        logger.warning("Rejected callback URL not in JOB_CALLBACK_ALLOWED_URLS: %s", callback_url)
+        return {
+            "success": False,
+            "error": "Callback URL not allowed",
+            "response": "❌ This callback URL is not allowed.",
+        }
+    callback_url = callback_url or JOB_CALLBACK_URL
+    poll = str(data.get('async', '')).lower() in ('1', 'true', 'yes')
+    if not (callback_url or poll):
+        return None
+
+    # Identical requests share one job, whoever sent them and however they spelled the path
+    paths = parsed_command.get("file_paths") or [parsed_command.get("folder_path") or parsed_command.get("file_path") or ""]
+    key = f"{command}:" + "|".join(GoogleDriveClient._normalize_path(path) for path in paths)
+
+    def run() -> dict:
+        return {
+            "success": True,
+            "command": command,
+            "response": _execute_command(command, parsed_command),
+        }
+
+    try:
+        job = job_queue.submit(
+            key,
+            run,
+            command=command,
+            priority=JOB_PRIORITIES[command],
+            callback_url=callback_url,
+            callback_payload={"To": _get_sender(data)}
+        )
+    except QueueFullError:
+        return {
+            "success": False,
+            "error": "Job queue full",
+            "response": "⏳ The assistant is busy right now. Please try again in a minute.",
+        }
+
+    return {
+        "success": True,
+        "command": command,
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"/api/jobs/{job.id}",
+        "response": "⏳ Working on it. I'll send the summary as soon as it's ready.",
+    }
+
+
 def _execute_command(command: str, parsed_command: dict) -> str:
+    with metrics.COMMANDS_IN_FLIGHT.track(command=command), metrics.COMMAND_LATENCY.time(command=command):
+        return _run_command(command, parsed_command)
+
+
+def _run_command(command: str, parsed_command: dict) -> str:
     try:
         if command == "LIST":
             folder_path = parsed_command.get("folder_path")
 
-            result = drive_client.list_files(folder_path)
+            result = drive_client.list_files(folder_path, max_files=LIST_MAX_FILES)
 
-            # print("list result" , result)
             return _format_list_response(result)
         
         elif command == "DELETE":
+            if "file_paths" in parsed_command:
+                result = drive_client.delete_files(parsed_command["file_paths"])
+                return _format_bulk_response(result, "deleted")
+
             file_path = parsed_command.get("file_path")
             result = drive_client.delete_file(file_path)
-            # print("delete result" , result)
             return _format_delete_response(result)
         
         elif command == "MOVE":
+            if "source_paths" in parsed_command:
+                result = drive_client.move_files(parsed_command["source_paths"], parsed_command.get("destination_path"))
+                return _format_bulk_response(result, "moved")
+
             source_path = parsed_command.get("source_path")
             destination_path = parsed_command.get("destination_path")
 
-            print("source_path" , source_path)
-            print("destination_path" , destination_path)
+            logger.debug("Moving %s to %s", source_path, destination_path)
 
             result = drive_client.move_file(source_path, destination_path)
-            # print("move result" , result)
             return _format_move_response(result)
         
         elif command == "COPY":
+            if "source_paths" in parsed_command:
+                result = drive_client.copy_files(parsed_command["source_paths"], parsed_command.get("destination_path"))
+                return _format_bulk_response(result, "copied")
+
             source_path = parsed_command.get("source_path")
             destination_path = parsed_command.get("destination_path")
 
-            print("source_path" , source_path)
-            print("destination_path" , destination_path)
-
+            logger.debug("Copying %s to %s", source_path, destination_path)
 
             result = drive_client.copy_file(source_path, destination_path)
 
-
-            # print("copy result" , result)
-
             return _format_copy_response(result)
         
         elif command == "FOLDERSUMMARY":
-            print('folder summary')
-
             folder_path = parsed_command.get("folder_path")
 
             result = summarizer.summarize_folder(folder_path)
 
             formatted_summary = summarizer.format_summary_response(result)
 
-            # print("formatted_summary" , formatted_summary)
             
             return formatted_summary
 
             
         
         elif command == "FILESUMMARY":
-            print('file summary')
-
             file_path = parsed_command.get("file_path")
 
             result = summarizer.summarize_single_document(file_path)
 
             formatted_summary = summarizer.format_summary_response(result)
 
-            # print("formatted_summary" , formatted_summary)
 
             return formatted_summary
         
         
         elif command == "HELP":
             text = parsed_command.get("help_text")
-            # print("help text" , text)
             return text
         
         else:
             return f"❌ Unsupported command: {command}"
             
     except Exception as e:
-        logger.error(f"Error executing command {command}: {e}")
+        logger.error("Error executing command %s: %s", command, e)
         return f"❌ Error executing command: {str(e)}"
 
+@STAGE_LATENCY.timed(stage='formatting')
 def _format_list_response(result: dict) -> str:
     """Format list files response for WhatsApp"""
     if "error" in result:
@@ -170,15 +352,28 @@ def _format_list_response(result: dict) -> str:
         return "📁 No files found"
     
     response = "📁 *Files in folder:*\n\n"
+    more_files = "\n_More files not shown._"
+    truncated = result.get("truncated", False)
     
     for i, file_info in enumerate(files, 1):
-        response += f"{i}. *{file_info['name']}*\n"
-        response += f"   📄 Type: {file_info['type']}\n"
-        response += f"   📏 Size: {file_info['size']}\n"
-        response += f"   📅 Modified: {file_info['modified']}\n\n"
+        entry = f"{i}. *{file_info['name']}*\n"
+        entry += f"   📄 Type: {file_info['type']}\n"
+        entry += f"   📏 Size: {file_info['size']}\n"
+        entry += f"   📅 Modified: {file_info['modified']}\n\n"
+
+        # Stop once the next entry would not fit in a single WhatsApp message
+        if len(response) + len(entry) + len(more_files) > MAX_RESPONSE_CHARS:
+            truncated = True
+            break
+
+        response += entry
+
+    if truncated:
+        response += more_files
     
     return response
 
+@STAGE_LATENCY.timed(stage='formatting')
 def _format_delete_response(result: dict) -> str:
     if "error" in result:
         return f"❌ {result['error']}"
@@ -191,6 +386,7 @@ def _format_delete_response(result: dict) -> str:
 
 
 
+@STAGE_LATENCY.timed(stage='formatting')
 def _format_move_response(result: dict) -> str:
     if "error" in result:
         return f"❌ {result['error']}"
@@ -202,6 +398,7 @@ def _format_move_response(result: dict) -> str:
 
 
 
+@STAGE_LATENCY.timed(stage='formatting')
 def _format_copy_response(result: dict) -> str:
     if "error" in result:
         return f"❌ {result['error']}"
@@ -212,11 +409,40 @@ def _format_copy_response(result: dict) -> str:
     return "✅ File copied successfully"
 
 
+@STAGE_LATENCY.timed(stage='formatting')
+def _format_bulk_response(result: dict, action: str) -> str:
+    """Format a bulk delete/move/copy result, one line per file"""
+    if "error" in result:
+        return f"❌ {result['error']}"
+
+    succeeded = result.get("succeeded", 0)
+    failed = result.get("failed", 0)
+    icon = "✅" if not failed else ("⚠️" if succeeded else "❌")
+    response = f"{icon} {succeeded} file(s) {action}, {failed} failed\n\n"
+    more_files = "\n_More files not shown._"
+
+    for item in result.get("results", []):
+        if item["success"]:
+            line = f"✅ {item['path']}\n"
+        else:
+            line = f"❌ {item['path']}: {item.get('error', 'failed')}\n"
+
+        if len(response) + len(line) + len(more_files) > MAX_RESPONSE_CHARS:
+            response += more_files
+            break
+
+        response += line
+
+    return response.rstrip()
+
+
 
 
 
 
 def _create_twilio_response(message: str) -> str:
+    from twilio.twiml.messaging_response import MessagingResponse
+
     resp = MessagingResponse()
     resp.message(message)
     return str(resp)
@@ -226,17 +452,93 @@ def _create_twilio_response(message: str) -> str:
 
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        **drive_client.get_cache_stats(),
+        **summarizer.get_cache_stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "job_queue": job_queue.stats(),
+    })
+
+
+def _collect_metrics():
+    """Cache and job queue counters, read when /metrics is scraped"""
+    caches = {}
+    if drive_client.is_ready:
+        caches["path"] = drive_client.path_cache.stats()
+    if summarizer.is_ready:
+        caches["summary"] = summarizer.summary_cache.stats()
+        if summarizer.text_cache:
+            caches["extracted_text"] = summarizer.text_cache.stats()
+
+    yield ("drive_assistant_cache_hits_total", "counter", "Cache lookups answered from the cache",
+           [({"cache": name}, stats["hits"]) for name, stats in caches.items()])
+    yield ("drive_assistant_cache_misses_total", "counter", "Cache lookups that missed",
+           [({"cache": name}, stats["misses"]) for name, stats in caches.items()])
+    yield ("drive_assistant_cache_hit_ratio", "gauge", "Share of cache lookups that hit",
+           [({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()])
+
+    jobs = job_queue.stats()
+    yield ("drive_assistant_jobs_queued", "gauge", "Background jobs waiting for a worker", [({}, jobs["queued"])])
+    yield ("drive_assistant_jobs_in_flight", "gauge", "Background jobs queued or running", [({}, jobs["in_flight"])])
+    yield ("drive_assistant_log_records_dropped_total", "counter", "Log lines dropped because the log queue was full",
+           [({}, dropped_records())])
+
+
+metrics.registry.register_collector(_collect_metrics)
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/', methods=['GET'])
 def get_root():
-    print("get_root")
     return jsonify({
         "message": "WhatsApp Drive Assistant API is running",
         })
 
 
+def reset_after_fork():
+    """Give a freshly forked server worker its own connections, threads and pools.
+
+    Clients built before the fork (gunicorn's preload) are kept, so their
+    memory stays shared copy-on-write; only per-process resources are renewed.
+    """
+    reset_logging()
+    job_queue.reset()
+    rate_limiter.reset()
+    if drive_client.is_ready:
+        drive_client.reset()
+    if summarizer.is_ready:
+        summarizer.reset()
+    elif CLIENT_INIT != 'lazy':
+        summarizer.warm_up()
+
+
+def shutdown():
+    """Finish queued jobs and stop summary and extraction workers before the process exits"""
+    job_queue.shutdown(wait=True)
+    if summarizer.is_ready:
+        summarizer.shutdown()
+    if drive_client.is_ready:
+        drive_client.extraction_pool.shutdown()
+    stop_logging()
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
-    logger.info(f"Starting WhatsApp Drive Assistant API on port {port}")
+    logger.info("Starting WhatsApp Drive Assistant API on port %s", port)
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,250 @@
+"""
+ASGI variant of the WhatsApp Drive Assistant API.
+
+Serves the same /api/execute contract as api_server.py, but awaits Drive
+and Gemini work on a thread pool so one process can keep hundreds of chats
+waiting on I/O. Run with:
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+"""
+
+import json
+import logging
+
+from api_server import (
+    command_parser,
+    drive_client,
+    summarizer,
+    LIST_MAX_FILES,
+    rate_limiter,
+    job_queue,
+    _submit_job,
+    _check_message_length,
+    _check_rate_limit,
+    _format_list_response,
+    _format_delete_response,
+    _format_move_response,
+    _format_copy_response,
+    _format_bulk_response,
+)
+from utils.async_clients import AsyncGoogleDriveClient, AsyncDocumentSummarizer, get_io_executor, run_blocking
+from utils import metrics
+from utils.tracing import tracer, current_span
+
+logger = logging.getLogger(__name__)
+
+async_drive_client = AsyncGoogleDriveClient(drive_client)
+async_summarizer = AsyncDocumentSummarizer(summarizer)
+
+
+async def api_execute(data) -> tuple:
+    try:
+        if not data:
+            return {"error": "No data received"}, 400
+
+        message_body = data.get('message', '')
+        if not message_body:
+            return {"error": "No message provided"}, 400
+
+        rejection = _check_message_length(message_body)
+        if rejection:
+            return rejection, 200
+
+        # Parsing is cheap and CPU-only, so it stays on the event loop
+        parsed_command = command_parser.parse_message(message_body)
+
+        if not parsed_command.get("success", False):
+            return {
+                "success": False,
+                "error": parsed_command.get("error", "Unknown error"),
+                "response": command_parser.format_response(parsed_command),
+            }, 200
+
+        command = parsed_command.get("command")
+        current_span().set_attribute("command", command)
+
+        rejection = _check_rate_limit(data, command, parsed_command)
+        if rejection:
+            return rejection, 200
+
+        ack = _submit_job(data, command, parsed_command)
+        if ack:
+            return ack, 200
+
+        response_text = await _execute_command(command, parsed_command)
+        logger.info("%s answered", command, extra={"command": command, "response_chars": len(response_text or "")})
+
+        return {
+            "success": True,
+            "command": command,
+            "response": response_text,
+        }, 200
+
+    except Exception as e:
+        logger.error("Error in API execute: %s", e)
+        return {
+            "success": False,
+            "error": str(e),
+        }, 500
+
+
+async def _execute_command(command: str, parsed_command: dict) -> str:
+    with metrics.COMMANDS_IN_FLIGHT.track(command=command), metrics.COMMAND_LATENCY.time(command=command):
+        return await _run_command(command, parsed_command)
+
+
+async def _run_command(command: str, parsed_command: dict) -> str:
+    try:
+        if command == "LIST":
+            result = await async_drive_client.list_files(parsed_command.get("folder_path"), max_files=LIST_MAX_FILES)
+            return _format_list_response(result)
+
+        elif command == "DELETE":
+            if "file_paths" in parsed_command:
+                result = await async_drive_client.delete_files(parsed_command["file_paths"])
+                return _format_bulk_response(result, "deleted")
+
+            result = await async_drive_client.delete_file(parsed_command.get("file_path"))
+            return _format_delete_response(result)
+
+        elif command == "MOVE":
+            if "source_paths" in parsed_command:
+                result = await async_drive_client.move_files(
+                    parsed_command["source_paths"],
+                    parsed_command.get("destination_path")
+                )
+                return _format_bulk_response(result, "moved")
+
+            result = await async_drive_client.move_file(
+                parsed_command.get("source_path"),
+                parsed_command.get("destination_path")
+            )
+            return _format_move_response(result)
+
+        elif command == "COPY":
+            if "source_paths" in parsed_command:
+                result = await async_drive_client.copy_files(
+                    parsed_command["source_paths"],
+                    parsed_command.get("destination_path")
+                )
+                return _format_bulk_response(result, "copied")
+
+            result = await async_drive_client.copy_file(
+                parsed_command.get("source_path"),
+                parsed_command.get("destination_path")
+            )
+            return _format_copy_response(result)
+
+        elif command == "FOLDERSUMMARY":
+            result = await async_summarizer.summarize_folder(parsed_command.get("folder_path"))
+            return async_summarizer.format_summary_response(result)
+
+        elif command == "FILESUMMARY":
+            result = await async_summarizer.summarize_single_document(parsed_command.get("file_path"))
+            return async_summarizer.format_summary_response(result)
+
+        elif command == "HELP":
+            return parsed_command.get("help_text")
+
+        else:
+            return f"❌ Unsupported command: {command}"
+
+    except Exception as e:
+        logger.error("Error executing command %s: %s", command, e)
+        return f"❌ Error executing command: {str(e)}"
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b"")
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def _send_json(send, payload: dict, status: int = 200, headers: list = None):
+    await _send(send, json.dumps(payload).encode('utf-8'), 'application/json', status, headers)
+
+
+async def _send(send, body: bytes, content_type: str, status: int = 200, headers: list = None):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': (headers or []) + [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _stats() -> dict:
+    # Reading the lazy clients may wait for them to be built, so this runs off the loop
+    return {
+        **drive_client.get_cache_stats(),
+        **summarizer.get_cache_stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "job_queue": job_queue.stats(),
+    }
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            job_queue.shutdown(wait=True)
+            get_io_executor().shutdown(wait=True)
+            if summarizer.is_ready:
+                summarizer.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    method = scope['method']
+
+    if path == '/api/execute' and method == 'POST':
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+        headers = dict(scope.get('headers') or [])
+        with tracer.start_trace(
+            "api.execute",
+            request_id=headers.get(b'x-request-id', b'').decode('latin-1') or None,
+            traceparent=headers.get(b'traceparent', b'').decode('latin-1') or None
+        ) as span:
+            payload, status = await api_execute(data)
+            span.set_attribute("http.status_code", status)
+        await _send_json(send, payload, status, headers=[(b'x-request-id', span.request_id.encode('latin-1'))])
+
+    elif path == '/api/stats' and method == 'GET':
+        await _send_json(send, await run_blocking(_stats))
+
+    elif path == '/metrics' and method == 'GET':
+        await _send(send, metrics.registry.render().encode('utf-8'), metrics.CONTENT_TYPE)
+
+    elif path.startswith('/api/jobs/') and method == 'GET':
+        job = job_queue.get(path[len('/api/jobs/'):])
+        if job is None:
+            await _send_json(send, {"error": "Job not found"}, 404)
+        else:
+            await _send_json(send, job.to_dict())
+
+    elif path == '/' and method == 'GET':
+        await _send_json(send, {"message": "WhatsApp Drive Assistant API is running"})
+
+    else:
+        await _send_json(send, {"error": "Not found"}, 404)
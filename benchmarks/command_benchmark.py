@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Offline throughput and latency benchmark for the WhatsApp commands.
+
+Runs each command against an in-memory fake of the Drive v3 API
+(benchmarks/fake_drive.py) filled with synthetic PDF, DOCX, text and Google
+Docs files, with the stub LLM backend standing in for Gemini. Nothing leaves
+the machine, so results are comparable between runs and commits.
+
+Every command runs in a fresh interpreter, either through POST /api/execute
+(Flask test client, "api") or by calling GoogleDriveClient and
+DocumentSummarizer directly ("client"), and reports throughput, p50/p99
+latency and peak RSS. Run from the repository root:
+
+    python benchmarks/command_benchmark.py
+    python benchmarks/command_benchmark.py --commands LIST FILESUMMARY --requests 100 --concurrency 8
+    python benchmarks/command_benchmark.py --llm-latency-ms 800 --drive-latency-ms 50 --doc-kb 256
+    python benchmarks/command_benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmarks/command_benchmark.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+With --baseline the exit status is 1 when throughput, p50, p99 or peak RSS
+of any command is worse than the baseline by more than the tolerance.
+Settings read by the app (SUMMARY_MODE, SUMMARY_BATCH_TOKENS,
+EXTRACTION_WORKERS, ...) are taken from the environment as usual.
+"""
+
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = ["LIST", "FILESUMMARY", "FOLDERSUMMARY", "MOVE", "COPY", "DELETE"]
+TARGETS = ["api", "client"]
+
+# Commands addressed to a folder; the others take one file each
+FOLDER_COMMANDS = ("LIST", "FOLDERSUMMARY")
+ARCHIVE_FOLDER = "/archive"
+
+# Compared against the baseline: (result key, True when higher is better)
+CHECKS = [("throughput_rps", True), ("p50_ms", False), ("p99_ms", False), ("peak_rss_mb", False)]
+
+
+def percentile(values: list, share: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return peak_rss_mb(resource.RUSAGE_SELF)
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def workload_config(args) -> dict:
+    """Options that change what is measured; results are only comparable when these match"""
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "cache": args.cache,
+        "files_per_folder": args.files,
+        "doc_kb": args.doc_kb,
+        "kinds": args.kinds,
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_ms_per_token": args.llm_ms_per_token,
+        "drive_latency_ms": args.drive_latency_ms,
+        "drive_mbps": args.drive_mbps,
+        "index": args.index,
+    }
+
+
+# ----------------------------------------------------------------------
+# One command in this process (--child)
+# ----------------------------------------------------------------------
+
+def build_targets(tree: dict, command: str, count: int, cache: str) -> list:
+    """Folder or file paths for warm-up plus measured requests"""
+    if command in FOLDER_COMMANDS:
+        paths = list(tree)
+    else:
+        paths = [path for files in tree.values() for path in files]
+
+    if cache == "warm" and command not in ("MOVE", "DELETE"):
+        return [paths[0]] * count
+    return [paths[i % len(paths)] for i in range(count)]
+
+
+def make_api_call(api_server, command: str):
+    local = threading.local()
+
+    def call(index: int, path: str):
+        if not hasattr(local, 'http'):
+            local.http = api_server.app.test_client()
+
+        message = f"{command} {path}"
+        if command in ("MOVE", "COPY"):
+            message += f" {ARCHIVE_FOLDER}"
+        response = local.http.post('/api/execute', json={"message": message, "To": f"whatsapp:+1555000{index:04d}"})
+        data = response.get_json(silent=True) or {}
+        if response.status_code != 200 or not data.get("success"):
+            return data.get("error") or f"HTTP {response.status_code}"
+        return None
+
+    return call
+
+
+def make_client_call(client, summarizer, command: str, list_max_files: int):
+    operations = {
+        "LIST": lambda path: client.list_files(path, max_files=list_max_files),
+        "FILESUMMARY": summarizer.summarize_single_document,
+        "FOLDERSUMMARY": summarizer.summarize_folder,
+        "MOVE": lambda path: client.move_file(path, ARCHIVE_FOLDER),
+        "COPY": lambda path: client.copy_file(path, ARCHIVE_FOLDER),
+        "DELETE": client.delete_file,
+    }
+    operation = operations[command]
+
+    def call(index: int, path: str):
+        result = operation(path)
+        return result.get("error") if isinstance(result, dict) else None
+
+    return call
+
+
+def run_command(args, target: str, command: str) -> dict:
+    """Build a fake Drive and the app's clients, then time the requests"""
+    from fake_drive import FakeDrive, FakeDriveServiceFactory, populate
+    from utils.google_drive_client import GoogleDriveClient
+    from utils.document_summarizer import DocumentSummarizer
+    from utils.llm_backends import StubBackend
+    from utils.lazy import LazyObject
+
+    count = args.warmup + args.requests
+    per_item = 1 if command in FOLDER_COMMANDS else args.files
+    folders = args.folders or max(1, math.ceil(count / per_item))
+
+    drive = FakeDrive(latency_ms=args.drive_latency_ms, bandwidth_mbps=args.drive_mbps)
+    tree = populate(drive, folders=folders, files_per_folder=args.files, doc_kb=args.doc_kb, kinds=args.kinds)
+    drive.create_folder(ARCHIVE_FOLDER.strip('/'))
+
+    client = GoogleDriveClient(service_factory=FakeDriveServiceFactory(drive))
+    backend = StubBackend(latency_ms=args.llm_latency_ms, ms_per_token=args.llm_ms_per_token, jitter=args.llm_jitter)
+    summarizer = DocumentSummarizer(backend=backend, drive_client=client)
+
+    if target == "api":
+        import api_server
+
+        api_server.drive_client = LazyObject(lambda: client, "drive_client")
+        api_server.summarizer = LazyObject(lambda: summarizer, "summarizer")
+        call = make_api_call(api_server, command)
+    else:
+        call = make_client_call(client, summarizer, command, int(os.environ.get('LIST_MAX_FILES', 20)))
+
+    paths = build_targets(tree, command, count, args.cache)
+    for index in range(args.warmup):
+        call(index, paths[index])
+
+    setup_rss = rss_mb()
+    drive_before = sum(drive.stats()["requests"].values())
+    llm_before = backend.stats()["calls"]
+
+    def timed(index: int):
+        started = perf_counter()
+        error = call(index, paths[index])
+        return perf_counter() - started, error
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started = perf_counter()
+        outcomes = list(pool.map(timed, range(args.warmup, count)))
+        elapsed = perf_counter() - started
+
+    drive_requests = sum(drive.stats()["requests"].values()) - drive_before
+    llm_calls = backend.stats()["calls"] - llm_before
+
+    # Extraction workers are only counted once they have exited
+    client.extraction_pool.shutdown()
+
+    latencies = [latency * 1000 for latency, _ in outcomes]
+    errors = [error for _, error in outcomes if error]
+    return {
+        "target": target,
+        "command": command,
+        "requests": len(outcomes),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": len(outcomes) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies),
+        "setup_rss_mb": setup_rss,
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "drive_requests_per_command": drive_requests / len(outcomes),
+        "llm_calls_per_command": llm_calls / len(outcomes),
+    }
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def child_env(args, scratch: str) -> dict:
+    """Environment for a child: no real services, no shared on-disk state, no rate limits"""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "CLIENT_INIT": "lazy",
+        "LLM_BACKEND": "stub",
+        "LLM_BACKEND_FOLDERSUMMARY": "",
+        "LLM_BACKEND_FILESUMMARY": "",
+        "JOB_CALLBACK_URL": "",
+        "SUMMARY_CACHE_PATH": "",
+        "TEXT_CACHE_DIR": os.path.join(scratch, "text_cache"),
+        "DRIVE_INDEX_PATH": os.path.join(scratch, "drive_index.sqlite3") if args.index else "",
+        "RATE_LIMIT_PER_MINUTE": "1000000000",
+        "GLOBAL_RATE_LIMIT_PER_MINUTE": "1000000000",
+    }
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env.setdefault("TRACING_EXPORTER", "none")
+    return env
+
+
+def run_child(args, argv: list, target: str, command: str) -> dict:
+    scratch = tempfile.mkdtemp(prefix="command-benchmark-")
+    try:
+        result_file = os.path.join(scratch, "result.json")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *argv, "--child", target, command, "--result-file", result_file],
+            cwd=ROOT, env=child_env(args, scratch), check=True
+        )
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def print_results(results: list):
+    print(f"{'target':<7} {'command':<14} {'req':>5} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'peak RSS MB':>12} {'drive/cmd':>10} {'llm/cmd':>8}")
+    for r in results:
+        print(f"{r['target']:<7} {r['command']:<14} {r['requests']:>5} {r['errors']:>4} {r['throughput_rps']:>8.2f} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['peak_rss_mb']:>12.1f} "
+              f"{r['drive_requests_per_command']:>10.1f} {r['llm_calls_per_command']:>8.1f}")
+        if r['first_error']:
+            print(f"        first error: {r['first_error']}")
+
+
+def compare(results: list, baseline: dict, config: dict, tolerance: float) -> list:
+    """Regressions of the current results against a saved baseline"""
+    if baseline.get("config") != config:
+        print("Warning: the baseline was recorded with a different workload; comparisons may be meaningless")
+
+    previous = {(r["target"], r["command"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        base = previous.get((r["target"], r["command"]))
+        if base is None:
+            continue
+        for key, higher_is_better in CHECKS:
+            if not base.get(key):
+                continue
+            change = (r[key] - base[key]) / base[key]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{r['target']} {r['command']}: {key} {base[key]:.1f} -> {r[key]:.1f} ({change:+.0%})")
+        if r["errors"] > base.get("errors", 0):
+            regressions.append(f"{r['target']} {r['command']}: errors {base.get('errors', 0)} -> {r['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WhatsApp commands against a fake Drive and LLM")
+    parser.add_argument("--commands", nargs="+", default=COMMANDS, choices=COMMANDS, type=str.upper,
+                        help="commands to measure")
+    parser.add_argument("--targets", nargs="+", default=TARGETS, choices=TARGETS,
+                        help="api: POST /api/execute; client: GoogleDriveClient/DocumentSummarizer calls")
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per command")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured requests first")
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold",
+                        help="cold: every request names a different file or folder; warm: all repeat the first")
+    parser.add_argument("--folders", type=int, default=0,
+                        help="synthetic folders (default: enough for a distinct target per request)")
+    parser.add_argument("--files", type=int, default=20, help="documents per folder")
+    parser.add_argument("--doc-kb", type=float, default=16, help="kilobytes of text per document")
+    parser.add_argument("--kinds", nargs="+", default=["pdf", "docx", "txt", "gdoc"],
+                        choices=["pdf", "docx", "txt", "gdoc"], help="document types, used in turn")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="fixed latency of each LLM call")
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.05, help="added LLM latency per prompt token")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="+/- share of LLM latency varied per prompt")
+    parser.add_argument("--drive-latency-ms", type=float, default=20, help="latency of each Drive HTTP request")
+    parser.add_argument("--drive-mbps", type=float, default=0, help="Drive download bandwidth (0 = unlimited)")
+    parser.add_argument("--index", action="store_true", help="enable the local Drive metadata index")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--child", nargs=2, metavar=("TARGET", "COMMAND"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        result = run_command(args, *args.child)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f)
+        return
+
+    argv = sys.argv[1:]
+    results = []
+    for command in args.commands:
+        for target in args.targets:
+            results.append(run_child(args, argv, target, command))
+
+    print_results(results)
+
+    config = workload_config(args)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+        print(f"Saved results to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, config, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
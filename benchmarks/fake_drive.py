@@ -0,0 +1,676 @@
+"""
+In-memory fake of the Google Drive v3 REST API, for benchmarks.
+
+FakeDriveHttp stands in for httplib2.Http, so the real googleapiclient
+service, MediaIoBaseDownload (ranged media requests) and batch requests run
+unchanged on top of it and every request goes through the app's own
+instrumented HttpRequest. Only the network is simulated: each request waits
+latency_ms, and media bytes take as long as bandwidth_mbps allows.
+
+Supported: files.list (the query subset the app sends), get, get_media,
+export_media, update (parents), copy and delete, the batch endpoint, and
+changes.getStartPageToken / changes.list for the metadata index.
+
+    drive = FakeDrive(latency_ms=20)
+    populate(drive, folders=2, files_per_folder=10, doc_kb=16)
+    client = GoogleDriveClient(service_factory=FakeDriveServiceFactory(drive))
+"""
+
+import io
+import re
+import json
+import time
+import random
+import hashlib
+import zipfile
+import functools
+import threading
+from collections import Counter
+from email.parser import Parser
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import httplib2
+
+from utils.drive_service import DriveServiceFactory
+from utils.google_drive_client import GoogleDriveClient
+
+FOLDER_MIME_TYPE = GoogleDriveClient.FOLDER_MIME_TYPE
+GOOGLE_DOC_MIME_TYPE = GoogleDriveClient.GOOGLE_DOC_MIME_TYPE
+DOCX_MIME_TYPE = GoogleDriveClient.DOCX_MIME_TYPE
+PDF_MIME_TYPE = 'application/pdf'
+TEXT_MIME_TYPE = 'text/plain'
+
+ROOT_ID = 'root'
+MODIFIED_TIME = '2024-01-01T00:00:00.000Z'
+
+# Synthetic document kinds: mime type and file extension
+KINDS = {
+    "pdf": (PDF_MIME_TYPE, ".pdf"),
+    "docx": (DOCX_MIME_TYPE, ".docx"),
+    "txt": (TEXT_MIME_TYPE, ".txt"),
+    "gdoc": (GOOGLE_DOC_MIME_TYPE, ""),
+}
+
+# Fields Drive returns when the request names none
+DEFAULT_FILE_FIELDS = "kind, id, name, mimeType"
+DEFAULT_LIST_FIELDS = f"kind, nextPageToken, incompleteSearch, files({DEFAULT_FILE_FIELDS})"
+
+PATH_PATTERN = re.compile(r'^/drive/v3/(files|changes)(?:/([^/]+))?(?:/([A-Za-z]+))?$')
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)')
+QUERY_TOKEN = re.compile(r"\s*(?:(\()|(\))|'((?:[^'\\]|\\.)*)'|(!=|=)|([A-Za-z0-9_]+))")
+FIELDS_TOKEN = re.compile(r'\s*([A-Za-z0-9_*]+|[(),])')
+
+WORDS = (
+    "drive folder report quarterly budget summary project meeting notes review plan "
+    "design launch customer revenue forecast update status risk milestone team action "
+    "item decision contract invoice policy draft final research analysis market growth "
+    "product feature release schedule owner deadline metric target result proposal"
+).split()
+
+
+class FakeDriveError(Exception):
+    def __init__(self, status: int, message: str, reason: str = "invalid"):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+# ----------------------------------------------------------------------
+# Query and field mask parsing
+# ----------------------------------------------------------------------
+
+def _tokenize(pattern: re.Pattern, text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = pattern.match(text, position)
+        if not match or match.end() == position:
+            raise FakeDriveError(400, f"Invalid syntax near '{text[position:]}'")
+        tokens.append(next((str(group), value) for group, value in enumerate(match.groups()) if value is not None))
+        position = match.end()
+    return tokens
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_query(query: str) -> Tuple:
+    """Parse a files.list q string into a tree of ("and" | "or" | "not" | "cmp", ...) nodes"""
+    # Token kinds: 0 "(", 1 ")", 2 string, 3 operator, 4 word
+    tokens = _tokenize(QUERY_TOKEN, query)
+    position = 0
+
+    def peek_word() -> Optional[str]:
+        if position < len(tokens) and tokens[position][0] == '4':
+            return tokens[position][1].lower()
+        return None
+
+    def take(kind: str) -> str:
+        nonlocal position
+        if position >= len(tokens) or tokens[position][0] != kind:
+            raise FakeDriveError(400, f"Invalid query: {query}")
+        position += 1
+        return tokens[position - 1][1]
+
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while peek_word() == 'or':
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and():
+        nonlocal position
+        nodes = [parse_factor()]
+        while peek_word() == 'and':
+            position += 1
+            nodes.append(parse_factor())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_factor():
+        nonlocal position
+        if peek_word() == 'not':
+            position += 1
+            return ("not", parse_factor())
+        if position < len(tokens) and tokens[position][0] == '0':
+            position += 1
+            node = parse_or()
+            take('1')
+            return node
+        if position < len(tokens) and tokens[position][0] == '2':
+            # 'value' in parents
+            value = _unescape(take('2'))
+            if peek_word() != 'in':
+                raise FakeDriveError(400, f"Invalid query: {query}")
+            position += 1
+            return ("cmp", take('4'), "in", value)
+
+        field = take('4')
+        if peek_word() == 'contains':
+            position += 1
+            return ("cmp", field, "contains", _unescape(take('2')))
+        operator = take('3')
+        if position < len(tokens) and tokens[position][0] == '2':
+            value = _unescape(take('2'))
+        else:
+            value = take('4').lower() == 'true'
+        return ("cmp", field, operator, value)
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise FakeDriveError(400, f"Invalid query: {query}")
+    return tree
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value)
+
+
+def parent_hint(tree: Tuple) -> Optional[str]:
+    """Folder a query is restricted to, so only its children need scanning"""
+    if tree[0] == "cmp" and tree[2] == "in" and tree[1] == "parents":
+        return tree[3]
+    if tree[0] == "and":
+        return next(filter(None, (parent_hint(node) for node in tree[1])), None)
+    return None
+
+
+def matches(tree: Tuple, file: Dict) -> bool:
+    kind = tree[0]
+    if kind == "and":
+        return all(matches(node, file) for node in tree[1])
+    if kind == "or":
+        return any(matches(node, file) for node in tree[1])
+    if kind == "not":
+        return not matches(tree[1], file)
+
+    _, field, operator, value = tree
+    if operator == "in":
+        return value in file.get(field, ())
+
+    actual = file.get(field, False if field == 'trashed' else None)
+    if field == 'name' and actual is not None:
+        # Name comparisons are case-insensitive
+        actual, value = actual.casefold(), value.casefold()
+    if operator == "contains":
+        return actual is not None and value in actual
+    if operator == "=":
+        return actual == value
+    return actual != value
+
+
+@functools.lru_cache(maxsize=256)
+def compile_fields(fields: str) -> Dict:
+    """Parse a field mask such as "nextPageToken, files(id, name)" into nested dicts"""
+    tokens = [value for _, value in _tokenize(FIELDS_TOKEN, fields)]
+    position = 0
+
+    def parse() -> Dict:
+        nonlocal position
+        selection = {}
+        while position < len(tokens) and tokens[position] != ')':
+            name = tokens[position]
+            position += 1
+            selection[name] = None
+            if position < len(tokens) and tokens[position] == '(':
+                position += 1
+                selection[name] = parse()
+                position += 1
+            if position < len(tokens) and tokens[position] == ',':
+                position += 1
+        return selection
+
+    return parse()
+
+
+def select_fields(value, selection: Optional[Dict]):
+    if selection is None or '*' in selection:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, selection) for item in value]
+    return {key: select_fields(value[key], sub) for key, sub in selection.items() if key in value}
+
+
+# ----------------------------------------------------------------------
+# Synthetic documents
+# ----------------------------------------------------------------------
+
+def make_lines(size: int, seed: int, width: int = 80) -> List[str]:
+    """Deterministic lines of filler words adding up to about size characters"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        words = []
+        length = 0
+        while length < width:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        line = " ".join(words).capitalize() + "."
+        lines.append(line)
+        total += len(line) + 1
+    return lines
+
+
+def make_text(size: int, seed: int) -> bytes:
+    return ("\n".join(make_lines(size, seed)) + "\n").encode('utf-8')
+
+
+def make_pdf(size: int, seed: int, lines_per_page: int = 50) -> bytes:
+    """A text PDF with one Helvetica text object per page"""
+    lines = make_lines(size, seed)
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td\n" + "".join(f"({line}) Tj T*\n" for line in page_lines) + "ET"
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(size: int, seed: int) -> bytes:
+    """A minimal Word document with one paragraph per line"""
+    paragraphs = "".join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in make_lines(size, seed))
+    parts = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType='
+            '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" Type='
+            '"http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ),
+        "word/document.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{paragraphs}</w:body></w:document>'
+        ),
+    }
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in parts.items():
+            archive.writestr(name, content)
+    return out.getvalue()
+
+
+GENERATORS = {"pdf": make_pdf, "docx": make_docx, "txt": make_text, "gdoc": make_text}
+
+
+# ----------------------------------------------------------------------
+# The fake service
+# ----------------------------------------------------------------------
+
+class FakeDrive:
+    """Thread-safe in-memory Drive: file resources, contents and a change log"""
+
+    def __init__(self, latency_ms: float = 0.0, bandwidth_mbps: float = 0.0):
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self._lock = threading.RLock()
+        self._files: Dict[str, Dict] = {}
+        self._content: Dict[str, bytes] = {}
+        self._children: Dict[str, Dict[str, None]] = {ROOT_ID: {}}
+        self._changes: List[str] = []
+        self._next_id = 0
+        self.requests = Counter()
+
+    # Setup helpers
+
+    def create_folder(self, name: str, parent: str = ROOT_ID) -> str:
+        return self._create({"name": name, "mimeType": FOLDER_MIME_TYPE, "parents": [parent]})
+
+    def create_file(self, name: str, mime_type: str, content: bytes, parent: str = ROOT_ID) -> str:
+        return self._create({"name": name, "mimeType": mime_type, "parents": [parent]}, content)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"files": len(self._files), "requests": dict(self.requests)}
+
+    def _create(self, resource: Dict, content: bytes = None) -> str:
+        with self._lock:
+            self._next_id += 1
+            file_id = f"fake{self._next_id:06d}"
+            resource = {
+                "kind": "drive#file",
+                "id": file_id,
+                "trashed": False,
+                "modifiedTime": MODIFIED_TIME,
+                **resource,
+            }
+            # Google Docs and folders have no size or checksum
+            if content is not None and resource["mimeType"] != GOOGLE_DOC_MIME_TYPE:
+                resource["size"] = str(len(content))
+                resource["md5Checksum"] = hashlib.md5(content).hexdigest()
+            self._files[file_id] = resource
+            if content is not None:
+                self._content[file_id] = content
+            if resource["mimeType"] == FOLDER_MIME_TYPE:
+                self._children[file_id] = {}
+            for parent in resource["parents"]:
+                self._children.setdefault(parent, {})[file_id] = None
+            self._changes.append(file_id)
+            return file_id
+
+    def _remove(self, file_id: str):
+        resource = self._files.pop(file_id)
+        self._content.pop(file_id, None)
+        for parent in resource["parents"]:
+            self._children.get(parent, {}).pop(file_id, None)
+        for child in list(self._children.pop(file_id, {})):
+            self._remove(child)
+        self._changes.append(file_id)
+
+    def _get(self, file_id: str) -> Dict:
+        resource = self._files.get(file_id)
+        if resource is None:
+            raise FakeDriveError(404, f"File not found: {file_id}.", "notFound")
+        return resource
+
+    # Transport
+
+    def handle(self, method: str, uri: str, body=None, headers: Dict = None) -> Tuple[int, Dict, bytes]:
+        """Answer one HTTP request with (status, headers, body), after the simulated network delay"""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._dispatch(method, uri, body, headers)
+
+    def _dispatch(self, method: str, uri: str, body, headers: Dict) -> Tuple[int, Dict, bytes]:
+        parsed = urlparse(uri)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+
+        if parsed.path.startswith('/batch/'):
+            self.requests["batch"] += 1
+            return self._batch(body, headers)
+
+        try:
+            match = PATH_PATTERN.match(parsed.path)
+            if not match:
+                raise FakeDriveError(404, f"Unknown endpoint {method} {parsed.path}", "notFound")
+            collection, resource_id, action = match.groups()
+            handler, operation = self._route(method, collection, resource_id, action, params)
+
+            if isinstance(body, bytes):
+                body = body.decode('utf-8')
+            with self._lock:
+                self.requests[operation] += 1
+                status, response_headers, content = handler(resource_id, params, json.loads(body) if body else {}, headers)
+        except FakeDriveError as e:
+            error = {"error": {"code": e.status, "message": str(e), "errors": [{"reason": e.reason, "message": str(e)}]}}
+            return e.status, {"content-type": "application/json; charset=UTF-8"}, json.dumps(error).encode('utf-8')
+
+        if self.bandwidth_mbps and operation in ("files.get_media", "files.export"):
+            time.sleep(len(content) * 8 / (self.bandwidth_mbps * 1e6))
+        return status, response_headers, content
+
+    def _route(self, method: str, collection: str, resource_id: str, action: str, params: Dict):
+        if collection == 'changes':
+            if method == 'GET' and resource_id == 'startPageToken':
+                return self._start_page_token, "changes.getStartPageToken"
+            if method == 'GET' and resource_id is None:
+                return self._list_changes, "changes.list"
+        elif resource_id is None:
+            if method == 'GET':
+                return self._list, "files.list"
+        elif action == 'export' and method == 'GET':
+            return self._export, "files.export"
+        elif action == 'copy' and method == 'POST':
+            return self._copy, "files.copy"
+        elif action is None:
+            if method == 'GET':
+                if params.get('alt') == 'media':
+                    return self._media, "files.get_media"
+                return self._get_file, "files.get"
+            if method == 'PATCH':
+                return self._update, "files.update"
+            if method == 'DELETE':
+                return self._delete, "files.delete"
+        raise FakeDriveError(405, f"Unsupported request {method} {collection}/{resource_id or ''}/{action or ''}")
+
+    def _json(self, value, fields: str = None, status: int = 200) -> Tuple[int, Dict, bytes]:
+        if fields:
+            value = select_fields(value, compile_fields(fields))
+        return status, {"content-type": "application/json; charset=UTF-8"}, json.dumps(value).encode('utf-8')
+
+    # Handlers (called with the lock held)
+
+    def _list(self, _, params: Dict, body: Dict, headers: Dict):
+        tree = compile_query(params.get('q') or "trashed=false")
+        parent = parent_hint(tree)
+        candidates = self._children.get(parent, {}) if parent else self._files
+        found = [self._files[file_id] for file_id in candidates if matches(tree, self._files[file_id])]
+
+        start = int(params.get('pageToken') or 0)
+        page_size = max(1, min(int(params.get('pageSize') or 100), 1000))
+        result = {"kind": "drive#fileList", "incompleteSearch": False, "files": found[start:start + page_size]}
+        if start + page_size < len(found):
+            result["nextPageToken"] = str(start + page_size)
+        return self._json(result, params.get('fields') or DEFAULT_LIST_FIELDS)
+
+    def _get_file(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        if file_id == ROOT_ID:
+            return self._json({"kind": "drive#file", "id": ROOT_ID, "name": "My Drive", "mimeType": FOLDER_MIME_TYPE},
+                              params.get('fields') or DEFAULT_FILE_FIELDS)
+        return self._json(self._get(file_id), params.get('fields') or DEFAULT_FILE_FIELDS)
+
+    def _media(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        self._get(file_id)
+        content = self._content.get(file_id)
+        if content is None:
+            raise FakeDriveError(403, "Only files with binary content can be downloaded.", "fileNotDownloadable")
+
+        total = len(content)
+        match = RANGE_PATTERN.match(headers.get('range', ''))
+        if not match:
+            return 200, {"content-length": str(total)}, content
+        if total == 0:
+            return 416, {"content-range": "bytes */0"}, b""
+
+        first = int(match.group(1))
+        last = min(int(match.group(2)) if match.group(2) else total - 1, total - 1)
+        if first >= total:
+            return 416, {"content-range": f"bytes */{total}"}, b""
+        return 206, {"content-range": f"bytes {first}-{last}/{total}"}, content[first:last + 1]
+
+    def _export(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        resource = self._get(file_id)
+        if resource["mimeType"] != GOOGLE_DOC_MIME_TYPE:
+            raise FakeDriveError(403, "Export only supports Docs Editors files.", "fileNotExportable")
+        if params.get('mimeType') != TEXT_MIME_TYPE:
+            raise FakeDriveError(400, f"Unsupported export format {params.get('mimeType')}")
+        content = self._content.get(file_id, b"")
+        return 200, {"content-type": TEXT_MIME_TYPE, "content-length": str(len(content))}, content
+
+    def _update(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        resource = self._get(file_id)
+        removed = set(filter(None, params.get('removeParents', '').split(',')))
+        added = [parent for parent in params.get('addParents', '').split(',') if parent]
+        for parent in added:
+            if parent != ROOT_ID:
+                self._get(parent)
+
+        for parent in removed:
+            self._children.get(parent, {}).pop(file_id, None)
+        for parent in added:
+            self._children.setdefault(parent, {})[file_id] = None
+        resource["parents"] = [parent for parent in resource["parents"] if parent not in removed]
+        resource["parents"] += [parent for parent in added if parent not in resource["parents"]]
+        if "name" in body:
+            resource["name"] = body["name"]
+
+        self._changes.append(file_id)
+        return self._json(resource, params.get('fields') or DEFAULT_FILE_FIELDS)
+
+    def _copy(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        source = self._get(file_id)
+        if source["mimeType"] == FOLDER_MIME_TYPE:
+            raise FakeDriveError(403, "Folders cannot be copied.", "cannotCopyFile")
+        for parent in body.get("parents", []):
+            if parent != ROOT_ID:
+                self._get(parent)
+
+        copy_id = self._create({
+            "name": body.get("name") or f"Copy of {source['name']}",
+            "mimeType": source["mimeType"],
+            "parents": list(body.get("parents") or source["parents"]),
+        }, self._content.get(file_id))
+        return self._json(self._files[copy_id], params.get('fields') or DEFAULT_FILE_FIELDS)
+
+    def _delete(self, file_id: str, params: Dict, body: Dict, headers: Dict):
+        self._get(file_id)
+        self._remove(file_id)
+        return 204, {}, b""
+
+    def _start_page_token(self, _, params: Dict, body: Dict, headers: Dict):
+        return self._json({"kind": "drive#startPageToken", "startPageToken": str(len(self._changes))})
+
+    def _list_changes(self, _, params: Dict, body: Dict, headers: Dict):
+        start = int(params.get('pageToken') or 0)
+        page_size = max(1, min(int(params.get('pageSize') or 100), 1000))
+        changes = []
+        for file_id in self._changes[start:start + page_size]:
+            resource = self._files.get(file_id)
+            change = {"kind": "drive#change", "changeType": "file", "fileId": file_id, "removed": resource is None}
+            if resource is not None:
+                change["file"] = resource
+            changes.append(change)
+
+        result = {"kind": "drive#changeList", "changes": changes}
+        if start + page_size < len(self._changes):
+            result["nextPageToken"] = str(start + page_size)
+        else:
+            result["newStartPageToken"] = str(len(self._changes))
+        return self._json(result, params.get('fields'))
+
+    def _batch(self, body, headers: Dict) -> Tuple[int, Dict, bytes]:
+        """Split a multipart/mixed batch into its requests and answer each one"""
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        message = Parser().parsestr(f"content-type: {headers.get('content-type', '')}\r\n\r\n{body}")
+        if not message.is_multipart():
+            return 400, {"content-type": "text/plain"}, b"Batch body must be multipart/mixed"
+
+        boundary = "batch_fake_drive_boundary"
+        parts = []
+        for part in message.get_payload():
+            request_line, _, rest = part.get_payload().partition("\n")
+            method, path, _ = request_line.strip().split(" ", 2)
+            inner_headers = Parser().parsestr(rest, headersonly=True)
+            separator = "\r\n\r\n" if "\r\n\r\n" in rest else "\n\n"
+            inner_body = rest.split(separator, 1)[1] if separator in rest else ""
+
+            # Answered within the batch's round trip
+            status, response_headers, content = self._dispatch(
+                method, f"https://www.googleapis.com{path}", inner_body.strip() or None, dict(inner_headers.items()))
+
+            content_id = part["Content-ID"] or ""
+            response_headers = {"content-type": "application/json; charset=UTF-8", **response_headers}
+            lines = [f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}"]
+            lines += [f"{key}: {value}" for key, value in response_headers.items()]
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.strip('<>')}>\r\n\r\n"
+                + "\r\n".join(lines) + "\r\n\r\n" + content.decode('utf-8') + "\r\n"
+            )
+
+        payload = "".join(parts) + f"--{boundary}--\r\n"
+        return 200, {"content-type": f"multipart/mixed; boundary={boundary}"}, payload.encode('utf-8')
+
+
+class FakeDriveHttp:
+    """httplib2.Http look-alike that sends requests to a FakeDrive"""
+
+    def __init__(self, drive: FakeDrive):
+        self.drive = drive
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        status, response_headers, content = self.drive.handle(method, uri, body, headers)
+        return httplib2.Response({"status": status, **response_headers}), content
+
+
+class FakeDriveServiceFactory(DriveServiceFactory):
+    """DriveServiceFactory whose per-thread transports talk to a FakeDrive.
+
+    The service is still built from the bundled discovery document with the
+    app's instrumented request class, so metrics and spans are recorded as
+    in production.
+    """
+
+    def __init__(self, drive: FakeDrive):
+        super().__init__(GoogleDriveClient.SCOPES)
+        self.drive = drive
+
+    def _load_credentials(self):
+        return SimpleNamespace(token="fake-token", refresh_token=None, valid=True, expiry=None)
+
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = FakeDriveHttp(self.drive)
+        return http
+
+
+def populate(drive: FakeDrive, folders: int = 1, files_per_folder: int = 10, doc_kb: float = 16,
+             kinds: List[str] = None, root_name: str = "bench", variants: int = 4) -> Dict[str, List[str]]:
+    """Create /<root_name>/folder-NN folders of synthetic documents.
+
+    Kinds (pdf, docx, txt, gdoc) take turns; doc_kb is the text per document.
+    Files reuse one of `variants` generated contents per kind so memory stays
+    small, but every file has its own ID, so caches see distinct documents.
+    Returns {folder path: [file paths]}.
+    """
+    kinds = kinds or list(KINDS)
+    size = int(doc_kb * 1024)
+    contents = {
+        kind: [GENERATORS[kind](size, seed) for seed in range(variants)]
+        for kind in kinds
+    }
+
+    root_id = drive.create_folder(root_name)
+    tree = {}
+    for folder_number in range(folders):
+        folder_name = f"folder-{folder_number:02d}"
+        folder_id = drive.create_folder(folder_name, parent=root_id)
+        paths = tree[f"/{root_name}/{folder_name}"] = []
+
+        for file_number in range(files_per_folder):
+            kind = kinds[file_number % len(kinds)]
+            mime_type, extension = KINDS[kind]
+            name = f"doc-{file_number:03d}{extension}"
+            content = contents[kind][(folder_number + file_number) % variants]
+            drive.create_file(name, mime_type, content, parent=folder_id)
+            paths.append(f"/{root_name}/{folder_name}/{name}")
+    return tree
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the API server.
+
+Starts fresh interpreters that import api_server and answer GET / through
+Flask's test client, and reports how long each step took. Run from the
+repository root:
+
+    python benchmarks/startup_benchmark.py --runs 10 --modes lazy background
+    python benchmarks/startup_benchmark.py --importtime    # slowest imports
+
+"eager" mode authenticates to Drive and configures Gemini during import, so
+it needs real credentials.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import api_server
+imported = time.perf_counter()
+response = api_server.app.test_client().get('/')
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (answered - started) * 1000,
+    "status": response.status_code,
+}))
+"""
+
+
+def run_probe(mode: str) -> dict:
+    env = {**os.environ, "CLIENT_INIT": mode}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values: list) -> str:
+    return (f"median {statistics.median(values):8.1f} ms   "
+            f"min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+
+def slowest_imports(limit: int):
+    """Print the modules with the largest cumulative import time"""
+    env = {**os.environ, "CLIENT_INIT": "lazy"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api_server"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), module.strip()))
+
+    print("Slowest imports (cumulative) for 'import api_server':")
+    for cumulative_us, module in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API server cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per mode")
+    parser.add_argument("--modes", nargs="+", default=["lazy", "background"],
+                        choices=["lazy", "background", "eager"], help="CLIENT_INIT modes to measure")
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports instead")
+    parser.add_argument("--limit", type=int, default=15, help="modules listed with --importtime")
+    args = parser.parse_args()
+
+    if args.importtime:
+        slowest_imports(args.limit)
+        return
+
+    for mode in args.modes:
+        samples = [run_probe(mode) for _ in range(args.runs)]
+        print(f"CLIENT_INIT={mode} ({args.runs} runs)")
+        print(f"  import api_server : {summarize([s['import_ms'] for s in samples])}")
+        print(f"  first GET /       : {summarize([s['first_response_ms'] for s in samples])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Gunicorn settings for serving api_server in production:
+
+    gunicorn -c gunicorn.conf.py api_server:app
+
+The app is imported once in the master and the Drive and Gemini clients are
+built there, so every worker starts with them ready and shares their memory
+copy-on-write. Each worker then opens its own connections, SQLite handles,
+extraction processes and job threads (api_server.reset_after_fork).
+
+Job status and caches held in memory are per worker; rate limits are
+shared through RATE_LIMIT_DB_PATH.
+"""
+
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Requests mostly wait on Drive and Gemini, so each worker serves several at once
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', '8'))
+
+preload_app = True
+
+# Summaries of large folders can take minutes
+timeout = int(os.environ.get('WEB_TIMEOUT_SECONDS', '300'))
+# On SIGTERM workers stop accepting, then get this long to finish requests and queued jobs
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT_SECONDS', '120'))
+keepalive = 5
+
+accesslog = '-'
+
+# Tell api_server not to start its warm-up thread: threads do not survive fork
+os.environ['SERVER_PRELOAD'] = '1'
+
+
+def when_ready(server):
+    """Build the clients in the master, after preload and before the first fork"""
+    import api_server
+
+    if api_server.CLIENT_INIT == 'lazy':
+        return
+
+    try:
+        api_server.summarizer.resolve()
+    except Exception as e:
+        if api_server.CLIENT_INIT == 'eager':
+            raise
+        # Workers retry on their own
+        server.log.error("Error building clients before fork: %s", e)
+
+
+def post_fork(server, worker):
+    import api_server
+
+    api_server.reset_after_fork()
+
+
+def worker_exit(server, worker):
+    import api_server
+
+    api_server.shutdown()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture
+def fake_drive():
+    from fake_drive import FakeDrive
+    return FakeDrive()
+
+
+@pytest.fixture
+def drive_client(fake_drive, monkeypatch):
+    """GoogleDriveClient talking to an in-memory Drive, extracting in-process"""
+    monkeypatch.setenv('EXTRACTION_WORKERS', '0')
+    monkeypatch.delenv('DRIVE_INDEX_PATH', raising=False)
+
+    from fake_drive import FakeDriveServiceFactory
+    from utils.google_drive_client import GoogleDriveClient
+    return GoogleDriveClient(service_factory=FakeDriveServiceFactory(fake_drive))
+
+
+@pytest.fixture
+def summarizer(drive_client, monkeypatch):
+    monkeypatch.setenv('TEXT_CACHE_DIR', '')
+    monkeypatch.delenv('SUMMARY_CACHE_PATH', raising=False)
+
+    from utils.document_summarizer import DocumentSummarizer
+    from utils.llm_backends import StubBackend
+    summarizer = DocumentSummarizer(backend=StubBackend(latency_ms=0), drive_client=drive_client)
+    yield summarizer
+    summarizer.shutdown()
+
+
+@pytest.fixture
+def drive_service(fake_drive):
+    """Drive v3 resource built against the in-memory Drive"""
+    from fake_drive import FakeDriveServiceFactory
+    return FakeDriveServiceFactory(fake_drive).service
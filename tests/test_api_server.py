@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setenv('CLIENT_INIT', 'lazy')
+    monkeypatch.setenv('RATE_LIMIT_DB_PATH', '')
+
+    import api_server
+    from utils.job_queue import JobQueue
+    # No workers, so queued jobs never touch Drive
+    monkeypatch.setattr(api_server, 'job_queue', JobQueue(workers=0))
+    return api_server
+
+
+def submit(api, message):
+    parsed = api.command_parser.parse_message(message)
+    return api._submit_job({"async": "true"}, parsed["command"], parsed)
+
+
+def test_summary_jobs_for_the_same_path_are_shared(api):
+    first = submit(api, "FILESUMMARY /Docs/a.pdf")
+
+    for spelling in ("FILESUMMARY /Docs/a.pdf/", "FILESUMMARY //docs//A.PDF"):
+        assert submit(api, spelling)["job_id"] == first["job_id"]
+
+    assert submit(api, "FILESUMMARY /Docs/b.pdf")["job_id"] != first["job_id"]
+    assert submit(api, "FOLDERSUMMARY /Docs/a.pdf")["job_id"] != first["job_id"]
+
+
+def test_commands_without_a_way_to_reply_later_run_inline(api):
+    parsed = api.command_parser.parse_message("FILESUMMARY /Docs/a.pdf")
+
+    assert api._submit_job({}, parsed["command"], parsed) is None
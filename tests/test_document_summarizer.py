@@ -0,0 +1,36 @@
+def test_parse_batch_summary_splits_files_and_overview(summarizer):
+    reply = """Here are the summaries.
+
+### FILE 1: report.pdf
+- Quarterly revenue grew.
+
+### FILE 2
+- Meeting notes.
+
+### FOLDER OVERVIEW
+Finance documents for Q3.
+"""
+    parsed = summarizer._parse_batch_summary(reply, 2)
+
+    assert parsed == {
+        "summaries": {0: "- Quarterly revenue grew.", 1: "- Meeting notes."},
+        "overview": "Finance documents for Q3.",
+    }
+
+
+def test_parse_batch_summary_accepts_other_heading_styles(summarizer):
+    reply = "**FILE 1:**\nFirst.\n\n  ## file 2\nSecond.\n"
+
+    assert summarizer._parse_batch_summary(reply, 2)["summaries"] == {0: "First.", 1: "Second."}
+
+
+def test_parse_batch_summary_ignores_unknown_empty_and_repeated_sections(summarizer):
+    reply = "### FILE 1\nFirst.\n### FILE 1\nAgain.\n### FILE 2\n\n### FILE 7\nStray.\n"
+
+    parsed = summarizer._parse_batch_summary(reply, 3)
+
+    assert parsed == {"summaries": {0: "First."}, "overview": None}
+
+
+def test_parse_batch_summary_without_headings_returns_nothing(summarizer):
+    assert summarizer._parse_batch_summary("Just some prose.", 2) == {"summaries": {}, "overview": None}
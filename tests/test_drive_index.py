@@ -0,0 +1,127 @@
+import pytest
+
+from utils.drive_index import DriveMetadataIndex
+
+
+class ListingHook:
+    """Drive service whose files().list() calls run a callback before answering"""
+
+    def __init__(self, service, on_list):
+        self._service = service
+        self._on_list = on_list
+
+    def __getattr__(self, name):
+        return getattr(self._service, name)
+
+    def files(self):
+        hook = self
+        resource = self._service.files()
+
+        class Files:
+            def __getattr__(self, name):
+                return getattr(resource, name)
+
+            def list(self, **kwargs):
+                request = resource.list(**kwargs)
+                execute = request.execute
+
+                def run(*args, **kw):
+                    hook._on_list()
+                    return execute(*args, **kw)
+                request.execute = run
+                return request
+        return Files()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "index.sqlite3")
+
+
+@pytest.fixture
+def reports(fake_drive):
+    folder = fake_drive.create_folder("Reports")
+    fake_drive.create_file("q3.pdf", "application/pdf", b"%PDF", parent=folder)
+    return folder
+
+
+def test_seed_mirrors_the_drive(db_path, drive_service, reports):
+    index = DriveMetadataIndex(db_path)
+    assert not index.is_seeded()
+
+    assert index.seed(drive_service)
+
+    assert index.is_seeded()
+    assert index.find_child("root", "reports", folder=True)["id"] == reports
+    assert [file["name"] for file in index.iter_children(reports)] == ["q3.pdf"]
+
+
+def test_sync_applies_changes(db_path, fake_drive, drive_service, reports):
+    index = DriveMetadataIndex(db_path)
+    index.seed(drive_service)
+    report = index.find_child(reports, "q3.pdf")["id"]
+
+    drive_service.files().delete(fileId=report).execute()
+    fake_drive.create_file("q4.pdf", "application/pdf", b"%PDF", parent=reports)
+
+    assert index.sync(drive_service, force=True) == 2
+    assert [file["name"] for file in index.iter_children(reports)] == ["q4.pdf"]
+
+
+def test_readers_keep_the_old_mirror_while_another_process_reseeds(db_path, fake_drive, drive_service, reports):
+    reader = DriveMetadataIndex(db_path)
+    reader.seed(drive_service)
+    fake_drive.create_folder("Archive")
+    seen = []
+
+    def during_crawl():
+        seen.append((reader.is_seeded(), reader.find_child("root", "Reports", folder=True)))
+
+    DriveMetadataIndex(db_path).seed(ListingHook(drive_service, during_crawl))
+
+    assert seen[0][0] and seen[0][1]["id"] == reports
+    assert reader.find_child("root", "Archive", folder=True) is not None
+
+
+def test_only_one_process_crawls_at_a_time(db_path, drive_service, reports):
+    first = DriveMetadataIndex(db_path)
+    second = DriveMetadataIndex(db_path)
+    assert first._claim_seed()
+
+    assert not second.seed(drive_service)
+    assert not second.is_seeded()
+
+    first._release_seed()
+    assert second.seed(drive_service)
+
+
+def test_an_abandoned_seed_claim_is_taken_over(db_path, drive_service, reports):
+    crashed = DriveMetadataIndex(db_path)
+    crashed.SEED_LEASE_SECONDS = -1
+    assert crashed._claim_seed()
+
+    assert DriveMetadataIndex(db_path).seed(drive_service)
+
+
+def test_generation_is_shared_by_processes(db_path, fake_drive, drive_service, reports):
+    first = DriveMetadataIndex(db_path)
+    second = DriveMetadataIndex(db_path)
+    first.seed(drive_service)
+    seeded = second.generation
+    assert seeded == first.generation > 0
+
+    fake_drive.create_file("q4.pdf", "application/pdf", b"%PDF", parent=reports)
+    assert first.sync(drive_service, force=True) == 1
+
+    # The change feed has already moved on, but the second process still sees the bump
+    assert second.sync(drive_service, force=True) == 0
+    assert second.generation == seeded + 1
+
+
+def test_sync_without_changes_keeps_the_generation(db_path, drive_service, reports):
+    index = DriveMetadataIndex(db_path)
+    index.seed(drive_service)
+    generation = index.generation
+
+    assert index.sync(drive_service, force=True) == 0
+    assert index.generation == generation
@@ -0,0 +1,101 @@
+import socket
+
+import pytest
+
+from utils.google_drive_client import TooManyFilesError
+
+
+@pytest.fixture
+def projects(fake_drive):
+    folder = fake_drive.create_folder("Projects")
+    ids = {
+        name: fake_drive.create_file(name, "text/plain", b"text", parent=folder)
+        for name in ("a.tmp", "B.TMP", "notes.txt", "[draft].txt")
+    }
+    ids["old.tmp"] = fake_drive.create_folder("old.tmp", parent=folder)
+    ids["Projects"] = folder
+    return ids
+
+
+def test_glob_matches_files_case_insensitively(drive_client, projects):
+    items, missing = drive_client.expand_paths(["/Projects/*.tmp"])
+
+    assert sorted(item["path"] for item in items) == ["/Projects/B.TMP", "/Projects/a.tmp"]
+    assert all(item["parent_id"] == projects["Projects"] for item in items)
+    assert missing == []
+
+
+def test_glob_does_not_match_folders(drive_client, projects):
+    items, _ = drive_client.expand_paths(["/Projects/*"])
+
+    assert projects["old.tmp"] not in {item["id"] for item in items}
+    assert len(items) == 4
+
+
+def test_question_mark_matches_one_character(drive_client, projects):
+    items, _ = drive_client.expand_paths(["/Projects/?.tmp"])
+
+    assert sorted(item["name"] for item in items) == ["B.TMP", "a.tmp"]
+
+
+def test_brackets_are_matched_literally(drive_client, projects):
+    items, _ = drive_client.expand_paths(["/Projects/[draft]*"])
+
+    assert [item["name"] for item in items] == ["[draft].txt"]
+
+
+def test_plain_paths_and_globs_are_deduplicated(drive_client, projects):
+    items, missing = drive_client.expand_paths(["/Projects/a.tmp", "/Projects/*.tmp"])
+
+    assert sorted(item["id"] for item in items) == sorted([projects["a.tmp"], projects["B.TMP"]])
+    assert missing == []
+
+
+def test_unmatched_paths_are_reported(drive_client, projects):
+    items, missing = drive_client.expand_paths(["/Projects/*.pdf", "/Projects/gone.txt", "/Nowhere/*.txt", "/*.txt"])
+
+    assert items == []
+    assert [result["path"] for result in missing] == ["/Projects/*.pdf", "/Nowhere/*.txt", "/*.txt", "/Projects/gone.txt"]
+    assert all(not result["success"] for result in missing)
+
+
+def test_too_many_matches_are_refused(drive_client, projects):
+    drive_client.bulk_max_items = 1
+
+    with pytest.raises(TooManyFilesError, match="at most 1"):
+        drive_client.expand_paths(["/Projects/*.tmp"])
+
+    assert drive_client.delete_files(["/Projects/*.tmp"]) == {"error": "2 files match; at most 1 can be changed at once"}
+    assert len(drive_client.expand_paths(["/Projects/a.tmp"])[0]) == 1
+
+
+def test_bulk_delete_reports_each_file(drive_client, projects):
+    result = drive_client.delete_files(["/Projects/*.tmp", "/Projects/gone.txt"])
+
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert drive_client.expand_paths(["/Projects/*.tmp"]) == ([], [{"path": "/Projects/*.tmp", "success": False, "error": "No files match"}])
+
+
+def test_transport_error_fails_only_its_batch(drive_client, projects, monkeypatch):
+    drive_client.BATCH_SIZE = 1
+    calls = []
+    original = drive_client.service.new_batch_http_request
+
+    def new_batch_http_request(**kwargs):
+        batch = original(**kwargs)
+        execute = batch.execute
+
+        def flaky(*args, **kw):
+            calls.append(1)
+            if len(calls) == 2:
+                raise socket.timeout("timed out")
+            return execute(*args, **kw)
+        batch.execute = flaky
+        return batch
+
+    monkeypatch.setattr(drive_client.service, "new_batch_http_request", new_batch_http_request)
+
+    result = drive_client.delete_files(["/Projects/a.tmp", "/Projects/B.TMP", "/Projects/notes.txt"])
+
+    assert [entry["success"] for entry in result["results"]] == [True, False, True]
+    assert result["results"][1]["error"] == "timed out"
@@ -0,0 +1,172 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from utils import job_queue as job_queue_module
+from utils.job_queue import Job, JobQueue, QueueFullError
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(workers=1)
+    yield queue
+    queue.shutdown(wait=True)
+
+
+def blocker():
+    """A job function that runs until released"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+        return "unblocked"
+    return run, started, release
+
+
+def test_job_result_can_be_polled(queue):
+    job = queue.submit("key", lambda: {"answer": 42}, command="FILESUMMARY")
+
+    assert job.done.wait(5)
+    assert queue.get(job.id).to_dict()["result"] == {"answer": 42}
+    assert job.status == Job.DONE
+
+
+def test_failed_job_reports_its_error(queue):
+    def fail():
+        raise RuntimeError("boom")
+
+    job = queue.submit("key", fail)
+
+    assert job.done.wait(5)
+    assert job.to_dict()["status"] == Job.FAILED
+    assert job.to_dict()["error"] == "boom"
+
+
+def test_identical_jobs_in_flight_are_shared(queue):
+    run, started, release = blocker()
+    first = queue.submit("FOLDERSUMMARY:/docs", run)
+    assert started.wait(5)
+
+    second = queue.submit("FOLDERSUMMARY:/docs", run)
+    other = queue.submit("FOLDERSUMMARY:/other", lambda: None)
+    release.set()
+
+    assert second is first and other is not first
+    assert queue.stats()["deduplicated"] == 1
+
+    # Once finished, the same key starts a new job
+    assert first.done.wait(5)
+    assert queue.submit("FOLDERSUMMARY:/docs", lambda: None) is not first
+
+
+def test_lower_priority_values_run_first(queue):
+    run, started, release = blocker()
+    order = []
+    queue.submit("blocker", run)
+    assert started.wait(5)
+
+    jobs = [
+        queue.submit("folder", lambda: order.append("folder"), priority=2),
+        queue.submit("file", lambda: order.append("file"), priority=1),
+        queue.submit("file-2", lambda: order.append("file-2"), priority=1),
+    ]
+    release.set()
+
+    assert all(job.done.wait(5) for job in jobs)
+    assert order == ["file", "file-2", "folder"]
+
+
+def test_full_queue_refuses_new_jobs():
+    queue = JobQueue(workers=1, max_queued=1)
+    run, started, release = blocker()
+    queue.submit("running", run)
+    assert started.wait(5)
+    queue.submit("queued", lambda: None)
+
+    with pytest.raises(QueueFullError):
+        queue.submit("refused", lambda: None)
+
+    release.set()
+    queue.shutdown(wait=True)
+
+
+class CallbackServer(HTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), CallbackHandler)
+        self.received = []
+        self.arrived = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/hook"
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+        if len(self.server.received) == 2:
+            self.server.arrived.set()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_every_callback_receives_the_finished_job(queue):
+    server = CallbackServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    run, started, release = blocker()
+
+    try:
+        job = queue.submit("key", run, callback_url=server.url, callback_payload={"To": "whatsapp:+1"})
+        assert started.wait(5)
+        queue.submit("key", run, callback_url=server.url, callback_payload={"To": "whatsapp:+2"})
+        release.set()
+
+        assert server.arrived.wait(5)
+    finally:
+        server.shutdown()
+
+    assert sorted(body["To"] for body in server.received) == ["whatsapp:+1", "whatsapp:+2"]
+    assert all(body["job_id"] == job.id and body["result"] == "unblocked" for body in server.received)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(job_queue_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_finished_jobs_are_forgotten_after_the_ttl_without_new_submissions(clock):
+    queue = JobQueue(workers=1, result_ttl=60)
+    job = queue.submit("key", lambda: "result")
+    assert job.done.wait(5)
+
+    clock.now += 30
+    assert queue.get(job.id) is job
+
+    clock.now += 31
+    assert queue.get(job.id) is None
+    assert queue.stats()["jobs"] == 0
+    queue.shutdown(wait=True)
+
+
+def test_running_jobs_are_not_pruned(clock):
+    queue = JobQueue(workers=1, result_ttl=60)
+    run, started, release = blocker()
+    job = queue.submit("key", run)
+    assert started.wait(5)
+
+    clock.now += 120
+    assert queue.get(job.id) is job
+
+    release.set()
+    queue.shutdown(wait=True)
@@ -0,0 +1,87 @@
+import pytest
+
+from fake_drive import make_text
+
+
+@pytest.fixture
+def mapreduce(summarizer):
+    summarizer.summary_mode = "mapreduce"
+    summarizer.chunk_tokens = 50  # 200 characters per chunk
+    return summarizer
+
+
+def test_chunks_keep_every_character_and_break_on_lines(mapreduce):
+    content = "".join(f"line {i:03d} " + "x" * 40 + "\n" for i in range(40))
+    chunks = mapreduce._split_into_chunks(content)
+
+    assert "".join(chunks) == content
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 and chunk.endswith("\n") for chunk in chunks)
+
+
+def test_overlong_lines_are_hard_split(mapreduce):
+    content = "short\n" + "y" * 450 + "\nend\n"
+    chunks = mapreduce._split_into_chunks(content)
+
+    assert "".join(chunks) == content
+    assert chunks[0] == "short\n"
+    assert all(len(chunk) <= 200 for chunk in chunks)
+
+
+def test_short_text_is_one_chunk(mapreduce):
+    assert mapreduce._split_into_chunks("one line") == ["one line"]
+    assert mapreduce._split_into_chunks("") == [""]
+
+
+def test_each_chunk_is_summarized_then_reduced_once(mapreduce):
+    content = make_text(2000, seed=3).decode()
+    chunks = mapreduce._split_into_chunks(content)
+
+    result = mapreduce._generate_map_reduce_summary(content, "report.txt")
+
+    assert "summary" in result
+    assert mapreduce.backend.calls == len(chunks) + 1
+
+
+def test_short_document_skips_the_reduce_step(mapreduce):
+    result = mapreduce._generate_map_reduce_summary("A short note.\n", "note.txt")
+
+    assert "summary" in result
+    assert mapreduce.backend.calls == 1
+
+
+def test_unchanged_chunks_are_not_summarized_again(mapreduce):
+    content = make_text(2000, seed=3).decode()
+    chunks = mapreduce._split_into_chunks(content)
+    mapreduce._generate_map_reduce_summary(content, "report.txt")
+
+    # Only the edited last chunk and the reduce step go to the model
+    edited = content + "One more line at the end.\n"
+    assert mapreduce._split_into_chunks(edited)[:-1] == chunks[:-1]
+    mapreduce._generate_map_reduce_summary(edited, "report.txt")
+
+    assert mapreduce.backend.calls == len(chunks) + 1 + 2
+
+
+def test_failed_chunk_fails_the_summary(mapreduce, monkeypatch):
+    def generate(prompt):
+        if "part 2 of" in prompt:
+            raise RuntimeError("quota exceeded")
+        return "- ok"
+
+    monkeypatch.setattr(mapreduce.backend, "generate", generate)
+    result = mapreduce._generate_map_reduce_summary(make_text(2000, seed=3).decode(), "report.txt")
+
+    assert result == {"error": "Failed to generate AI summary: quota exceeded"}
+
+
+def test_whole_document_is_read_in_mapreduce_mode(mapreduce, fake_drive):
+    mapreduce.max_content_chars = 500
+    folder = fake_drive.create_folder("Docs")
+    fake_drive.create_file("long.txt", "text/plain", make_text(2000, seed=5), parent=folder)
+
+    result = mapreduce.summarize_single_document("/Docs/long.txt")
+
+    assert "error" not in result
+    # Far more than one chunk's worth of text reached the model
+    assert mapreduce.backend.calls > 3
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import path_cache as path_cache_module
+from utils.path_cache import PathCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(path_cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PathCache(ttl_seconds=60)
+    cache.set("/a", {"id": "1"})
+
+    clock.now += 59
+    assert cache.get("/a") == {"id": "1"}
+
+    clock.now += 2
+    assert cache.get("/a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_setting_again_restarts_the_ttl(clock):
+    cache = PathCache(ttl_seconds=60)
+    cache.set("/a", 1)
+    clock.now += 50
+    cache.set("/a", 2)
+
+    clock.now += 50
+    assert cache.get("/a") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PathCache(max_entries=2)
+    cache.set("/a", 1)
+    cache.set("/b", 2)
+    cache.get("/a")
+    cache.set("/c", 3)
+
+    assert cache.get("/b") is None
+    assert cache.get("/a") == 1
+    assert cache.get("/c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_entries_disables_the_cache(clock):
+    cache = PathCache(max_entries=0)
+    cache.set("/a", 1)
+
+    assert cache.get("/a") is None
+
+
+def test_invalidate_prefix_drops_the_path_and_everything_below_it(clock):
+    cache = PathCache()
+    for path in ("/a", "/a/b", "/a/b/c", "/ab"):
+        cache.set(path, path)
+
+    cache.invalidate_prefix("/a")
+
+    assert [cache.get(path) for path in ("/a", "/a/b", "/a/b/c", "/ab")] == [None, None, None, "/ab"]
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = PathCache()
+    cache.set("/a", 1)
+    cache.get("/a")
+    cache.get("/missing")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import rate_limiter as rate_limiter_module
+from utils.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=lambda: clock.now, time=lambda: clock.now))
+    return clock
+
+
+def test_sender_bucket_refills_over_time(clock):
+    limiter = RateLimiter(per_sender_per_minute=2, global_per_minute=0)
+
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    rejected = limiter.acquire("alice", "LIST")
+    assert rejected == {"allowed": False, "scope": "sender", "retry_after": pytest.approx(30)}
+
+    # Two tokens a minute: one is back after 30 seconds
+    clock.now += 30
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+
+
+def test_refill_never_exceeds_capacity(clock):
+    limiter = RateLimiter(per_sender_per_minute=2, global_per_minute=0)
+    limiter.acquire("alice", "LIST")
+
+    clock.now += 3600
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+
+
+def test_senders_have_their_own_buckets(clock):
+    limiter = RateLimiter(per_sender_per_minute=1, global_per_minute=0)
+
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("bob", "LIST")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+
+
+def test_global_bucket_is_shared_by_every_sender(clock):
+    limiter = RateLimiter(per_sender_per_minute=10, global_per_minute=2)
+
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("bob", "LIST")["allowed"]
+    assert limiter.acquire("carol", "LIST")["scope"] == "global"
+
+
+def test_commands_are_charged_their_cost(clock):
+    limiter = RateLimiter(per_sender_per_minute=10, global_per_minute=0)
+
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("alice", "HELP")["allowed"]
+
+
+def test_bulk_commands_are_charged_per_item(clock):
+    limiter = RateLimiter(per_sender_per_minute=10, global_per_minute=0)
+
+    assert limiter.acquire("alice", "DELETE", items=8)["allowed"]
+    assert not limiter.acquire("alice", "DELETE", items=3)["allowed"]
+    assert limiter.acquire("alice", "DELETE", items=2)["allowed"]
+
+
+def test_rejected_requests_are_not_charged(clock):
+    limiter = RateLimiter(per_sender_per_minute=10, global_per_minute=3)
+
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert limiter.acquire("alice", "LIST")["allowed"]
+    assert not limiter.acquire("alice", "FILESUMMARY")["allowed"]
+    assert limiter.acquire("alice", "LIST")["allowed"]
+
+
+def test_a_command_dearer_than_the_bucket_needs_a_full_bucket(clock):
+    limiter = RateLimiter(per_sender_per_minute=4, global_per_minute=0)
+
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "rate_limits.sqlite3")
+
+
+def test_workers_sharing_a_database_share_the_global_bucket(clock, db_path):
+    workers = [RateLimiter(per_sender_per_minute=0, global_per_minute=4, db_path=db_path) for _ in range(2)]
+
+    assert workers[0].acquire("alice", "LIST")["allowed"]
+    assert workers[1].acquire("bob", "LIST")["allowed"]
+    assert workers[0].acquire("carol", "LIST")["allowed"]
+    assert workers[1].acquire("dave", "LIST")["allowed"]
+    assert workers[0].acquire("erin", "LIST") == {"allowed": False, "scope": "global", "retry_after": pytest.approx(15)}
+
+    clock.now += 15
+    assert workers[1].acquire("erin", "LIST")["allowed"]
+
+
+def test_workers_sharing_a_database_share_sender_buckets(clock, db_path):
+    workers = [RateLimiter(per_sender_per_minute=2, global_per_minute=0, db_path=db_path) for _ in range(2)]
+
+    assert workers[0].acquire("alice", "LIST")["allowed"]
+    assert workers[1].acquire("alice", "LIST")["allowed"]
+    assert workers[0].acquire("alice", "LIST")["scope"] == "sender"
+    assert workers[1].acquire("bob", "LIST")["allowed"]
+    assert workers[0].stats()["senders"] == 2
+
+
+def test_shared_buckets_refill_and_reject_like_local_ones(clock, db_path):
+    limiter = RateLimiter(per_sender_per_minute=10, global_per_minute=0, db_path=db_path)
+
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert not limiter.acquire("alice", "LIST")["allowed"]
+
+    clock.now += 3600
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert limiter.acquire("alice", "FOLDERSUMMARY")["allowed"]
+    assert limiter.stats()["rejected"] == 1
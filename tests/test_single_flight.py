@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_one_key_run_once():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flights.do, "key", work)
+        assert started.wait(5)
+        followers = [pool.submit(flights.do, "key", work) for _ in range(3)]
+        # Followers are counted as soon as they join the flight
+        while flights.stats()["shared"] < 3:
+            pass
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "shared": 3}
+
+
+def test_followers_receive_the_leaders_exception():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flights.do, "key", fail)
+        assert started.wait(5)
+        follower = pool.submit(flights.do, "key", fail)
+        while flights.stats()["shared"] < 1:
+            pass
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result()
+
+
+def test_results_are_not_remembered_after_the_call():
+    flights = SingleFlight()
+    counter = iter(range(10))
+
+    assert flights.do("key", lambda: next(counter)) == 0
+    assert flights.do("key", lambda: next(counter)) == 1
+    assert flights.stats()["executed"] == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+
+    assert flights.do("a", lambda: "a") == "a"
+    assert flights.do("b", lambda: "b") == "b"
+    assert flights.stats()["shared"] == 0
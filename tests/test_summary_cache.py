@@ -0,0 +1,71 @@
+import pytest
+
+from utils.summary_cache import SummaryCache
+
+
+def test_entries_round_trip(tmp_path):
+    cache = SummaryCache()
+    cache.set("key", {"summary": "text", "word_count": 1})
+
+    assert cache.get("key") == {"summary": "text", "word_count": 1}
+    assert cache.get("missing") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_memory_holds_the_most_recently_used_entries():
+    cache = SummaryCache(max_entries=2)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+
+
+def test_key_depends_on_every_part():
+    key = SummaryCache.make_key("document", "file", "rev-1", "v1", "gemini:flash")
+
+    assert key == SummaryCache.make_key("document", "file", "rev-1", "v1", "gemini:flash")
+    assert key != SummaryCache.make_key("document", "file", "rev-2", "v1", "gemini:flash")
+    assert key != SummaryCache.make_key("document", "file", "rev-1", "v1", "stub:stub")
+    # Parts are separated, so shifting characters between them changes the key
+    assert SummaryCache.make_key("ab", "c") != SummaryCache.make_key("a", "bc")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "summaries.sqlite3")
+
+
+def test_workers_sharing_a_database_share_entries(db_path):
+    SummaryCache(db_path=db_path).set("key", {"summary": "from another worker"})
+
+    assert SummaryCache(db_path=db_path).get("key") == {"summary": "from another worker"}
+
+
+def test_disk_keeps_the_most_recently_used_rows(db_path):
+    cache = SummaryCache(max_entries=0, db_path=db_path, max_disk_entries=2)
+    cache.EVICTION_CHECK_INTERVAL = 1
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.set("c", {"n": 3})
+
+    assert cache.get("a") is None
+    assert [cache.get(key) for key in ("b", "c")] == [{"n": 2}, {"n": 3}]
+
+
+def test_summaries_are_reused_until_the_file_changes(summarizer, fake_drive, drive_client):
+    folder = fake_drive.create_folder("Docs")
+    fake_drive.create_file("a.txt", "text/plain", b"Quarterly numbers went up.", parent=folder)
+
+    first = summarizer.summarize_single_document("/Docs/a.txt")
+    assert summarizer.summarize_single_document("/Docs/a.txt") == first
+    assert summarizer.backend.calls == 1
+
+    # A new revision of the file is summarized again
+    metadata = drive_client.get_file_metadata("/Docs/a.txt")
+    changed = {**metadata, "revision": "changed"}
+    assert summarizer._get_summary_cache_key(changed) != summarizer._get_summary_cache_key(metadata)
+    assert summarizer._get_summary_cache_key({**metadata, "revision": None}) is None
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from utils.settings import PROJECT_ROOT
+from utils.text_cache import ExtractedTextCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractedTextCache(str(tmp_path / "text"))
+
+
+def test_text_is_cached_per_revision(cache):
+    cache.set("file", "rev-1", "first revision")
+
+    assert cache.get("file", "rev-1") == "first revision"
+    assert cache.get("file", "rev-2") is None
+    assert cache.get("other", "rev-1") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_complete_text_serves_any_budget(cache):
+    cache.set("file", "rev", "abcdef")
+
+    assert cache.get("file", "rev", max_chars=3) == "abc"
+    assert cache.get("file", "rev", max_chars=100) == "abcdef"
+
+
+def test_partial_text_only_serves_budgets_it_covers(cache):
+    cache.set("file", "rev", "abcdef", complete=False)
+
+    assert cache.get("file", "rev", max_chars=4) == "abcd"
+    assert cache.get("file", "rev", max_chars=6) == "abcdef"
+    assert cache.get("file", "rev", max_chars=7) is None
+    assert cache.get("file", "rev") is None
+
+
+def test_text_extracted_under_another_page_cap_is_not_served(tmp_path):
+    directory = str(tmp_path / "text")
+    ExtractedTextCache(directory, max_pages=10).set("file", "rev", "first ten pages")
+
+    assert ExtractedTextCache(directory, max_pages=10).get("file", "rev") == "first ten pages"
+    assert ExtractedTextCache(directory, max_pages=500).get("file", "rev") is None
+    assert ExtractedTextCache(directory).get("file", "rev") is None
+
+
+def test_workers_sharing_a_directory_share_entries(tmp_path):
+    directory = str(tmp_path / "text")
+    ExtractedTextCache(directory).set("file", "rev", "shared")
+
+    assert ExtractedTextCache(directory).get("file", "rev") == "shared"
+
+
+def test_least_recently_read_entries_are_evicted(tmp_path):
+    cache = ExtractedTextCache(str(tmp_path / "text"), max_bytes=0)
+    cache.EVICTION_CHECK_INTERVAL = 3
+    cache.set("a", "rev", "a" * 1000)
+    cache.set("b", "rev", "b" * 1000)
+    # Room for one entry: the most recently used one survives
+    cache.max_bytes = os.path.getsize(cache._path("a", "rev")) + 1
+    os.utime(cache._path("a", "rev"), (0, 0))
+    cache.set("c", "rev", "c" * 1000)
+
+    assert cache.get("a", "rev") is None
+    assert cache.get("b", "rev") is None
+    assert cache.get("c", "rev") == "c" * 1000
+
+
+def test_unreadable_entries_are_misses(cache):
+    cache.set("file", "rev", "text")
+    with open(cache._path("file", "rev"), "wb") as fh:
+        fh.write(b"not zlib")
+
+    assert cache.get("file", "rev") is None
+
+
+def test_relative_cache_directory_is_under_the_project_root(drive_client, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TEXT_CACHE_DIR', 'data/text_cache')
+
+    from utils.document_summarizer import DocumentSummarizer
+    from utils.llm_backends import StubBackend
+    summarizer = DocumentSummarizer(backend=StubBackend(latency_ms=0), drive_client=drive_client)
+    summarizer.shutdown()
+
+    assert summarizer.text_cache.directory == os.path.join(PROJECT_ROOT, 'data', 'text_cache')
+    assert summarizer.text_cache.max_pages == drive_client.extraction_pool.max_pages
+    assert not os.path.exists(tmp_path / 'data')
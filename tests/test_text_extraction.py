@@ -0,0 +1,89 @@
+import io
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from fake_drive import make_pdf
+from utils import text_extraction
+from utils.text_extraction import PDF_MIME_TYPE, ExtractionPool
+
+
+def slow_extract(mime_type, source, max_chars=None, max_pages=None):
+    time.sleep(30)
+
+
+def crash_once(mime_type, source, max_chars=None, max_pages=None):
+    """Kills its worker the first time it sees a file, then succeeds"""
+    marker = source + '.crashed'
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return "recovered"
+
+
+def crash_always(mime_type, source, max_chars=None, max_pages=None):
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(workers=1, timeout=10)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / 'report.pdf'
+    path.write_bytes(make_pdf(4096, seed=1, lines_per_page=10))
+    with open(path, 'rb') as fh:
+        yield fh
+
+
+def test_extracts_in_a_worker_process(pool, document):
+    text = pool.extract(PDF_MIME_TYPE, document)
+
+    assert text == text_extraction.extract_document_text(PDF_MIME_TYPE, document.name)
+    assert text.strip()
+
+
+def test_inline_and_worker_extraction_honour_the_page_cap(document):
+    pool = ExtractionPool(workers=1, timeout=10, max_pages=1)
+    try:
+        capped = pool.extract(PDF_MIME_TYPE, document)
+    finally:
+        pool.shutdown()
+    document.seek(0)
+    inline = ExtractionPool(workers=0, max_pages=1).extract(PDF_MIME_TYPE, io.BytesIO(document.read()))
+
+    assert capped == inline
+    assert len(capped) < len(text_extraction.extract_document_text(PDF_MIME_TYPE, document.name))
+
+
+def test_timeout_raises_and_replaces_the_workers(pool, document, monkeypatch):
+    pool.timeout = 0.5
+    monkeypatch.setattr(text_extraction, 'extract_document_text', slow_extract)
+    with pytest.raises(TimeoutError):
+        pool.extract(PDF_MIME_TYPE, document)
+    assert pool._pool is None
+
+    # The stuck worker was killed, so the next document gets a fresh one
+    monkeypatch.undo()
+    pool.timeout = 10
+    document.seek(0)
+    assert pool.extract(PDF_MIME_TYPE, document).strip()
+
+
+def test_broken_pool_is_retried_once(pool, document, monkeypatch):
+    monkeypatch.setattr(text_extraction, 'extract_document_text', crash_once)
+
+    assert pool.extract(PDF_MIME_TYPE, document) == "recovered"
+
+
+def test_broken_pool_is_raised_when_the_retry_also_fails(pool, document, monkeypatch):
+    monkeypatch.setattr(text_extraction, 'extract_document_text', crash_always)
+
+    with pytest.raises(BrokenProcessPool):
+        pool.extract(PDF_MIME_TYPE, document)
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from utils.tracing import InMemorySpanExporter, Tracer, current_span, propagate
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer([exporter])
+
+
+def test_child_spans_share_the_trace_and_point_at_their_parent(tracer, exporter):
+    with tracer.start_trace("request", request_id="req-1") as root:
+        with tracer.start_span("child") as child:
+            with tracer.start_span("grandchild") as grandchild:
+                pass
+
+    assert child.trace_id == grandchild.trace_id == root.trace_id
+    assert root.parent_id is None
+    assert child.parent_id == root.span_id
+    assert grandchild.parent_id == child.span_id
+    assert grandchild.request_id == "req-1"
+
+
+def test_spans_are_exported_when_they_end(tracer, exporter):
+    with tracer.start_trace("request") as root:
+        with tracer.start_span("child", {"file.id": "abc"}):
+            assert exporter.get_finished_spans() == []
+
+    spans = exporter.get_finished_spans(root.trace_id)
+    assert [span.name for span in spans] == ["child", "request"]
+    assert all(span.status == "OK" and span.end_time_ns for span in spans)
+    assert spans[0].to_dict()["attributes"]["file.id"] == "abc"
+
+
+def test_exception_is_recorded_on_the_span(tracer, exporter):
+    with pytest.raises(ValueError):
+        with tracer.start_trace("request"):
+            raise ValueError("boom")
+
+    span, = exporter.get_finished_spans()
+    assert span.status == "ERROR"
+    assert span.events[0]["attributes"]["exception.message"] == "boom"
+
+
+def test_traceparent_continues_the_callers_trace(tracer):
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    with tracer.start_trace("request", traceparent=traceparent) as root:
+        pass
+
+    assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_id == "b7ad6b7169203331"
+
+
+def test_invalid_traceparent_starts_a_new_trace(tracer):
+    with tracer.start_trace("request", traceparent="garbage") as root:
+        pass
+
+    assert len(root.trace_id) == 32
+    assert root.parent_id is None
+
+
+def test_propagate_carries_the_active_span_to_another_thread(tracer, exporter):
+    seen = {}
+
+    def work():
+        seen["parent"] = current_span()
+        with tracer.start_span("in-thread"):
+            pass
+
+    with tracer.start_trace("request") as root:
+        thread = threading.Thread(target=propagate(work))
+        thread.start()
+        thread.join()
+
+    assert seen["parent"] is root
+    span, = [span for span in exporter.get_finished_spans() if span.name == "in-thread"]
+    assert span.parent_id == root.span_id
+
+
+def test_without_propagate_a_thread_starts_its_own_trace(tracer):
+    seen = {}
+    with tracer.start_trace("request"):
+        thread = threading.Thread(target=lambda: seen.setdefault("span", current_span()))
+        thread.start()
+        thread.join()
+
+    assert seen["span"] is None
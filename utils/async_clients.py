@@ -0,0 +1,81 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from utils.google_drive_client import GoogleDriveClient
+from utils.document_summarizer import DocumentSummarizer
+from utils.tracing import propagate
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Thread pool that runs blocking Drive and Gemini calls for the event loop"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('ASYNC_IO_WORKERS', '64')),
+            thread_name_prefix='async-io'
+        )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the I/O pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not carry context variables (the active trace) over by itself
+    return await loop.run_in_executor(get_io_executor(), propagate(functools.partial(func, *args, **kwargs)))
+
+
+class AsyncGoogleDriveClient:
+    """Awaitable facade over GoogleDriveClient.
+
+    The client may be a LazyObject still being built, so even the method
+    lookup happens on the I/O pool rather than on the event loop.
+    """
+
+    def __init__(self, client: GoogleDriveClient):
+        self.client = client
+
+    async def list_files(self, folder_path: str = None, max_files: int = None) -> Dict:
+        return await run_blocking(lambda: self.client.list_files(folder_path, max_files=max_files))
+
+    async def delete_file(self, file_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.delete_file(file_path))
+
+    async def move_file(self, source_path: str, destination_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.move_file(source_path, destination_path))
+
+    async def copy_file(self, source_path: str, destination_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.copy_file(source_path, destination_path))
+
+    async def delete_files(self, file_paths: List[str]) -> Dict:
+        return await run_blocking(lambda: self.client.delete_files(file_paths))
+
+    async def move_files(self, source_paths: List[str], destination_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.move_files(source_paths, destination_path))
+
+    async def copy_files(self, source_paths: List[str], destination_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.copy_files(source_paths, destination_path))
+
+    async def get_document_content(self, file_path: str) -> Dict:
+        return await run_blocking(lambda: self.client.get_document_content(file_path))
+
+
+class AsyncDocumentSummarizer:
+    """Awaitable facade over DocumentSummarizer"""
+
+    def __init__(self, summarizer: DocumentSummarizer):
+        self.summarizer = summarizer
+
+    async def summarize_folder(self, folder_path: str) -> Dict:
+        return await run_blocking(lambda: self.summarizer.summarize_folder(folder_path))
+
+    async def summarize_single_document(self, file_path: str) -> Dict:
+        return await run_blocking(lambda: self.summarizer.summarize_single_document(file_path))
+
+    def format_summary_response(self, summary_result: Dict) -> str:
+        return self.summarizer.format_summary_response(summary_result)
@@ -3,8 +3,8 @@ import logging
 from typing import Dict, Optional, Tuple
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 class CommandType(Enum):
@@ -35,6 +35,7 @@ class CommandParser:
         }
 
     
+    @traced("command.parse")
     def parse_message(self, message: str) -> Dict:
         try:
             message = message.strip().upper()
@@ -86,7 +87,7 @@ class CommandParser:
                 return self._create_error_response(f"Unsupported command: {command}")
                 
         except Exception as e:
-            logger.error(f"Error parsing message: {e}")
+            logger.error("Error parsing message: %s", e)
             return self._create_error_response(f"Error parsing command: {str(e)}")
     
     def _parse_list_command(self, parts: list) -> Dict:
@@ -106,17 +107,25 @@ class CommandParser:
 
 
     def _parse_delete_command(self, parts: list) -> Dict:
-        """Parse DELETE command"""
+        """Parse DELETE command (several paths or a pattern such as /Folder/*.tmp)"""
         if len(parts) < 2:
             return self._create_error_response("DELETE command requires a file path")
         
-        file_path = parts[1]
-        if not self._is_valid_path(file_path):
-            return self._create_error_response("Invalid file path format")
+        file_paths = parts[1:]
+        for file_path in file_paths:
+            if not self._is_valid_path(file_path, allow_glob=True):
+                return self._create_error_response("Invalid file path format")
         
+        if self._is_bulk(file_paths):
+            return {
+                "command": "DELETE",
+                "file_paths": file_paths,
+                "success": True
+            }
+
         return {
             "command": "DELETE",
-            "file_path": file_path,
+            "file_path": file_paths[0],
             "success": True
         }
     
@@ -124,15 +133,26 @@ class CommandParser:
         if len(parts) < 3:
             return self._create_error_response("MOVE command requires source and destination paths")
         
-        source_path = parts[1]
-        destination_path = parts[2]
+        # Every argument but the last is a source
+        source_paths = parts[1:-1]
+        destination_path = parts[-1]
         
-        if not self._is_valid_path(source_path):
-            return self._create_error_response("Invalid source path format")
+        for source_path in source_paths:
+            if not self._is_valid_path(source_path, allow_glob=True):
+                return self._create_error_response("Invalid source path format")
         
         if not self._is_valid_path(destination_path):
             return self._create_error_response("Invalid destination path format")
         
+        if self._is_bulk(source_paths):
+            return {
+                "command": "MOVE",
+                "source_paths": source_paths,
+                "destination_path": destination_path,
+                "success": True
+            }
+
+        source_path = source_paths[0]
         return {
             "command": "MOVE",
             "source_path": source_path,
@@ -144,15 +164,26 @@ class CommandParser:
         if len(parts) < 3:
             return self._create_error_response("COPY command requires source and destination paths")
         
-        source_path = parts[1]
-        destination_path = parts[2]
+        # Every argument but the last is a source
+        source_paths = parts[1:-1]
+        destination_path = parts[-1]
         
-        if not self._is_valid_path(source_path):
-            return self._create_error_response("Invalid source path format")
+        for source_path in source_paths:
+            if not self._is_valid_path(source_path, allow_glob=True):
+                return self._create_error_response("Invalid source path format")
         
         if not self._is_valid_path(destination_path):
             return self._create_error_response("Invalid destination path format")
         
+        if self._is_bulk(source_paths):
+            return {
+                "command": "COPY",
+                "source_paths": source_paths,
+                "destination_path": destination_path,
+                "success": True
+            }
+
+        source_path = source_paths[0]
         return {
             "command": "COPY",
             "source_path": source_path,
@@ -177,8 +208,8 @@ class CommandParser:
             "file_path": folder_path,
         }   
     
-    def _is_valid_path(self, path: str) -> bool:
-        """Validate path format"""
+    def _is_valid_path(self, path: str, allow_glob: bool = False) -> bool:
+        """Validate path format; allow_glob permits * and ? in the last segment"""
         if not path:
             return False
         
@@ -186,6 +217,11 @@ class CommandParser:
         if not path.startswith('/'):
             return False
         
+        # Wildcards may only select files within a folder
+        folder, _, name = path.rpartition('/')
+        if allow_glob:
+            path = folder + '/' + name.replace('*', '').replace('?', '')
+
         # Path should not contain invalid characters
         invalid_chars = ['<', '>', ':', '"', '|', '?', '*']
         for char in invalid_chars:
@@ -196,6 +232,15 @@ class CommandParser:
         
         return True
     
+    def _is_bulk(self, paths: list) -> bool:
+        """Whether the paths need a bulk operation rather than a single-file one"""
+        return len(paths) > 1 or any(self.is_glob(path) for path in paths)
+
+    @staticmethod
+    def is_glob(path: str) -> bool:
+        """Whether a path is a pattern such as /Folder/*.tmp"""
+        return '*' in path or '?' in path
+
     def _create_error_response(self, message: str) -> Dict:
         """Create error response"""
         return {
@@ -222,6 +267,9 @@ class CommandParser:
 📦 *COPY /Source/file.pdf /Destination*
    Copy file to different folder
 
+🗂️ *DELETE /Folder/*.tmp* or *MOVE /A/x.pdf /A/y.pdf /Destination*
+   Several paths or * and ? patterns act on many files at once
+
 📋 *FolderSummary /FolderName*
    Generate AI summaries of all documents in the folder
 
@@ -258,16 +306,16 @@ class CommandParser:
             return f"📁 Listing files in: {folder}"
         
         elif command == "DELETE":
-            file_path = result.get("file_path", "")
+            file_path = result.get("file_path") or ", ".join(result.get("file_paths", []))
             return f"🗑️ Deleting file: {file_path}"
         
         elif command == "MOVE":
-            source = result.get("source_path", "")
+            source = result.get("source_path") or ", ".join(result.get("source_paths", []))
             dest = result.get("destination_path", "")
             return f"📦 Moving file from {source} to {dest}"
         
         elif command == "COPY":
-            source = result.get("source_path", "")
+            source = result.get("source_path") or ", ".join(result.get("source_paths", []))
             dest = result.get("destination_path", "")
             return f"📦 Copying file from {source} to {dest}"
         
@@ -1,84 +1,157 @@
 import os
+import re
 import json
 import logging
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Tuple
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from utils.google_drive_client import GoogleDriveClient
-import google.generativeai as genai
+from utils.summary_cache import SummaryCache
+from utils.text_cache import ExtractedTextCache
+from utils.settings import project_path
+from utils.single_flight import SingleFlight
+from utils.metrics import STAGE_LATENCY, LLM_CALLS, LLM_ERRORS
+from utils.tracing import tracer, traced, current_span, propagate
+from utils.llm_backends import LLMBackend, GeminiBackend, create_backend
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class DocumentSummarizer:
-    """AI-powered document summarizer using GEMINI_API_KEY"""
+    """AI-powered document summarizer on a pluggable LLM backend (Gemini by default)"""
+
+    # Document types that can be summarized
+    DOCUMENT_TYPES = GoogleDriveClient.DOCUMENT_MIME_TYPES
+
+    # Bump whenever the prompts change so cached summaries are not reused
+    PROMPT_VERSION = "1"
+
+    # Section headings in batched replies, e.g. "### FILE 3" or "**FOLDER OVERVIEW**"
+    BATCH_HEADING = re.compile(
+        r'^[ \t]*(?:#+|\*\*)?[ \t]*(FILE[ \t]+(\d+)|FOLDER OVERVIEW)[ \t]*(?::[^\n]*)?\**[ \t]*$',
+        re.MULTILINE | re.IGNORECASE
+    )
     
-    def __init__(self, api_key: str = None):
-        
-        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API key not found")
+    def __init__(self, api_key: str = None, backend: LLMBackend = None, drive_client: GoogleDriveClient = None):
         
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        # LLM_BACKEND picks the default model; LLM_BACKEND_<COMMAND> overrides it per command
+        if backend is None and api_key:
+            backend = GeminiBackend(api_key=api_key)
+        self.backend = backend or create_backend(os.getenv('LLM_BACKEND', 'gemini'))
+        self.command_backends = {
+            command: os.getenv(f'LLM_BACKEND_{command}')
+            for command in ("FOLDERSUMMARY", "FILESUMMARY")
+        }
+        self._backends: Dict[str, LLMBackend] = {}
+        self._backends_lock = threading.Lock()
 
-        proxy_vars = ['HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy']
-        original_proxy_values = {}
-        
-        for var in proxy_vars:
-            if var in os.environ:
-                original_proxy_values[var] = os.environ[var]
-                del os.environ[var]
-        
-        try:
-            self.client = genai.GenerativeModel("gemini-2.0-flash")
+        # Share the caller's client so caches and connections are not duplicated
+        self.drive_client = drive_client or GoogleDriveClient()
+        self.max_documents = int(os.getenv('SUMMARY_MAX_DOCUMENTS', '20'))
 
-        except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {e}")
-            # Restore proxy environment variables if they existed
-            for var, value in original_proxy_values.items():
-                os.environ[var] = value
-            raise
-        finally:
-            # Restore proxy environment variables if they existed
-            for var, value in original_proxy_values.items():
-                os.environ[var] = value
+        # Only this much of each document is extracted and sent to the model
+        self.max_content_chars = int(os.getenv('SUMMARY_MAX_CHARS', '8000'))
+
+        # "truncate" summarizes the first max_content_chars characters in one call;
+        # "mapreduce" summarizes chunks of the whole document and combines them
+        self.summary_mode = os.getenv('SUMMARY_MODE', 'truncate').lower()
+        self.mapreduce_max_chars = int(os.getenv('SUMMARY_MAPREDUCE_MAX_CHARS', '400000'))
+        self.chunk_tokens = int(os.getenv('SUMMARY_CHUNK_TOKENS', '2000'))
+        self.chunk_workers = int(os.getenv('SUMMARY_CHUNK_WORKERS', '8'))
+
+        # Folder summaries pack documents of up to batch_doc_chars characters into
+        # shared prompts of about batch_tokens tokens; 0 sends one call per document
+        self.batch_tokens = int(os.getenv('SUMMARY_BATCH_TOKENS', '6000'))
+        self.batch_doc_chars = int(os.getenv('SUMMARY_BATCH_DOC_CHARS', '4000'))
+
+        # Concurrency limits for each stage of the per-document pipeline
+        self.folder_workers = int(os.getenv('SUMMARY_FOLDER_WORKERS', '8'))
+        self._download_slots = threading.BoundedSemaphore(int(os.getenv('SUMMARY_DOWNLOAD_CONCURRENCY', '4')))
+        # Extraction is bounded by the pool's workers unless set lower
+        extract_concurrency = int(os.getenv('SUMMARY_EXTRACT_CONCURRENCY', '0'))
+        self._extract_slots = threading.BoundedSemaphore(
+            extract_concurrency or self.drive_client.extraction_pool.workers or os.cpu_count() or 2
+        )
+        self._llm_slots = threading.BoundedSemaphore(int(os.getenv('SUMMARY_LLM_CONCURRENCY', '4')))
+        self._create_pools()
 
-        self.drive_client = GoogleDriveClient()
+        self.summary_cache = SummaryCache(
+            max_entries=int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '1024')),
+            db_path=os.getenv('SUMMARY_CACHE_PATH') or None,
+            max_disk_entries=int(os.getenv('SUMMARY_CACHE_MAX_DISK_ENTRIES', '100000'))
+        )
+
+        # Extracted text survives prompt changes, so it is cached separately
+        text_cache_dir = os.getenv('TEXT_CACHE_DIR', 'data/text_cache')
+        self.text_cache = ExtractedTextCache(
+            project_path(text_cache_dir),
+            max_bytes=int(os.getenv('TEXT_CACHE_MAX_MB', '512')) * 1024 * 1024,
+            max_pages=self.drive_client.extraction_pool.max_pages
+        ) if text_cache_dir else None
+
+        # Identical concurrent requests share one download, extraction and Gemini call
+        self._flights = SingleFlight()
     
+    def _create_pools(self):
+        # Long-lived, so each worker thread keeps its own Drive connection open
+        # between requests. Chunk work never waits on the document pool, and
+        # document work only waits on the chunk pool, so neither can starve.
+        self._document_pool = ThreadPoolExecutor(max_workers=self.folder_workers, thread_name_prefix='summarizer')
+        self._chunk_pool = ThreadPoolExecutor(max_workers=self.chunk_workers, thread_name_prefix='summarizer-chunk')
+
+    def reset(self):
+        """Reopen per-process resources after fork (the Drive client is reset separately)"""
+        self.summary_cache.reset()
+        self._flights = SingleFlight()
+        # Threads do not survive a fork
+        self._create_pools()
+
+    def shutdown(self):
+        """Let in-flight summaries finish, then stop the worker threads"""
+        self._document_pool.shutdown(wait=True)
+        self._chunk_pool.shutdown(wait=True)
+
     def summarize_folder(self, folder_path: str) -> Dict:
         """Generate summaries for all documents in a folder"""
+        backend = self.get_backend("FOLDERSUMMARY")
+        key = ("folder", self.drive_client._normalize_path(folder_path), backend.identity)
+        with tracer.start_span("summarizer.summarize_folder", {"folder.path": folder_path, "llm.backend": backend.identity}):
+            return self._flights.do(key, self._summarize_folder, folder_path, backend)
+
+    def _summarize_folder(self, folder_path: str, backend: LLMBackend) -> Dict:
         try:
-            # List files in the folder
-            files_result = self.drive_client.list_files(folder_path)
-            
-            if "error" in files_result:
-                return files_result
-            
-            if "message" in files_result and "No files found" in files_result["message"]:
-                return {"message": "No documents found in folder"}
-            
-            files = files_result.get("files", [])
+            # Stream the folder listing, asking Drive for summarizable types only
+            # and stopping once we have as many documents as fit in one reply
+            files = self.drive_client.iter_files(
+                folder_path,
+                page_size=self.max_documents + 1,
+                mime_types=self.DOCUMENT_TYPES
+            )
+            document_files = list(islice(files, self.max_documents))
+            truncated = next(files, None) is not None
             summaries = []
             
-            # Filter for document types that can be summarized
-            document_types = [
-                'application/vnd.google-apps.document',
-                'application/pdf',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'text/plain'
-            ]
-            
-            document_files = [f for f in files if f['type'] in document_types]
-            
             if not document_files:
                 return {"message": "No summarizable documents found in folder"}
             
-            # Generate summaries for each document
-            for file_info in document_files:
-                file_path = f"{folder_path}/{file_info['name']}"
+            folder_summary = None
+            if self.batch_tokens > 0:
+                results, folder_summary = self._summarize_documents_batched(document_files, folder_path, backend)
+            else:
+                # Summarize documents concurrently; the stage semaphores bound how
+                # many downloads, extractions and Gemini calls actually overlap
+                def summarize(file_info: Dict) -> Dict:
+                    return self._summarize_single_document(
+                        f"{folder_path}/{file_info['name']}",
+                        file_info['name'],
+                        file_metadata=self._listing_metadata(file_info),
+                        backend=backend
+                    )
 
+                results = list(self._document_pool.map(propagate(summarize), document_files))
 
-                summary = self._summarize_single_document(file_path, file_info['name'])
-                
+            for file_info, summary in zip(document_files, results):
                 if "error" not in summary:
                     summaries.append({
                         "filename": file_info['name'],
@@ -89,18 +162,22 @@ class DocumentSummarizer:
             if not summaries:
                 return {"error": "Failed to generate any summaries"}
             
-            # Create a comprehensive folder summary
-            folder_summary = self._create_folder_summary(summaries, folder_path)
+            # Create a comprehensive folder summary unless a batch already did
+            if not folder_summary:
+                folder_summary = self._create_folder_summary(summaries, folder_path, backend)
             
             return {
                 "folder_path": folder_path,
                 "total_documents": len(summaries),
                 "summaries": summaries,
-                "folder_summary": folder_summary
+                "folder_summary": folder_summary,
+                "truncated": truncated
             }
             
+        except FileNotFoundError as e:
+            return {"error": str(e)}
         except Exception as e:
-            logger.error(f"Error summarizing folder: {e}")
+            logger.error("Error summarizing folder: %s", e)
             return {"error": f"Failed to summarize folder: {str(e)}"}
     
     def summarize_single_document(self, file_path: str) -> Dict:
@@ -108,56 +185,333 @@ class DocumentSummarizer:
         try:
             # Get file name from path
             file_name = file_path.split('/')[-1]
-            return self._summarize_single_document(file_path, file_name)
+            return self._summarize_single_document(file_path, file_name, backend=self.get_backend("FILESUMMARY"))
             
         except Exception as e:
-            logger.error(f"Error summarizing document: {e}")
+            logger.error("Error summarizing document: %s", e)
             return {"error": f"Failed to summarize document: {str(e)}"}
     
 
     
-    def _summarize_single_document(self, file_path: str, file_name: str) -> Dict:
-        print("""Generate summary for a single document""")
+    def get_backend(self, command: str) -> LLMBackend:
+        """Backend configured for a command, created on first use"""
+        spec = self.command_backends.get(command)
+        if not spec:
+            return self.backend
+
+        with self._backends_lock:
+            if spec not in self._backends:
+                self._backends[spec] = create_backend(spec)
+            return self._backends[spec]
+
+    def _listing_metadata(self, file_info: Dict) -> Dict:
+        """Convert a folder listing entry into the metadata the download path expects"""
+        return {
+            "id": file_info['id'],
+            "name": file_info['name'],
+            "mimeType": file_info['type'],
+            "size": file_info['size_bytes'],
+            "revision": file_info['revision']
+        }
+
+    def _summarize_documents_batched(self, document_files: List[Dict], folder_path: str,
+                                     backend: LLMBackend) -> Tuple[List[Dict], Optional[str]]:
+        """Summarize a folder's documents, packing short ones into shared prompts.
+
+        Returns per-document results in listing order, plus the folder overview
+        when every document fitted in a single batch that also produced it.
+        """
+        results: List[Optional[Dict]] = [None] * len(document_files)
+        cache_keys = {}
+        batch_cache_keys = {}
+        pending = []
+
+        for i, file_info in enumerate(document_files):
+            metadata = self._listing_metadata(file_info)
+            cache_key = self._get_summary_cache_key(metadata, backend)
+            # Batch replies come from a different prompt, so they are cached apart;
+            # a full single-document summary is just as good here
+            batch_cache_key = self._get_summary_cache_key(metadata, backend, variant="batch")
+            cached = next(filter(None, (self.summary_cache.get(key) for key in (cache_key, batch_cache_key) if key)), None)
+            if cached:
+                results[i] = {"filename": file_info['name'], **cached}
+            else:
+                cache_keys[i] = cache_key
+                batch_cache_keys[i] = batch_cache_key
+                pending.append(i)
+
+        if not pending:
+            return results, None
+
+        # Downloads and extractions still overlap under the stage semaphores
+        def fetch(i: int) -> Dict:
+            file_info = document_files[i]
+            try:
+                return self._get_summarizable_content(self._listing_metadata(file_info), file_info['name'])
+            except Exception as e:
+                # One unreadable document must not fail the whole folder
+                logger.error("Error fetching '%s': %s", file_info['name'], e)
+                return {"error": f"Failed to summarize document: {str(e)}"}
+
+        contents = dict(zip(pending, self._document_pool.map(propagate(fetch), pending)))
+
+        small = []
+        large = []
+        for i in pending:
+            if "error" in contents[i]:
+                results[i] = contents[i]
+            elif len(contents[i]['content']) <= self.batch_doc_chars:
+                small.append(i)
+            else:
+                large.append(i)
+
+        batches = self._pack_batches([(i, contents[i]['content']) for i in small])
+
+        # The overview can only come from a batch that saw every document
+        with_overview = len(batches) == 1 and len(batches[0]) == len(document_files)
+        folder_summary = None
+
+        def summarize_batch(batch: List[Tuple[int, str]]) -> Tuple[List[Tuple[int, str]], Dict]:
+            documents = [(document_files[i]['name'], content) for i, content in batch]
+            return batch, self._generate_batch_summary(documents, folder_path, backend, with_overview)
+
+        def summarize_large(i: int) -> Dict:
+            return self._summarize_content(contents[i]['content'], document_files[i]['name'], cache_keys[i], backend)
+
+        pool = self._document_pool
+        batch_futures = [pool.submit(propagate(summarize_batch), batch) for batch in batches]
+        large_futures = {i: pool.submit(propagate(summarize_large), i) for i in large}
+
+        # Anything a batch reply did not cover is retried on its own
+        retry_futures = {}
+        for future in batch_futures:
+            batch, reply = future.result()
+            if reply.get('overview'):
+                folder_summary = reply['overview']
+            for position, (i, content) in enumerate(batch):
+                name = document_files[i]['name']
+                summary = reply.get('summaries', {}).get(position)
+                if summary:
+                    results[i] = self._store_summary(summary, content, name, batch_cache_keys[i])
+                else:
+                    retry_futures[i] = pool.submit(
+                        propagate(self._summarize_content), content, name, cache_keys[i], backend
+                    )
+
+        for i, future in {**large_futures, **retry_futures}.items():
+            results[i] = future.result()
+
+        return results, folder_summary
+
+    def _pack_batches(self, documents: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Group documents into batches of at most batch_tokens tokens, preserving order"""
+        # Roughly four characters per token, plus room for each file header
+        budget = self.batch_tokens * 4
+        batches = []
+        current = []
+        current_length = 0
+        for i, content in documents:
+            length = len(content) + 100
+            if current and current_length + length > budget:
+                batches.append(current)
+                current, current_length = [], 0
+            current.append((i, content))
+            current_length += length
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _generate_batch_summary(self, documents: List[Tuple[str, str]], folder_path: str,
+                                backend: LLMBackend, with_overview: bool = False) -> Dict:
+        """Summarize several documents in one Gemini call.
+
+        Returns {"summaries": {position: summary}, "overview": str or None};
+        documents missing from the reply are simply absent from summaries.
+        """
+        if len(documents) == 1 and not with_overview:
+            name, content = documents[0]
+            with self._llm_slots:
+                summary = self._generate_ai_summary(content, name, backend)
+            return {"summaries": {0: summary['summary']}} if "summary" in summary else {}
+
         try:
-            # Get document content
-            content_result = self.drive_client.get_document_content(file_path)
+            sections = "\n\n".join(
+                f"=== FILE {n}: {name} ===\n{content}"
+                for n, (name, content) in enumerate(documents, 1)
+            )
+            overview_instruction = (
+                f"Finish with a section headed \"### FOLDER OVERVIEW\" containing a single line "
+                f"very short description of the folder \"{folder_path}\" based on these documents.\n"
+                if with_overview else ""
+            )
 
+            prompt = f"""
+            Provide only 1-2 sentence linke short  summary with bullet pointes of each of the following {len(documents)} documents.
+            Reply with one section per document, in order, each headed by "### FILE <number>" on its own line.
+            {overview_instruction}
+            {sections}
             
-            if "error" in content_result:
-                return content_result
-            
-            content = content_result['content']
-            
-            if not content.strip():
-                return {"error": f"Document '{file_name}' is empty or could not be read"}
-            
-            # Truncate content if too long (OpenAI has token limits)
-            max_chars = 8000  # Conservative limit
-            if len(content) > max_chars:
-                content = content[:max_chars] + "\n\n[Content truncated for summarization]"
-            
-            # Generate summary using OpenAI
-            summary = self._generate_ai_summary(content, file_name)
-            
-            if "error" in summary:
-                return summary
-            
-            return {
-                "filename": file_name,
-                "summary": summary['summary'],
-                "word_count": len(content.split()),
-                "original_length": len(content)
-            }
+            """
+
+            with self._llm_slots:
+                reply = self._call_backend(backend, prompt)
+
+            return self._parse_batch_summary(reply, len(documents))
+
+        except Exception as e:
+            logger.error("Error generating batched AI summary: %s", e)
+            return {}
+
+    def _parse_batch_summary(self, text: str, count: int) -> Dict:
+        """Split a batched reply into per-file summaries and the optional folder overview"""
+        summaries = {}
+        overview = None
+
+        parts = self.BATCH_HEADING.split(text)
+        # re.split yields [preamble, heading, number, body, heading, number, body, ...]
+        for heading, number, body in zip(parts[1::3], parts[2::3], parts[3::3]):
+            body = body.strip()
+            if not body:
+                continue
+            if number is None:
+                overview = body
+            elif 1 <= int(number) <= count:
+                summaries.setdefault(int(number) - 1, body)
+
+        if len(summaries) < count:
+            logger.error("Batched summary reply covered %s of %s documents", len(summaries), count)
+
+        return {"summaries": summaries, "overview": overview}
+
+    @traced("summarizer.summarize_document")
+    def _summarize_single_document(self, file_path: str, file_name: str, file_metadata: Dict = None,
+                                   backend: LLMBackend = None) -> Dict:
+        """Generate summary for a single document"""
+        try:
+            # Folder listings already carry the metadata; otherwise resolve the path
+            if file_metadata is None:
+                file_metadata = self.drive_client.get_file_metadata(file_path)
+                if "error" in file_metadata:
+                    return file_metadata
+
+            # Unchanged documents are served from the cache without downloading
+            backend = backend or self.backend
+            cache_key = self._get_summary_cache_key(file_metadata, backend)
+            cached = self.summary_cache.get(cache_key) if cache_key else None
+            current_span().set_attributes({
+                "drive.file_id": file_metadata['id'],
+                "drive.mime_type": file_metadata['mimeType'],
+                "summary.cached": bool(cached),
+            })
+            if cached:
+                return {"filename": file_name, **cached}
+
+            key = ("document", cache_key or file_metadata['id'], backend.identity)
+            return self._flights.do(key, self._summarize_document, file_metadata, file_name, cache_key, backend)
             
         except Exception as e:
-            logger.error(f"Error in _summarize_single_document: {e}")
+            logger.error("Error in _summarize_single_document: %s", e)
             return {"error": f"Failed to summarize document: {str(e)}"}
+
+    def _summarize_document(self, file_metadata: Dict, file_name: str, cache_key: Optional[str],
+                            backend: LLMBackend) -> Dict:
+        content_result = self._get_summarizable_content(file_metadata, file_name)
+        if "error" in content_result:
+            return content_result
+
+        return self._summarize_content(content_result['content'], file_name, cache_key, backend)
+
+    def _get_summarizable_content(self, file_metadata: Dict, file_name: str) -> Dict:
+        """Fetch a document's text within the active mode's budget, truncating if needed"""
+        # One character past the budget tells us whether to truncate
+        max_chars = self.mapreduce_max_chars if self.summary_mode == "mapreduce" else self.max_content_chars
+        content_result = self._get_document_content(file_metadata, max_chars=max_chars + 1)
+
+        if "error" in content_result:
+            return content_result
+
+        content = content_result['content']
+
+        if not content.strip():
+            return {"error": f"Document '{file_name}' is empty or could not be read"}
+
+        # Truncate content if too long (OpenAI has token limits)
+        if len(content) > max_chars:
+            content = content[:max_chars] + "\n\n[Content truncated for summarization]"
+
+        return {"content": content}
+
+    def _summarize_content(self, content: str, file_name: str, cache_key: str = None,
+                           backend: LLMBackend = None) -> Dict:
+        """Summarize extracted text with the active mode and cache the result"""
+        if self.summary_mode == "mapreduce":
+            summary = self._generate_map_reduce_summary(content, file_name, backend)
+        else:
+            with self._llm_slots:
+                summary = self._generate_ai_summary(content, file_name, backend)
+
+        if "error" in summary:
+            return summary
+
+        return self._store_summary(summary['summary'], content, file_name, cache_key)
+
+    def _store_summary(self, summary: str, content: str, file_name: str, cache_key: str = None) -> Dict:
+        result = {
+            "summary": summary,
+            "word_count": len(content.split()),
+            "original_length": len(content)
+        }
+        if cache_key:
+            self.summary_cache.set(cache_key, result)
+
+        return {"filename": file_name, **result}
     
 
 
 
-    def _generate_ai_summary(self, content: str, filename: str) -> Dict:
-        """Generate AI summary using Google Gemini"""
+    def _get_summary_cache_key(self, file_metadata: Dict, backend: LLMBackend = None,
+                               variant: str = "document") -> Optional[str]:
+        """Key a document summary on its content revision, prompt (variant) and model"""
+        revision = file_metadata.get('revision')
+        if not revision:
+            return None
+        return SummaryCache.make_key(
+            variant, file_metadata['id'], revision, self.PROMPT_VERSION, (backend or self.backend).identity, self.summary_mode
+        )
+
+    def _get_document_content(self, file_metadata: Dict, max_chars: int = None) -> Dict:
+        """Download and extract up to max_chars of a document, holding one slot per stage"""
+        key = ("content", file_metadata['id'], file_metadata.get('revision'), max_chars)
+        return self._flights.do(key, self._load_document_content, file_metadata, max_chars)
+
+    def _load_document_content(self, file_metadata: Dict, max_chars: int) -> Dict:
+        mime_type = file_metadata['mimeType']
+        if mime_type not in self.DOCUMENT_TYPES:
+            return {"error": f"Unsupported file type: {mime_type}"}
+
+        revision = file_metadata.get('revision')
+        if self.text_cache and revision:
+            content = self.text_cache.get(file_metadata['id'], revision, max_chars)
+            if content is not None:
+                return {"content": content}
+
+        with self._download_slots:
+            fh = self.drive_client.download_document(
+                file_metadata['id'], mime_type, file_metadata.get('size'), max_chars
+            )
+
+        with fh, self._extract_slots:
+            content = self.drive_client.extract_text(mime_type, fh, max_chars)
+
+        if self.text_cache and revision and content.strip():
+            complete = max_chars is None or len(content) < max_chars
+            self.text_cache.set(file_metadata['id'], revision, content, complete=complete)
+
+        return {"content": content}
+
+    def _generate_ai_summary(self, content: str, filename: str, backend: LLMBackend = None) -> Dict:
+        """Generate AI summary with the given (or default) backend"""
         try:
             prompt = f"""
             Provide only 1-2 sentence linke short  summary with bullet pointes of the following document: "{filename}"
@@ -167,21 +521,132 @@ class DocumentSummarizer:
             
             """
 
-            response = self.client.generate_content(prompt)
-            summary = response.text.strip()
+            summary = self._call_backend(backend or self.backend, prompt)
 
         
             return {"summary": summary}
             
         except Exception as e:
-            logger.error(f"Error generating AI summary: {e}")
+            logger.error("Error generating AI summary: %s", e)
+            return {"error": f"Failed to generate AI summary: {str(e)}"}
+
+
+    def _generate_map_reduce_summary(self, content: str, filename: str, backend: LLMBackend = None) -> Dict:
+        """Summarize token-budgeted chunks concurrently, then combine them in a reduce call"""
+        chunks = self._split_into_chunks(content)
+        if len(chunks) == 1:
+            with self._llm_slots:
+                return self._generate_ai_summary(content, filename, backend)
+
+        def summarize_chunk(indexed_chunk) -> Dict:
+            index, chunk = indexed_chunk
+            return self._summarize_chunk(chunk, filename, index, len(chunks), backend)
+
+        chunk_summaries = list(self._chunk_pool.map(propagate(summarize_chunk), enumerate(chunks, 1)))
+
+        for chunk_summary in chunk_summaries:
+            if "error" in chunk_summary:
+                return chunk_summary
+
+        combined = "\n\n".join(
+            f"Part {i}/{len(chunks)}:\n{chunk_summary['summary']}"
+            for i, chunk_summary in enumerate(chunk_summaries, 1)
+        )
+
+        with self._llm_slots:
+            return self._generate_ai_summary(combined, filename, backend)
+
+    def _summarize_chunk(self, chunk: str, filename: str, index: int, total: int, backend: LLMBackend = None) -> Dict:
+        """Map step: summarize one chunk, reusing the cached result for unchanged text"""
+        backend = backend or self.backend
+        cache_key = SummaryCache.make_key("chunk", chunk, self.PROMPT_VERSION, backend.identity)
+        cached = self.summary_cache.get(cache_key)
+        if cached:
+            return cached
+
+        try:
+            prompt = f"""
+            Summarize the key points of part {index} of {total} of the document "{filename}" in a few short bullet points.
+            
+            Document part:
+            {chunk}
+            
+            """
+
+            result = {"summary": self._generate_once(cache_key, prompt, backend)}
+
+            self.summary_cache.set(cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error("Error summarizing chunk %s of %s: %s", index, filename, e)
             return {"error": f"Failed to generate AI summary: {str(e)}"}
 
+    def _generate_once(self, cache_key: str, prompt: str, backend: LLMBackend) -> str:
+        """Run a prompt under the LLM limit, sharing the reply with identical concurrent requests"""
+        def generate() -> str:
+            with self._llm_slots:
+                return self._call_backend(backend, prompt)
+
+        return self._flights.do(("generate", cache_key), generate)
+
+    def _call_backend(self, backend: LLMBackend, prompt: str) -> str:
+        """Send one prompt, counting, timing and tracing the call"""
+        LLM_CALLS.inc(backend=backend.name)
+        # Token counts are estimated at four characters per token, as for chunking
+        attributes = {
+            "llm.backend": backend.name,
+            "llm.model": backend.model,
+            "llm.prompt_chars": len(prompt),
+            "llm.estimated_prompt_tokens": len(prompt) // 4,
+        }
+        try:
+            with tracer.start_span("llm.generate", attributes) as span, STAGE_LATENCY.time(stage='llm'):
+                reply = backend.generate(prompt)
+                span.set_attributes({
+                    "llm.reply_chars": len(reply or ""),
+                    "llm.estimated_completion_tokens": len(reply or "") // 4,
+                })
+                return reply
+        except Exception:
+            LLM_ERRORS.inc(backend=backend.name)
+            raise
+
+    def _split_into_chunks(self, content: str) -> List[str]:
+        """Split text into chunks of about chunk_tokens tokens on paragraph or line boundaries"""
+        # Roughly four characters per token for English text
+        chunk_chars = self.chunk_tokens * 4
+
+        chunks = []
+        current = []
+        current_length = 0
+        for paragraph in content.splitlines(keepends=True):
+            # Hard-split paragraphs that are longer than a whole chunk
+            while len(paragraph) > chunk_chars:
+                if current:
+                    chunks.append("".join(current))
+                    current, current_length = [], 0
+                chunks.append(paragraph[:chunk_chars])
+                paragraph = paragraph[chunk_chars:]
+
+            if current_length + len(paragraph) > chunk_chars and current:
+                chunks.append("".join(current))
+                current, current_length = [], 0
+
+            current.append(paragraph)
+            current_length += len(paragraph)
+
+        if current:
+            chunks.append("".join(current))
+
+        return [chunk for chunk in chunks if chunk.strip()] or [content]
 
     
-    def _create_folder_summary(self, summaries: List[Dict], folder_path: str) -> str:
+    def _create_folder_summary(self, summaries: List[Dict], folder_path: str, backend: LLMBackend = None) -> str:
         """Create a comprehensive summary of all documents in the folder"""
         try:
+            backend = backend or self.backend
+
             if not summaries:
                 return "No documents to summarize."
             
@@ -193,6 +658,12 @@ class DocumentSummarizer:
                 combined_content += f"{i}. {summary_info['filename']}\n"
                 combined_content += f"   {summary_info['summary']}\n\n"
             
+            # The overview only depends on the document summaries it is built from
+            cache_key = SummaryCache.make_key("folder", combined_content, self.PROMPT_VERSION, backend.identity)
+            cached = self.summary_cache.get(cache_key)
+            if cached:
+                return cached['summary']
+            
             # Generate a high-level folder summary
             prompt = f"""
             Please provide single line very short description of this folder based on the following document summaries:
@@ -201,16 +672,26 @@ class DocumentSummarizer:
             
             """
             
-            response = self.client.generate_content(prompt)
+            folder_summary = self._generate_once(cache_key, prompt, backend)
 
-            return response.text.strip()
+            self.summary_cache.set(cache_key, {"summary": folder_summary})
+
+            return folder_summary
             
         except Exception as e:
-            logger.error(f"Error creating folder summary: {e}")
+            logger.error("Error creating folder summary: %s", e)
             return f"Folder contains {len(summaries)} documents. Individual summaries available above."
 
             
     
+    def get_cache_stats(self) -> Dict:
+        """Summary and extracted-text cache and request coalescing counters"""
+        stats = {"summary_cache": self.summary_cache.stats(), "summary_single_flight": self._flights.stats()}
+        if self.text_cache:
+            stats["text_cache"] = self.text_cache.stats()
+        return stats
+
+    @STAGE_LATENCY.timed(stage='formatting')
     def format_summary_response(self, summary_result: Dict) -> str:
         try:
             if "error" in summary_result:
@@ -235,11 +716,14 @@ class DocumentSummarizer:
                 for i, doc_summary in enumerate(summary_result['summaries'], 1):
                     response += f"\n{i}. *{doc_summary['filename']}*\n"
                     response += f"{doc_summary['summary']}\n"
+
+                if summary_result.get('truncated'):
+                    response += "\n_More documents in this folder were not summarized._\n"
                 
                 return response
             
             return "❌ Unexpected response format"
             
         except Exception as e:
-            logger.error(f"Error formatting summary response: {e}")
+            logger.error("Error formatting summary response: %s", e)
             return f"❌ Error formatting response: {str(e)}"
@@ -0,0 +1,485 @@
+import os
+import time
+import sqlite3
+import logging
+import secrets
+import threading
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DriveMetadataIndex:
+    """Local SQLite mirror of Drive file metadata kept current through the Changes API.
+
+    Several processes (gunicorn workers) may share one database file: one of
+    them crawls the Drive into staging tables that replace the live ones in a
+    single transaction, so readers never see a half-built mirror.
+    """
+
+    FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+    FILE_FIELDS = "id, name, mimeType, size, modifiedTime, md5Checksum, parents, trashed"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            mime_type TEXT NOT NULL,
+            size INTEGER,
+            modified_time TEXT,
+            md5_checksum TEXT
+        );
+        CREATE TABLE IF NOT EXISTS parents (
+            file_id TEXT NOT NULL,
+            parent_id TEXT NOT NULL,
+            PRIMARY KEY (file_id, parent_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_parents_parent ON parents (parent_id);
+        CREATE INDEX IF NOT EXISTS idx_files_name ON files (name_key);
+        CREATE TABLE IF NOT EXISTS state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    STAGING_SCHEMA = """
+        DROP TABLE IF EXISTS files_staging;
+        DROP TABLE IF EXISTS parents_staging;
+        CREATE TABLE files_staging (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            mime_type TEXT NOT NULL,
+            size INTEGER,
+            modified_time TEXT,
+            md5_checksum TEXT
+        );
+        CREATE TABLE parents_staging (
+            file_id TEXT NOT NULL,
+            parent_id TEXT NOT NULL,
+            PRIMARY KEY (file_id, parent_id)
+        );
+    """
+
+    # A crawler that stops renewing its claim (e.g. it crashed) is taken over after this long
+    SEED_LEASE_SECONDS = 300
+
+    def __init__(self, db_path: str, sync_interval: float = 30.0):
+        self.db_path = db_path
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        # Held while talking to Drive; readers only take _lock
+        self._sync_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._next_refresh = 0.0
+        self._last_sync = 0.0
+        # Identifies this process's claim on the seed crawl
+        self._owner = secrets.token_hex(8)
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and make sure the schema exists"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def reset(self):
+        """Open a fresh connection, e.g. in a forked worker.
+
+        SQLite connections must not be shared across fork; the inherited one
+        is abandoned rather than closed, since the parent still uses it.
+        """
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._next_refresh = 0.0
+        self._owner = secrets.token_hex(8)
+        self._conn = self._connect()
+
+    # ------------------------------------------------------------------
+    # Synchronisation
+    # ------------------------------------------------------------------
+
+    @property
+    def generation(self) -> int:
+        """Bumped in the database whenever a seed or sync may have moved or renamed files.
+
+        It is shared by every process using the file, so a process whose own
+        sync found nothing new still learns that another one applied changes.
+        """
+        return int(self._get_state('generation') or 0)
+
+    def is_seeded(self) -> bool:
+        """Whether any process has finished a crawl of this database"""
+        return self._get_state('start_page_token') is not None
+
+    def refresh(self, service) -> bool:
+        """Seed or sync in a background thread when due; True once reads can be served.
+
+        Callers never wait for Drive: until the first crawl has finished they
+        should use the live API, and afterwards they read the mirror as of the
+        last completed sync.
+        """
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return self.is_seeded()
+
+        with self._refresh_lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._next_refresh = now + self.sync_interval
+                self._refresher = threading.Thread(
+                    target=self._refresh, args=(service,), name="drive-index-sync", daemon=True
+                )
+                self._refresher.start()
+        return self.is_seeded()
+
+    def _refresh(self, service):
+        try:
+            if self.is_seeded():
+                self.sync(service, force=True)
+            else:
+                self.seed(service)
+        except Exception as e:
+            logger.error("Drive metadata index sync failed: %s", e)
+
+    def seed(self, service) -> bool:
+        """Load the full metadata of the Drive once and remember where the change feed starts.
+
+        Only the process holding the seed claim crawls; others return False
+        and keep reading the current tables. Pages are fetched without the
+        lock and written to staging tables, which replace the live ones in one
+        transaction once the crawl is complete.
+        """
+        with self._sync_lock:
+            if not self._claim_seed():
+                logger.info("Drive metadata index is being seeded by another process")
+                return False
+
+            try:
+                started = time.monotonic()
+
+                # Take the token first so nothing changed during the crawl is lost
+                start_page_token = service.changes().getStartPageToken().execute()['startPageToken']
+                root_id = service.files().get(fileId='root', fields='id').execute()['id']
+
+                with self._lock:
+                    self._conn.executescript(self.STAGING_SCHEMA)
+
+                count = 0
+                page_token = None
+                while True:
+                    results = service.files().list(
+                        q="trashed=false",
+                        pageSize=1000,
+                        pageToken=page_token,
+                        fields=f"nextPageToken, files({self.FILE_FIELDS})"
+                    ).execute()
+
+                    with self._lock:
+                        self._conn.execute("BEGIN")
+                        try:
+                            for file in results.get('files', []):
+                                self._upsert(file, staging=True)
+                                count += 1
+                            self._conn.execute("COMMIT")
+                        except Exception:
+                            self._conn.execute("ROLLBACK")
+                            raise
+
+                    page_token = results.get('nextPageToken')
+                    if not page_token:
+                        break
+                    if not self._claim_seed():
+                        logger.error("Lost the Drive metadata index seed claim; abandoning the crawl")
+                        return False
+
+                with self._lock:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        self._conn.execute("DELETE FROM files")
+                        self._conn.execute("INSERT INTO files SELECT * FROM files_staging")
+                        self._conn.execute("DELETE FROM parents")
+                        self._conn.execute("INSERT INTO parents SELECT * FROM parents_staging")
+                        self._set_state('root_id', root_id)
+                        self._set_state('start_page_token', start_page_token)
+                        self._bump_generation()
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                    self._conn.execute("DROP TABLE files_staging")
+                    self._conn.execute("DROP TABLE parents_staging")
+                    self._last_sync = time.monotonic()
+            finally:
+                self._release_seed()
+
+        logger.info("Drive metadata index seeded with %s files in %.1fs", count, time.monotonic() - started)
+        return True
+
+    def _claim_seed(self) -> bool:
+        """Take or renew this process's claim on the seed crawl"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                claim = self._get_state('seeding')
+                if claim:
+                    owner, expires_at = claim.split(' ')
+                    if owner != self._owner and float(expires_at) > time.time():
+                        self._conn.execute("ROLLBACK")
+                        return False
+                self._set_state('seeding', f"{self._owner} {time.time() + self.SEED_LEASE_SECONDS}")
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _release_seed(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM state WHERE key = 'seeding' AND value LIKE ?", (f"{self._owner} %",)
+            )
+
+    def sync(self, service, force: bool = False) -> int:
+        """Apply pending changes from the Changes API; returns the number applied.
+
+        Calls within sync_interval of the previous sync are no-ops unless forced.
+        Each page is fetched without the lock and applied under it, so readers
+        only ever wait for local writes. A page is only applied if no other
+        process has moved the change feed on in the meantime.
+        """
+        with self._sync_lock:
+            if not self.is_seeded():
+                self.seed(service)
+                return 0
+
+            if not force and time.monotonic() - self._last_sync < self.sync_interval:
+                return 0
+
+            page_token = self._get_state('start_page_token')
+            applied = 0
+
+            while page_token:
+                results = service.changes().list(
+                    pageToken=page_token,
+                    pageSize=1000,
+                    spaces='drive',
+                    includeRemoved=True,
+                    fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({self.FILE_FIELDS}))"
+                ).execute()
+
+                with self._lock:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        if self._get_state('start_page_token') != page_token:
+                            # Another process applied this page (and maybe more) first
+                            self._conn.execute("ROLLBACK")
+                            break
+
+                        changes = results.get('changes', [])
+                        for change in changes:
+                            file = change.get('file')
+                            if change.get('removed') or not file or file.get('trashed'):
+                                self._remove(change['fileId'])
+                            else:
+                                self._upsert(file)
+                            applied += 1
+
+                        if 'newStartPageToken' in results:
+                            self._set_state('start_page_token', results['newStartPageToken'])
+                            page_token = None
+                        else:
+                            page_token = results.get('nextPageToken')
+                            self._set_state('start_page_token', page_token)
+                        if changes:
+                            # Tells every process that cached paths may be stale
+                            self._bump_generation()
+                        self._conn.execute("COMMIT")
+                    except Exception:
+                        self._conn.execute("ROLLBACK")
+                        raise
+
+            self._last_sync = time.monotonic()
+            if applied:
+                logger.info("Applied %s Drive changes to metadata index", applied)
+            return applied
+
+    # ------------------------------------------------------------------
+    # Local mutations (keep the mirror current after our own writes)
+    # ------------------------------------------------------------------
+
+    def upsert(self, file: Dict):
+        with self._lock:
+            self._upsert(file)
+
+    def remove(self, file_id: str):
+        with self._lock:
+            self._remove(file_id)
+
+    def set_parents(self, file_id: str, parent_ids: List[str]):
+        with self._lock:
+            self._conn.execute("DELETE FROM parents WHERE file_id = ?", (file_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO parents (file_id, parent_id) VALUES (?, ?)",
+                [(file_id, parent_id) for parent_id in parent_ids]
+            )
+
+    def _upsert(self, file: Dict, staging: bool = False):
+        files, parents = ("files_staging", "parents_staging") if staging else ("files", "parents")
+        size = file.get('size')
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {files} (id, name, name_key, mime_type, size, modified_time, md5_checksum) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                file['id'],
+                file['name'],
+                file['name'].casefold(),
+                file['mimeType'],
+                int(size) if size is not None else None,
+                file.get('modifiedTime'),
+                file.get('md5Checksum'),
+            )
+        )
+        self._conn.execute(f"DELETE FROM {parents} WHERE file_id = ?", (file['id'],))
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO {parents} (file_id, parent_id) VALUES (?, ?)",
+            [(file['id'], parent_id) for parent_id in file.get('parents', [])]
+        )
+
+    def _remove(self, file_id: str):
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self._conn.execute("DELETE FROM parents WHERE file_id = ?", (file_id,))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def find_child(self, parent_id: str, name: str, folder: bool = False) -> Optional[Dict]:
+        """Find a direct child of parent_id by (case-insensitive) name"""
+        query = (
+            "SELECT f.* FROM files f JOIN parents p ON p.file_id = f.id "
+            "WHERE p.parent_id = ? AND f.name_key = ?"
+        )
+        params = [self._resolve_alias(parent_id), name.casefold()]
+        if folder:
+            query += " AND f.mime_type = ?"
+            params.append(self.FOLDER_MIME_TYPE)
+
+        with self._lock:
+            row = self._conn.execute(query + " LIMIT 1", params).fetchone()
+        return self._to_resource(row) if row else None
+
+    def find_children(self, parent_id: str, names: List[str]) -> Dict[str, Dict]:
+        """Find several direct children of parent_id, keyed by case-folded name"""
+        keys = [name.casefold() for name in names]
+        placeholders = ",".join("?" for _ in keys)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT f.* FROM files f JOIN parents p ON p.file_id = f.id "
+                f"WHERE p.parent_id = ? AND f.name_key IN ({placeholders})",
+                [self._resolve_alias(parent_id)] + keys
+            ).fetchall()
+
+        found = {}
+        for row in rows:
+            found.setdefault(row['name_key'], self._to_resource(row))
+        return found
+
+    def find_shared_folders(self, name: str, limit: int = 2) -> List[Dict]:
+        """Find top-level folders shared with us by name.
+
+        These are folders none of whose parents we can see: not in 'My Drive'
+        and not nested in another folder of the mirror.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT f.* FROM files f WHERE f.name_key = ? AND f.mime_type = ? AND NOT EXISTS ("
+                "  SELECT 1 FROM parents p WHERE p.file_id = f.id"
+                "  AND (p.parent_id = ? OR p.parent_id IN (SELECT id FROM files))"
+                ") LIMIT ?",
+                (name.casefold(), self.FOLDER_MIME_TYPE, self._resolve_alias('root'), limit)
+            ).fetchall()
+        return [self._to_resource(row) for row in rows]
+
+    def iter_children(self, parent_id: Optional[str], mime_types: List[str] = None,
+                      page_size: int = 1000) -> Iterator[Dict]:
+        """Yield children of parent_id (or every file when None) as Drive-style resources"""
+        if parent_id is None:
+            base = "SELECT f.* FROM files f WHERE 1 = 1"
+            params = []
+        else:
+            base = "SELECT f.* FROM files f JOIN parents p ON p.file_id = f.id WHERE p.parent_id = ?"
+            params = [self._resolve_alias(parent_id)]
+
+        if mime_types:
+            base += f" AND f.mime_type IN ({','.join('?' for _ in mime_types)})"
+            params += list(mime_types)
+
+        # Keyset pagination keeps the lock short and memory bounded
+        last_key = ("", "")
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    base + " AND (f.name_key, f.id) > (?, ?) ORDER BY f.name_key, f.id LIMIT ?",
+                    params + [last_key[0], last_key[1], page_size]
+                ).fetchall()
+
+            for row in rows:
+                yield self._to_resource(row)
+
+            if len(rows) < page_size:
+                return
+            last_key = (rows[-1]['name_key'], rows[-1]['id'])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {
+            "files": count,
+            "seeded": self.is_seeded(),
+            "seconds_since_sync": round(time.monotonic() - self._last_sync, 1) if self._last_sync else None,
+        }
+
+    def _resolve_alias(self, parent_id: str) -> str:
+        if parent_id == 'root':
+            return self._get_state('root_id') or parent_id
+        return parent_id
+
+    def _to_resource(self, row: sqlite3.Row) -> Dict:
+        resource = {
+            "id": row['id'],
+            "name": row['name'],
+            "mimeType": row['mime_type'],
+            "modifiedTime": row['modified_time'],
+        }
+        if row['size'] is not None:
+            resource['size'] = str(row['size'])
+        if row['md5_checksum']:
+            resource['md5Checksum'] = row['md5_checksum']
+        return resource
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _bump_generation(self):
+        self._conn.execute(
+            "INSERT INTO state (key, value) VALUES ('generation', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def _set_state(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
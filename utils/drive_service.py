@@ -0,0 +1,200 @@
+import os
+import re
+import time
+import logging
+import functools
+import threading
+from datetime import timezone
+from typing import List, Optional
+
+from utils.metrics import observe_drive_call
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+FILE_ID_PATTERN = re.compile(r'/files/([^/?]+)')
+
+
+@functools.lru_cache(maxsize=None)
+def _instrumented_request_class():
+    """HttpRequest that counts and traces every Drive call"""
+    from googleapiclient.http import HttpRequest
+
+    class InstrumentedHttpRequest(HttpRequest):
+        def execute(self, *args, **kwargs):
+            operation = (self.methodId or 'unknown').replace('drive.', '', 1)
+            file_id = FILE_ID_PATTERN.search(self.uri or '')
+            attributes = {
+                "drive.operation": operation,
+                "http.method": self.method,
+                "drive.file_id": file_id.group(1) if file_id else None,
+            }
+            with tracer.start_span(f"drive.{operation}", {k: v for k, v in attributes.items() if v}):
+                return observe_drive_call(operation, super().execute, *args, **kwargs)
+
+    return InstrumentedHttpRequest
+
+
+class DriveServiceFactory:
+    """Authenticates once per process and hands out a thread-safe Drive service.
+
+    The Google client libraries are imported on first use, not at import time.
+
+    The service resource is built a single time from the discovery document
+    bundled with google-api-python-client, so startup makes no discovery
+    request. httplib2 connections are not thread-safe, so every request is
+    sent through an AuthorizedHttp owned by the calling thread; each thread
+    keeps its connections alive between requests. A background thread
+    refreshes the access token refresh_margin seconds before it expires.
+    """
+
+    def __init__(self, scopes: List[str], credentials_file: str = None, token_file: str = 'token.json',
+                 refresh_margin: float = 300.0, timeout: float = 60.0):
+        self.scopes = scopes
+        self.credentials_file = credentials_file
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._credentials = None
+        self._service = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+                self._start_refresher()
+            return self._credentials
+
+    @property
+    def service(self):
+        """The shared Drive v3 resource; safe to use from any thread"""
+        with self._lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+
+                self._service = build(
+                    'drive', 'v3',
+                    http=self._http(),
+                    requestBuilder=self._build_request,
+                    static_discovery=True,
+                    cache_discovery=False
+                )
+                logger.info("Google Drive service ready")
+            return self._service
+
+    def _http(self):
+        """The calling thread's authorized transport"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import httplib2
+            import google_auth_httplib2
+
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+            self._local.http = http
+        return http
+
+    def _build_request(self, http, *args, **kwargs):
+        # The service passes the transport of the thread that built it; use our own
+        return _instrumented_request_class()(self._http(), *args, **kwargs)
+
+    def _load_credentials(self):
+        """Load token_file, refreshing or running the OAuth flow when needed"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        creds = None
+
+        if os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+
+        # If there are no (valid) credentials available, let the user log in.
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                if not self.credentials_file:
+                    raise ValueError("Google Drive credentials file not found")
+
+                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, self.scopes)
+                creds = flow.run_local_server(port=0)
+
+            self._save_credentials(creds)
+
+        logger.info("Google Drive authentication successful")
+        return creds
+
+    def _save_credentials(self, creds):
+        # Write then rename so a concurrent reader never sees a half-written token
+        tmp_path = f"{self.token_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as token:
+            token.write(creds.to_json())
+        os.replace(tmp_path, self.token_file)
+
+    def _start_refresher(self):
+        if self._refresher is not None or not self._credentials.refresh_token:
+            return
+        self._stopped.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="drive-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        from google.auth.transport.requests import Request
+
+        while True:
+            expiry = self._credentials.expiry
+            if expiry:
+                # Credentials.expiry is a naive UTC datetime
+                wait = expiry.replace(tzinfo=timezone.utc).timestamp() - time.time() - self.refresh_margin
+            else:
+                wait = self.refresh_margin
+            if self._stopped.wait(max(wait, 30.0)):
+                return
+
+            try:
+                with self._lock:
+                    self._credentials.refresh(Request())
+                    self._save_credentials(self._credentials)
+                logger.info("Refreshed Google Drive access token")
+            except Exception as e:
+                logger.error("Error refreshing Google Drive access token: %s", e)
+
+    def reset(self):
+        """Forget threads and connections, e.g. in a freshly forked worker.
+
+        The credentials and the service resource stay; transports are
+        recreated per thread on next use and the refresher is restarted.
+        """
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._refresher = None
+        self._stopped = threading.Event()
+        if self._credentials is not None:
+            self._start_refresher()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_factory: Optional[DriveServiceFactory] = None
+_factory_lock = threading.Lock()
+
+
+def get_drive_service_factory(scopes: List[str], credentials_file: str = None) -> DriveServiceFactory:
+    """The process-wide factory, created on first use"""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = DriveServiceFactory(
+                scopes,
+                credentials_file=credentials_file,
+                token_file=os.getenv('GOOGLE_DRIVE_TOKEN_FILE', 'token.json'),
+                refresh_margin=float(os.getenv('DRIVE_TOKEN_REFRESH_MARGIN_SECONDS', '300')),
+                timeout=float(os.getenv('DRIVE_HTTP_TIMEOUT_SECONDS', '60'))
+            )
+        return _factory
@@ -1,24 +1,26 @@
 import os
-import io
-import json
-from typing import List, Dict, Optional, Tuple
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+import fnmatch
+import tempfile
+from typing import List, Dict, Optional, Tuple, Iterator, BinaryIO
 from googleapiclient.errors import HttpError
-import base64
-from docx import Document
-import PyPDF2
-from bs4 import BeautifulSoup
 import logging
 from datetime import datetime
+from itertools import islice
+from utils.path_cache import PathCache
+from utils.single_flight import SingleFlight
+from utils.metrics import STAGE_LATENCY, observe_drive_call
+from utils.tracing import tracer
+from utils.drive_index import DriveMetadataIndex
+from utils.drive_service import DriveServiceFactory, get_drive_service_factory
+from utils.text_extraction import ExtractionPool, extract_plain_text
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class TooManyFilesError(Exception):
+    """Raised when a bulk operation would change more than bulk_max_items files"""
+
+
 class GoogleDriveClient:
     """Google Drive API client for file operations"""
     
@@ -29,90 +31,198 @@ class GoogleDriveClient:
         'https://www.googleapis.com/auth/drive.metadata.readonly'
     ]
     
-    def __init__(self, credentials_file: str = None):
+    FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+    GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
+    DOCX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+    # Types whose download is the text itself (Google Docs are exported)
+    TEXT_MIME_TYPES = (GOOGLE_DOC_MIME_TYPE, 'text/plain')
+
+    # Types get_document_content can turn into text
+    DOCUMENT_MIME_TYPES = [
+        GOOGLE_DOC_MIME_TYPE,
+        'application/pdf',
+        DOCX_MIME_TYPE,
+        'text/plain'
+    ]
+
+    ROOT_ENTRY = {"id": "root", "mimeType": FOLDER_MIME_TYPE}
+
+    # Drive rejects overly long queries, so sibling lookups are chunked
+    SIBLING_BATCH_SIZE = 20
+
+    # Largest pageSize accepted by files().list
+    MAX_PAGE_SIZE = 1000
+
+    # Most calls the batch endpoint accepts in one request
+    BATCH_SIZE = 100
+
+    
+    def __init__(self, credentials_file: str = None, service_factory: DriveServiceFactory = None):
         """Initialize Google Drive client"""
         self.credentials_file = credentials_file or os.getenv('GOOGLE_DRIVE_CREDENTIALS_FILE')
+        self.credentials = None
         self.service = None
+        # Authentication and the Drive service are shared by every client in the process
+        self.service_factory = service_factory or get_drive_service_factory(self.SCOPES, self.credentials_file)
+        self.page_size = int(os.getenv('DRIVE_LIST_PAGE_SIZE', '100'))
+        self.spool_threshold = int(os.getenv('DOWNLOAD_SPOOL_THRESHOLD_MB', '8')) * 1024 * 1024
+        self.download_chunk_size = int(os.getenv('DOWNLOAD_CHUNK_MB', '8')) * 1024 * 1024
+        self.bulk_max_items = int(os.getenv('DRIVE_BULK_MAX_ITEMS', '500'))
+        self.extraction_pool = ExtractionPool(
+            workers=int(os.getenv('EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1)))),
+            timeout=float(os.getenv('EXTRACTION_TIMEOUT_SECONDS', '60')),
+            max_pages=int(os.getenv('EXTRACTION_MAX_PAGES', '500')) or None
+        )
+        self.path_cache = PathCache(
+            max_entries=int(os.getenv('PATH_CACHE_MAX_ENTRIES', '2048')),
+            ttl_seconds=float(os.getenv('PATH_CACHE_TTL_SECONDS', '300'))
+        )
+
+        # Identical concurrent reads (listings, lookups, downloads) share one Drive call
+        self._flights = SingleFlight()
+
+        # Optional local metadata mirror; reads are served from it when enabled
+        index_path = os.getenv('DRIVE_INDEX_PATH')
+        self.index = DriveMetadataIndex(
+            index_path,
+            sync_interval=float(os.getenv('DRIVE_INDEX_SYNC_SECONDS', '30'))
+        ) if index_path else None
+        self._index_generation = 0
         self._authenticate()
     
-    def _authenticate(self):
-        """Authenticate with Google Drive API"""
-        creds = None
+    def reset(self):
+        """Drop connections, threads and worker processes inherited through fork"""
+        self.service_factory.reset()
+        self.extraction_pool.reset()
+        if self.index:
+            self.index.reset()
+        self._flights = SingleFlight()
 
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', self.SCOPES)
-        
-        # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not self.credentials_file:
-                    raise ValueError("Google Drive credentials file not found")
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, self.SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            # Save the credentials for the next run
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        
-        self.service = build('drive', 'v3', credentials=creds)
-        logger.info("Google Drive authentication successful")
+    def _authenticate(self):
+        """Authenticate with Google Drive API through the shared service factory"""
+        self.credentials = self.service_factory.credentials
+
+    @property
+    def service(self):
+        """Drive service safe to use from any thread.
+
+        Unless one was injected explicitly, this is the process-wide service,
+        which sends each thread's requests over that thread's own connection.
+        """
+        if self._service is not None:
+            return self._service
+        return self.service_factory.service
+
+    @service.setter
+    def service(self, value):
+        self._service = value
     
 
 
 
-    def list_files(self, folder_path: str = None) -> List[Dict]:
-        """List files in a specific folder or root"""
-        try:
-            query = "trashed=false"
-            
-            if folder_path and folder_path != "/":
-                # Get folder ID by name
-                folder_id = self._get_folder_id(folder_path)
-                if folder_id:
-                    query += f" and '{folder_id}' in parents"
-                else:
-                    return {"error": f"Folder '{folder_path}' not found"}
-            
-            results = self.service.files().list(
-                q=query,
-                pageSize=50,
-                fields="nextPageToken, files(id, name, mimeType, size, modifiedTime)"
-            ).execute()
+    def list_files(self, folder_path: str = None, max_files: int = None, page_size: int = None) -> Dict:
+        """List files in a specific folder or root.
 
-            # print("results ------------ " , results)
+        With max_files set only as many pages as needed are fetched and
+        "truncated" tells whether the folder holds more entries.
+        """
+        key = ("list", self._normalize_path(folder_path), max_files, page_size)
+        return self._flights.do(key, self._list_files, folder_path, max_files, page_size)
 
-            
-            files = results.get('files', [])
+    def _list_files(self, folder_path: str, max_files: int, page_size: int) -> Dict:
+        try:
+            if max_files:
+                # One extra entry is enough to know whether there are more
+                page_size = min(page_size or self.page_size, max_files + 1)
+
+            files = self.iter_files(folder_path, page_size=page_size)
+            file_list = list(islice(files, max_files) if max_files else files)
 
-            if not files:
+            if not file_list:
                 return {"message": "No files found"}
-            
-            file_list = []
-            for file in files:
-                file_info = {
-                    "name": file['name'],
-                    "id": file['id'],
-                    "type": file['mimeType'],
-                    "size": self._format_size( int(file.get('size', '0'))),
-                    "modified": datetime.strptime(file['modifiedTime'], '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%Y-%m-%d %H:%M:%S')
-                }
 
-                file_list.append(file_info)
-            
-            # print("file_list ----------- " , file_list)
-            
-            return {"files": file_list}
+            truncated = bool(max_files) and next(files, None) is not None
+
+            return {"files": file_list, "truncated": truncated}
             
+        except FileNotFoundError as error:
+            return {"error": str(error)}
         except HttpError as error:
-            logger.error(f"Error listing files: {error}")
+            logger.error("Error listing files: %s", error)
             return {"error": f"Failed to list files: {str(error)}"}
-    
 
+    def iter_files(self, folder_path: str = None, page_size: int = None,
+                   mime_types: List[str] = None) -> Iterator[Dict]:
+        """Yield the files of a folder (or the whole Drive), following page tokens lazily.
+
+        Raises FileNotFoundError when the folder does not exist.
+        """
+        folder_id = None
+        prime_cache = bool(folder_path) and folder_path != "/"
+
+        if prime_cache:
+            folder_id = self._get_folder_id(folder_path)
+            if not folder_id:
+                raise FileNotFoundError(f"Folder '{folder_path}' not found")
+
+        page_size = max(1, min(page_size or self.page_size, self.MAX_PAGE_SIZE))
 
+        if self._index_ready():
+            files = self.index.iter_children(folder_id, mime_types=mime_types, page_size=page_size)
+        else:
+            files = self._iter_drive_files(folder_id, mime_types, page_size)
+
+        for file in files:
+            # Listing a folder resolves all of its children at once
+            if prime_cache:
+                self.path_cache.set(
+                    self._normalize_path(f"{folder_path}/{file['name']}"),
+                    self._to_path_entry(file)
+                )
+
+            yield self._format_file_info(file)
+
+    def _iter_drive_files(self, folder_id: Optional[str], mime_types: Optional[List[str]],
+                          page_size: int) -> Iterator[Dict]:
+        """Yield raw file resources from files().list, one page at a time"""
+        query = "trashed=false"
+        if folder_id:
+            query += f" and '{folder_id}' in parents"
+
+        if mime_types:
+            query += " and (" + " or ".join(f"mimeType='{mime_type}'" for mime_type in mime_types) + ")"
+
+        page_token = None
+        while True:
+            results = self.service.files().list(
+                q=query,
+                pageSize=page_size,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, mimeType, size, modifiedTime, md5Checksum)"
+            ).execute()
+
+            yield from results.get('files', [])
+
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+
+    def _format_file_info(self, file: Dict) -> Dict:
+        """Turn a Drive file resource into the entry returned by listings"""
+        return {
+            "name": file['name'],
+            "id": file['id'],
+            "type": file['mimeType'],
+            "size": self._format_size(int(file.get('size', '0'))),
+            "size_bytes": int(file['size']) if 'size' in file else None,
+            "modified": datetime.strptime(file['modifiedTime'], '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%Y-%m-%d %H:%M:%S'),
+            "revision": self._get_revision(file)
+        }
+
+    def _get_revision(self, file: Dict) -> Optional[str]:
+        """Identify a file's content revision (Google Docs have no md5Checksum)"""
+        return file.get('md5Checksum') or file.get('modifiedTime')
 
     def delete_file(self, file_path: str) -> Dict:
         """Delete a file by path"""
@@ -123,13 +233,16 @@ class GoogleDriveClient:
                 return {"error": f"File '{file_path}' not found"}
             
             self.service.files().delete(fileId=file_id).execute()
+            self.path_cache.invalidate_prefix(self._normalize_path(file_path))
+            if self.index:
+                self.index.remove(file_id)
 
-            print("file_id deleted" , file_id)
+            logger.info("Deleted file %s", file_id)
 
             return {"message": f"File '{file_path}' deleted successfully"}
             
         except HttpError as error:
-            logger.error(f"Error deleting file: {error}")
+            logger.error("Error deleting file: %s", error)
             return {"error": f"Failed to delete file: {str(error)}"}
 
 
@@ -157,11 +270,14 @@ class GoogleDriveClient:
                 removeParents=previous_parents,
                 fields='id, parents'
             ).execute()
+            self.path_cache.invalidate_prefix(self._normalize_path(source_path))
+            if self.index:
+                self.index.set_parents(file_id, file.get('parents', [destination_folder_id]))
             
             return {"message": f"File moved from '{source_path}' to '{destination_path}' successfully"}
             
         except HttpError as error:
-            logger.error(f"Error moving file: {error}")
+            logger.error("Error moving file: %s", error)
             return {"error": f"Failed to move file: {str(error)}"}
     
 
@@ -187,196 +303,579 @@ class GoogleDriveClient:
             body={
                 'name': source_file['name'],  # Keep original name
                 'parents': [destination_folder_id]
-            }
+            },
+            fields=DriveMetadataIndex.FILE_FIELDS
             ).execute()
 
+            # A same-named file may now exist in the destination folder
+            self.path_cache.invalidate(
+                self._normalize_path(f"{destination_path}/{source_file['name']}")
+            )
+            if self.index:
+                self.index.upsert(copied_file)
+
             return {"message": f"File '{source_path}' copied to '{destination_path}' successfully", "file_id": copied_file.get('id')}
 
 
         except HttpError as error:
-            logger.error(f"Error copying file: {error}")
+            logger.error("Error copying file: %s", error)
             return {"error": f"Failed to copy file: {str(error)}"}
 
 
 
-    def get_document_content(self, file_path: str) -> Dict:
-        """Extract text content from various document types"""
+    def delete_files(self, file_paths: List[str]) -> Dict:
+        """Delete several files, expanding globs, in batched requests.
+
+        Returns {"results": [{"path", "success", "error"?}], "succeeded", "failed"}.
+        """
+        try:
+            items, results = self.expand_paths(file_paths)
+        except TooManyFilesError as e:
+            return {"error": str(e)}
+
+        responses = self._execute_batch([
+            self.service.files().delete(fileId=item['id']) for item in items
+        ])
+
+        for item, (_, error) in zip(items, responses):
+            if error is None:
+                self.path_cache.invalidate_prefix(self._normalize_path(item['path']))
+                if self.index:
+                    self.index.remove(item['id'])
+            results.append(self._bulk_result(item['path'], error))
+
+        return self._summarize_bulk(results)
+
+    def move_files(self, source_paths: List[str], destination_path: str) -> Dict:
+        """Move several files (globs allowed) into a folder in batched requests"""
+        destination_folder_id = self._get_folder_id(destination_path)
+        if not destination_folder_id:
+            return {"error": f"Destination folder '{destination_path}' not found"}
+
+        try:
+            items, results = self.expand_paths(source_paths)
+        except TooManyFilesError as e:
+            return {"error": str(e)}
+
+        # The folder a path was resolved through is the parent being moved away from
+        responses = self._execute_batch([
+            self.service.files().update(
+                fileId=item['id'],
+                addParents=destination_folder_id,
+                removeParents=item['parent_id'],
+                fields='id, parents'
+            )
+            for item in items
+        ])
+
+        for item, (file, error) in zip(items, responses):
+            if error is None:
+                self.path_cache.invalidate_prefix(self._normalize_path(item['path']))
+                if self.index:
+                    self.index.set_parents(item['id'], file.get('parents', [destination_folder_id]))
+            results.append(self._bulk_result(item['path'], error))
+
+        return self._summarize_bulk(results)
+
+    def copy_files(self, source_paths: List[str], destination_path: str) -> Dict:
+        """Copy several files (globs allowed) into a folder in batched requests"""
+        destination_folder_id = self._get_folder_id(destination_path)
+        if not destination_folder_id:
+            return {"error": f"Destination folder '{destination_path}' not found"}
+
+        try:
+            items, results = self.expand_paths(source_paths)
+        except TooManyFilesError as e:
+            return {"error": str(e)}
+
+        responses = self._execute_batch([
+            self.service.files().copy(
+                fileId=item['id'],
+                body={'name': item['name'], 'parents': [destination_folder_id]},
+                fields=DriveMetadataIndex.FILE_FIELDS
+            )
+            for item in items
+        ])
+
+        for item, (copied_file, error) in zip(items, responses):
+            if error is None:
+                self.path_cache.invalidate(self._normalize_path(f"{destination_path}/{item['name']}"))
+                if self.index:
+                    self.index.upsert(copied_file)
+            results.append(self._bulk_result(item['path'], error))
+
+        return self._summarize_bulk(results)
+
+    def expand_paths(self, paths: List[str]) -> Tuple[List[Dict], List[Dict]]:
+        """Resolve paths for a bulk operation.
+
+        A last segment containing * or ? is matched (case-insensitively)
+        against the files, not folders, of its parent folder. Returns the
+        matched items as {"path", "id", "name", "parent_id"} and a result
+        entry for every path that matched nothing. Raises TooManyFilesError
+        when more than bulk_max_items files match.
+        """
+        items = []
+        missing = []
+        plain = []
+
+        for path in paths:
+            parts = self._split_path(path)
+            if not parts or not any(char in parts[-1] for char in "*?"):
+                plain.append(path)
+                continue
+
+            if len(parts) == 1:
+                # Listing "/" would match against every file in the Drive
+                missing.append(self._bulk_result(path, "Patterns must name a folder"))
+                continue
+
+            parent_path = self._display_path(parts[:-1])
+            # Only * and ? are wildcards; a literal [ must not open a character set
+            pattern = parts[-1].casefold().replace("[", "[[]")
+            try:
+                matched = [
+                    file for file in self.iter_files(parent_path)
+                    if file['type'] != self.FOLDER_MIME_TYPE and fnmatch.fnmatchcase(file['name'].casefold(), pattern)
+                ]
+            except FileNotFoundError as error:
+                missing.append(self._bulk_result(path, str(error)))
+                continue
+
+            if not matched:
+                missing.append(self._bulk_result(path, "No files match"))
+                continue
+
+            parent_id = self._get_folder_id(parent_path)
+            for file in matched:
+                items.append({
+                    "path": self._display_path(parts[:-1] + [file['name']]),
+                    "id": file['id'],
+                    "name": file['name'],
+                    "parent_id": parent_id,
+                })
+
+        resolved = self.resolve_paths(plain) if plain else {}
+        for path in plain:
+            entry = resolved.get(path)
+            parts = self._split_path(path)
+            parent = self._resolve_path(self._display_path(parts[:-1]), folder=True) if entry and parts else None
+            if not parent:
+                missing.append(self._bulk_result(path, "Not found"))
+                continue
+
+            items.append({
+                "path": path,
+                "id": entry['id'],
+                "name": entry.get('name') or parts[-1],
+                "parent_id": parent['id'],
+            })
+
+        # The same file may be named twice, e.g. explicitly and through a glob
+        items = list({item['id']: item for item in items}.values())
+
+        if len(items) > self.bulk_max_items:
+            raise TooManyFilesError(f"{len(items)} files match; at most {self.bulk_max_items} can be changed at once")
+
+        return items, missing
+
+    def _execute_batch(self, requests: List) -> List[Tuple[Optional[Dict], Optional[Exception]]]:
+        """Send requests through the batch endpoint, BATCH_SIZE per round trip.
+
+        Returns (response, error) pairs in request order. A round trip that
+        fails as a whole fails each of its requests; the others still count.
+        """
+        responses: Dict[str, Tuple[Optional[Dict], Optional[Exception]]] = {}
+
+        def callback(request_id, response, exception):
+            responses[request_id] = (response, exception)
+
+        for start in range(0, len(requests), self.BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index, request in enumerate(requests[start:start + self.BATCH_SIZE], start):
+                batch.add(request, request_id=str(index))
+
+            try:
+                with tracer.start_span("drive.batch", {"drive.batch_size": len(requests[start:start + self.BATCH_SIZE])}):
+                    observe_drive_call('batch', batch.execute)
+            except Exception as error:
+                # HttpError, or a transport error (socket, httplib2) after earlier round trips succeeded
+                logger.error("Error executing batch request: %s", error)
+                for index in range(start, min(start + self.BATCH_SIZE, len(requests))):
+                    responses.setdefault(str(index), (None, error))
+
+        return [responses.get(str(index), (None, RuntimeError("No response"))) for index in range(len(requests))]
+
+    def _bulk_result(self, path: str, error=None) -> Dict:
+        if error is None:
+            return {"path": path, "success": True}
+        if isinstance(error, HttpError):
+            logger.error("Bulk operation failed for '%s': %s", path, error)
+            error = getattr(error, 'reason', None) or str(error)
+        return {"path": path, "success": False, "error": str(error)}
+
+    def _summarize_bulk(self, results: List[Dict]) -> Dict:
+        succeeded = sum(1 for result in results if result['success'])
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+    def get_file_metadata(self, file_path: str) -> Dict:
+        """Resolve a path and return the file's Drive metadata"""
+        return self._flights.do(("metadata", self._normalize_path(file_path)), self._get_file_metadata, file_path)
+
+    def _get_file_metadata(self, file_path: str) -> Dict:
         try:
             file_id = self._get_file_id(file_path)
 
             if not file_id:
                 return {"error": f"File '{file_path}' not found"}
-            
-            # Get file metadata
-            file_metadata = self.service.files().get(fileId=file_id).execute()
-            mime_type = file_metadata['mimeType']
-            
-            content = ""
-            
-            if mime_type == 'application/vnd.google-apps.document':
-                # Google Docs
-                content = self._get_google_doc_content(file_id)
-            elif mime_type == 'application/pdf':
-                # PDF files
-                content = self._get_pdf_content(file_id)
-            elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                # DOCX files
-                content = self._get_docx_content(file_id)
-            elif mime_type == 'text/plain':
-                # Text files
-                content = self._get_text_content(file_id)
-            else:
-                return {"error": f"Unsupported file type: {mime_type}"}
+
+            file_metadata = self.service.files().get(
+                fileId=file_id,
+                fields='id, name, mimeType, size, modifiedTime, md5Checksum'
+            ).execute()
+            file_metadata['revision'] = self._get_revision(file_metadata)
+
+            return file_metadata
+
+        except HttpError as error:
+            logger.error("Error getting file metadata: %s", error)
+            return {"error": f"Failed to get file metadata: {str(error)}"}
+
+    def get_document_content(self, file_path: str, max_chars: int = None) -> Dict:
+        """Extract text content from various document types, up to max_chars characters"""
+        key = ("content", self._normalize_path(file_path), max_chars)
+        return self._flights.do(key, self._get_document_content, file_path, max_chars)
+
+    def _get_document_content(self, file_path: str, max_chars: int) -> Dict:
+        file_metadata = self.get_file_metadata(file_path)
+        if "error" in file_metadata:
+            return file_metadata
+
+        mime_type = file_metadata['mimeType']
+        if mime_type not in self.DOCUMENT_MIME_TYPES:
+            return {"error": f"Unsupported file type: {mime_type}"}
+
+        try:
+            with self.download_document(file_metadata['id'], mime_type, file_metadata.get('size'), max_chars) as fh:
+                content = self.extract_text(mime_type, fh, max_chars)
             
             return {"content": content, "filename": file_metadata['name']}
             
         except HttpError as error:
-            logger.error(f"Error getting document content: {error}")
+            logger.error("Error getting document content: %s", error)
             return {"error": f"Failed to get document content: {str(error)}"}
-    
-    def _get_google_doc_content(self, file_id: str) -> str:
-        """Extract content from Google Docs"""
-        try:
-            # Export as plain text
+
+    @STAGE_LATENCY.timed(stage='drive_download')
+    def download_document(self, file_id: str, mime_type: str, size: int = None,
+                          max_chars: int = None) -> BinaryIO:
+        """Download a document into a file object positioned at its start.
+
+        Files larger than the spool threshold go straight to a temporary file on
+        disk; smaller (or unknown-size) downloads stay in memory until they grow
+        past it. Google Docs are exported as plain text. With max_chars, plain
+        text is fetched with ranged requests only as far as the budget needs.
+        The caller closes the returned file.
+        """
+        if mime_type == self.GOOGLE_DOC_MIME_TYPE:
+            operation = 'files.export_media'
             request = self.service.files().export_media(
                 fileId=file_id,
                 mimeType='text/plain'
             )
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            return fh.getvalue().decode('utf-8')
-        except Exception as e:
-            logger.error(f"Error extracting Google Doc content: {e}")
-            return ""
-    
-    def _get_pdf_content(self, file_id: str) -> str:
-        """Extract text content from PDF"""
-        try:
+        else:
+            operation = 'files.get_media'
             request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            pdf_content = fh.getvalue()
-            
-            # Extract text using PyPDF2
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
+
+        if size is not None and int(size) > self.spool_threshold:
+            fh = tempfile.NamedTemporaryFile(prefix='drive-', suffix='.download')
+        else:
+            fh = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold, prefix='drive-')
+
+        # Text can be cut anywhere; a UTF-8 character is at most 4 bytes
+        max_bytes = max_chars * 4 if max_chars and mime_type in self.TEXT_MIME_TYPES else None
+
+        # Imported here so the HTTP stack is only loaded once something is downloaded
+        from googleapiclient.http import MediaIoBaseDownload
+
+        with tracer.start_span("drive.download", {"drive.file_id": file_id, "drive.mime_type": mime_type}) as span:
+            try:
+                # Each chunk is held in memory by the HTTP layer, so keep them small
+                chunk_size = min(self.download_chunk_size, max_bytes) if max_bytes else self.download_chunk_size
+                downloader = MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+                done = False
+                chunks = 0
+                while done is False:
+                    # Chunks bypass HttpRequest.execute, so count them here
+                    status, done = observe_drive_call(operation, downloader.next_chunk)
+                    chunks += 1
+                    if max_bytes and fh.tell() >= max_bytes:
+                        break
+            except BaseException:
+                fh.close()
+                raise
+
+            span.set_attributes({"drive.bytes": fh.tell(), "drive.chunks": chunks})
+
+        fh.seek(0)
+        return fh
+
+    @STAGE_LATENCY.timed(stage='extraction')
+    def extract_text(self, mime_type: str, fh: BinaryIO, max_chars: int = None) -> str:
+        """Extract text from a downloaded document.
+
+        Extraction stops as soon as max_chars characters have been produced,
+        or when a PDF/DOCX exceeds the extraction timeout.
+        """
+        with tracer.start_span("extraction", {"drive.mime_type": mime_type}) as span:
+            text = self._extract_text(mime_type, fh, max_chars)
+            span.set_attribute("extraction.chars", len(text))
             return text
-        except Exception as e:
-            logger.error(f"Error extracting PDF content: {e}")
-            return ""
-    
-    def _get_docx_content(self, file_id: str) -> str:
-        """Extract text content from DOCX"""
+
+    def _extract_text(self, mime_type: str, fh: BinaryIO, max_chars: int) -> str:
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            docx_content = fh.getvalue()
-            
-            # Extract text using python-docx
-            doc = Document(io.BytesIO(docx_content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text
-        except Exception as e:
-            logger.error(f"Error extracting DOCX content: {e}")
+            if mime_type in self.TEXT_MIME_TYPES:
+                return extract_plain_text(fh, max_chars)
+
+            if mime_type in ('application/pdf', self.DOCX_MIME_TYPE):
+                # Parsing is CPU-bound, so it runs in the extraction worker processes
+                return self.extraction_pool.extract(mime_type, fh, max_chars)
+
             return ""
-    
-    def _get_text_content(self, file_id: str) -> str:
-        """Extract text content from plain text files"""
-        try:
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            return fh.getvalue().decode('utf-8')
         except Exception as e:
-            logger.error(f"Error extracting text content: {e}")
+            logger.error("Error extracting %s content: %s", mime_type, e)
             return ""
     
     def _get_folder_id(self, folder_path: str) -> Optional[str]:
-        """Get folder ID by name"""
-        try:
-            # Remove leading slash
-            folder_name = folder_path.lstrip('/')
-            
-            # Search for folder
-            results = self.service.files().list(
-                q=f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
-                fields="files(id, name)"
-            ).execute()
-            
-            files = results.get('files', [])
-            if files:
-                return files[0]['id']
-            return None
-        except Exception as e:
-            logger.error(f"Error getting folder ID: {e}")
-            return None
+        """Get folder ID by path"""
+        entry = self._resolve_path(folder_path, folder=True)
+        return entry['id'] if entry else None
     
     def _get_file_id(self, file_path: str) -> Optional[str]:
         """Get file ID by path"""
+        if not self._split_path(file_path):
+            return None
+
+        entry = self._resolve_path(file_path)
+        return entry['id'] if entry else None
+
+    def _resolve_path(self, path: str, folder: bool = False) -> Optional[Dict]:
+        """Resolve a nested path to {"id", "name", "mimeType"} by walking it from the root.
+
+        Every resolved prefix is memoized, so only the segments below the
+        deepest cached prefix cost a Drive call.
+        """
+        parts = self._split_path(path)
+        if not parts:
+            return self.ROOT_ENTRY
+
+        return self._flights.do(("resolve", self._join_path(parts), folder), self._walk_path, path, parts, folder)
+
+    @STAGE_LATENCY.timed(stage='path_resolution')
+    def _walk_path(self, path: str, parts: List[str], folder: bool) -> Optional[Dict]:
         try:
-            # print("_get_file_id file_path " , file_path)
-            # Split path into components
+            # Start from the deepest prefix we already know
+            depth = len(parts)
+            parent = None
+            while depth > 0:
+                parent = self.path_cache.get(self._join_path(parts[:depth]))
+                if parent:
+                    break
+                depth -= 1
+
+            if depth == len(parts):
+                if not folder or parent['mimeType'] == self.FOLDER_MIME_TYPE:
+                    return parent
+                # The cached entry is a file with the requested name; look for a folder
+                depth -= 1
+                parent = self.path_cache.get(self._join_path(parts[:depth])) if depth else None
+                if parent is None:
+                    depth = 0
+
+            if parent is None:
+                parent = self.ROOT_ENTRY
+
+            for index in range(depth, len(parts)):
+                is_last = index == len(parts) - 1
+                entry = self._lookup_child(parent['id'], parts[index], folder=folder or not is_last)
+
+                if entry is None and index == 0 and (folder or not is_last):
+                    # Top-level folders shared with us do not live under 'root'
+                    entry = self._lookup_shared_folder(parts[0])
+
+                if entry is None:
+                    return None
+
+                self.path_cache.set(self._join_path(parts[:index + 1]), entry)
+                parent = entry
+
+            return parent
+        except Exception as e:
+            logger.error("Error resolving path '%s': %s", path, e)
+            return None
 
+    def resolve_paths(self, paths: List[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve several paths, looking up siblings of the same folder in one query"""
+        resolved = {}
+        pending = {}
 
-            path_parts = file_path.strip('/').split('/')
-            # print(path_parts)
+        for path in paths:
+            parts = self._split_path(path)
+            if not parts:
+                resolved[path] = self.ROOT_ENTRY
+                continue
 
-            if len(path_parts) < 2:
-                return None
-            
-            folder_name = path_parts[0]
-            file_name = path_parts[1]
-            
-            # Get folder ID
-            folder_id = self._get_folder_id(f"/{folder_name}")
+            entry = self.path_cache.get(self._join_path(parts))
+            if entry:
+                resolved[path] = entry
+            else:
+                pending.setdefault(self._join_path(parts[:-1]), []).append((path, parts[-1]))
+
+        for parent_path, children in pending.items():
+            parent = self._resolve_path(parent_path, folder=True)
+            found = {}
+            if parent:
+                names = list(dict.fromkeys(name for _, name in children))
+                try:
+                    for start in range(0, len(names), self.SIBLING_BATCH_SIZE):
+                        found.update(self._lookup_children(parent['id'], names[start:start + self.SIBLING_BATCH_SIZE]))
+                except Exception as e:
+                    logger.error("Error resolving children of '%s': %s", parent_path, e)
+
+            for path, name in children:
+                entry = found.get(name.casefold())
+                if entry:
+                    self.path_cache.set(self._join_path(self._split_path(path)), entry)
+                resolved[path] = entry
+
+        return resolved
+
+    def _lookup_child(self, parent_id: str, name: str, folder: bool = False) -> Optional[Dict]:
+        """Find a direct child of parent_id by name"""
+        if self._index_ready():
+            return self._to_path_entry(self.index.find_child(parent_id, name, folder=folder))
+
+        query = f"'{parent_id}' in parents and name='{self._escape_query(name)}' and trashed=false"
+        if folder:
+            query += f" and mimeType='{self.FOLDER_MIME_TYPE}'"
+
+        results = self.service.files().list(
+            q=query,
+            pageSize=10,
+            fields="files(id, name, mimeType)"
+        ).execute()
+
+        files = results.get('files', [])
+        if files:
+            return self._to_path_entry(files[0])
+        return None
+
+    @STAGE_LATENCY.timed(stage='path_resolution')
+    def _lookup_children(self, parent_id: str, names: List[str]) -> Dict[str, Dict]:
+        """Find several direct children of parent_id with a single query"""
+        if self._index_ready():
+            return {
+                key: self._to_path_entry(file)
+                for key, file in self.index.find_children(parent_id, names).items()
+            }
 
-            # print(folder_id)
+        name_clause = " or ".join(f"name='{self._escape_query(name)}'" for name in names)
+        query = f"'{parent_id}' in parents and ({name_clause}) and trashed=false"
 
-            if not folder_id:
-                return None
-            
-            # Search for file in folder
+        found = {}
+        page_token = None
+        while True:
             results = self.service.files().list(
-                q=f"'{folder_id}' in parents and name='{file_name}' and trashed=false",
-                fields="files(id, name)"
+                q=query,
+                pageSize=1000,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, mimeType)"
             ).execute()
 
-            # print('results' , results)
-            
-            files = results.get('files', [])
-            # print("getfileid files" , files)
+            for file in results.get('files', []):
+                found.setdefault(file['name'].casefold(), self._to_path_entry(file))
 
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return found
 
-            if files:
-                return files[0]['id']
+    def _lookup_shared_folder(self, name: str) -> Optional[Dict]:
+        """Find a folder shared with us (outside 'My Drive') by name.
 
+        Two shared folders with the same name are ambiguous, so neither is
+        used; DELETE or MOVE must never act on a guess.
+        """
+        if self._index_ready():
+            files = self.index.find_shared_folders(name, limit=2)
+        else:
+            results = self.service.files().list(
+                q=f"name='{self._escape_query(name)}' and mimeType='{self.FOLDER_MIME_TYPE}' "
+                  f"and sharedWithMe=true and trashed=false",
+                pageSize=2,
+                fields="files(id, name, mimeType)"
+            ).execute()
+            files = results.get('files', [])
+
+        if len(files) > 1:
+            logger.warning("More than one shared folder is named '%s'; not resolving it", name)
             return None
-        except Exception as e:
-            logger.error(f"Error getting file ID: {e}")
+        return self._to_path_entry(files[0]) if files else None
+
+    def _to_path_entry(self, file: Optional[Dict]) -> Optional[Dict]:
+        """Reduce a file resource to the entry stored in the path cache"""
+        if not file:
             return None
+        return {"id": file['id'], "name": file['name'], "mimeType": file['mimeType']}
+
+    def _index_ready(self) -> bool:
+        """Whether reads can use the local metadata index; False means use the live API.
+
+        Seeding and syncing happen in the background, so this never waits for Drive.
+        """
+        if not self.index:
+            return False
+
+        ready = self.index.refresh(self.service)
+        # The generation is kept in the database, so syncs by other workers count too
+        generation = self.index.generation
+        if generation != self._index_generation:
+            # Renames and moves made elsewhere may have made cached paths stale
+            self._index_generation = generation
+            self.path_cache.clear()
+        return ready
+
+    @staticmethod
+    def _split_path(path: str) -> List[str]:
+        """Split a user supplied path into its non-empty segments"""
+        return [part for part in (path or "").split('/') if part]
+
+    @staticmethod
+    def _join_path(parts: List[str]) -> str:
+        """Build a cache key from path segments.
+
+        Drive name queries are case-insensitive (and the command parser
+        upper-cases messages), so keys are case-folded as well.
+        """
+        return ("/" + "/".join(parts)).casefold()
+
+    def _display_path(self, parts: List[str]) -> str:
+        """Build a user facing path from segments"""
+        return "/" + "/".join(parts)
+
+    @classmethod
+    def _normalize_path(cls, path: str) -> str:
+        """Normalize a user supplied path into a cache key (needs no client, so no Drive connection)"""
+        return cls._join_path(cls._split_path(path))
+
+    def _escape_query(self, value: str) -> str:
+        """Escape a value for use inside a quoted Drive query string"""
+        return value.replace("\\", "\\\\").replace("'", "\\'")
+
+    def get_cache_stats(self) -> Dict:
+        """Path resolution cache and request coalescing counters"""
+        stats = {"path_cache": self.path_cache.stats(), "drive_single_flight": self._flights.stats()}
+        if self.index:
+            stats["drive_index"] = self.index.stats()
+        return stats
     
     def _format_size(self, size_bytes: int) -> str:
         """Format file size in human readable format"""
@@ -0,0 +1,212 @@
+import time
+import uuid
+import queue
+import logging
+import itertools
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class Job:
+    """A unit of background work and its outcome"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, key: str, func: Callable[[], Any], command: str = None, priority: int = 0):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.func = func
+        self.command = command
+        self.priority = priority
+        self.status = self.QUEUED
+        self.result = None
+        self.error = None
+        self.callbacks: List[Dict] = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        # Runs in the submitter's context, so its trace and request ID carry over
+        self.context = contextvars.copy_context()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def to_dict(self) -> Dict:
+        job = {
+            "job_id": self.id,
+            "command": self.command,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == self.DONE:
+            job["result"] = self.result
+        elif self.status == self.FAILED:
+            job["error"] = self.error
+        return job
+
+
+class JobQueue:
+    """In-process priority queue served by a pool of worker threads.
+
+    Submitting a job whose key matches one still queued or running returns the
+    existing job, so identical requests share one execution. Finished jobs are
+    kept for result_ttl seconds so they can be polled; older ones are dropped
+    whenever jobs are submitted, finish or are looked up. Lower priority values run
+    first; jobs of equal priority run in submission order.
+
+    When a job finishes, every callback URL registered for it receives a POST
+    of the job as JSON, merged into that callback's payload.
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 100, result_ttl: float = 3600.0,
+                 callback_timeout: float = 10.0):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.callback_timeout = callback_timeout
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, key: str, func: Callable[[], Any], command: str = None, priority: int = 0,
+               callback_url: str = None, callback_payload: Dict = None) -> Job:
+        """Queue func() under key, or join the identical job already in flight.
+
+        Raises QueueFullError when max_queued jobs are already waiting.
+        """
+        self.start()
+
+        with self._lock:
+            self._prune()
+
+            job = self._in_flight.get(key)
+            if job is not None:
+                self.deduplicated += 1
+            else:
+                if self._queue.qsize() >= self.max_queued:
+                    raise QueueFullError("Too many jobs are waiting")
+
+                job = Job(key, func, command=command, priority=priority)
+                self._jobs[job.id] = job
+                self._in_flight[key] = job
+                self.submitted += 1
+                self._queue.put((priority, next(self._sequence), job))
+
+            if callback_url:
+                job.callbacks.append({"url": callback_url, "payload": callback_payload or {}})
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            try:
+                job.result = job.context.run(job.func)
+                job.status = Job.DONE
+            except Exception as e:
+                logger.error("Job %s (%s) failed: %s", job.id, job.command, e)
+                job.error = str(e)
+                job.status = Job.FAILED
+
+            job.finished_at = time.time()
+            job.func = None
+            job.context = None
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+                callbacks = list(job.callbacks)
+                self._prune()
+            job.done.set()
+
+            for callback in callbacks:
+                self._notify(job, callback)
+
+    def _notify(self, job: Job, callback: Dict):
+        try:
+            import requests
+
+            response = requests.post(
+                callback["url"],
+                json={**callback["payload"], **job.to_dict()},
+                timeout=self.callback_timeout
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.error("Callback for job %s failed: %s", job.id, e)
+
+    def _prune(self):
+        """Forget finished jobs older than result_ttl (jobs are kept in creation order)"""
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.created_at > cutoff:
+                break
+            if job.finished:
+                del self._jobs[job_id]
+
+    def reset(self):
+        """Start over with no workers or jobs, e.g. in a freshly forked process"""
+        self._queue = queue.PriorityQueue()
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the jobs already queued have run"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put((float('inf'), next(self._sequence), None))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._prune()
+            return {
+                "queued": self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "jobs": len(self._jobs),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+            }
@@ -0,0 +1,59 @@
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyObject:
+    """Proxy that builds its target on first attribute access.
+
+    Lets module-level clients be declared at import time while their
+    construction (authentication, SDK imports) happens on first use or in a
+    background warm-up thread. Construction runs once; a failed attempt is
+    retried on the next access.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = None):
+        self._lazy_factory = factory
+        self._lazy_name = name or getattr(factory, '__name__', 'object')
+        self._lazy_target = None
+        self._lazy_lock = threading.Lock()
+
+    def resolve(self) -> Any:
+        """Return the target, building it if needed"""
+        target = self._lazy_target
+        if target is None:
+            with self._lazy_lock:
+                if self._lazy_target is None:
+                    self._lazy_target = self._lazy_factory()
+                target = self._lazy_target
+        return target
+
+    @property
+    def is_ready(self) -> bool:
+        return self._lazy_target is not None
+
+    def warm_up(self) -> Optional[threading.Thread]:
+        """Build the target in a daemon thread; errors are logged and retried on first use"""
+        if self.is_ready:
+            return None
+
+        def build():
+            try:
+                self.resolve()
+                logger.info("%s warmed up", self._lazy_name)
+            except Exception as e:
+                logger.error("Error warming up %s: %s", self._lazy_name, e)
+
+        thread = threading.Thread(target=build, name=f"warm-up-{self._lazy_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes the proxy itself does not have
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = repr(self._lazy_target) if self.is_ready else "not built"
+        return f"<LazyObject {self._lazy_name}: {state}>"
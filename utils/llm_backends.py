@@ -0,0 +1,196 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict
+
+from utils.settings import get_section
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    """Text generation backend used by the summarizer"""
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def identity(self) -> str:
+        """Backend and model, part of every summary cache key"""
+        return f"{self.name}:{self.model}"
+
+    def generate(self, prompt: str) -> str:
+        """Return the model's reply to prompt; errors are raised"""
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through google-generativeai"""
+
+    name = "gemini"
+
+    DEFAULT_MODEL = "gemini-2.0-flash"
+
+    def __init__(self, model: str = None, api_key: str = None, max_tokens: int = None, temperature: float = None):
+        super().__init__(model or self.DEFAULT_MODEL)
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API key not found")
+
+        genai.configure(api_key=api_key)
+
+        generation_config = {}
+        if max_tokens:
+            generation_config['max_output_tokens'] = max_tokens
+        if temperature is not None:
+            generation_config['temperature'] = temperature
+
+        # The client picks up proxy settings at construction, which breaks it behind some proxies
+        proxy_vars = ['HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy']
+        original_proxy_values = {}
+
+        for var in proxy_vars:
+            if var in os.environ:
+                original_proxy_values[var] = os.environ[var]
+                del os.environ[var]
+
+        try:
+            self.client = genai.GenerativeModel(self.model, generation_config=generation_config or None)
+        except Exception as e:
+            logger.error("Error initializing Gemini client: %s", e)
+            raise
+        finally:
+            # Restore proxy environment variables if they existed
+            for var, value in original_proxy_values.items():
+                os.environ[var] = value
+
+    def generate(self, prompt: str) -> str:
+        response = self.client.generate_content(prompt)
+        return response.text.strip()
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI-compatible chat completions endpoint configured by the "openai" settings block"""
+
+    name = "openai"
+
+    def __init__(self, model: str = None, api_key: str = None, max_tokens: int = 500,
+                 temperature: float = 0.3, base_url: str = None, timeout: float = 60.0):
+        super().__init__(model or "gpt-4o-mini")
+        import requests
+
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not found")
+
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.url = (base_url or os.getenv('OPENAI_BASE_URL') or "https://api.openai.com/v1").rstrip('/') + "/chat/completions"
+        self.timeout = timeout
+        self._requests = requests
+        self._local = threading.local()
+
+    def _session(self):
+        # Sessions keep connections alive but are not safe to share between threads
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._requests.Session()
+            session.headers['Authorization'] = f"Bearer {self.api_key}"
+            self._local.session = session
+        return session
+
+    def generate(self, prompt: str) -> str:
+        response = self._session().post(
+            self.url,
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()['choices'][0]['message']['content'].strip()
+
+
+class StubBackend(LLMBackend):
+    """Offline backend with deterministic replies and simulated latency, for benchmarks and load tests.
+
+    Latency is latency_ms plus ms_per_token for every prompt token (about four
+    characters), varied by up to +/- jitter with a spread derived from the prompt.
+    """
+
+    name = "stub"
+
+    # Mirrors the file markers of the summarizer's batched prompts
+    FILE_MARKER = re.compile(r'^\s*=== FILE (\d+): (.*?) ===\s*$', re.MULTILINE)
+
+    def __init__(self, model: str = None, latency_ms: float = 800.0, ms_per_token: float = 0.05, jitter: float = 0.2):
+        super().__init__(model or "stub")
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def generate(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        tokens = len(prompt) // 4
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += tokens
+
+        spread = (int(digest[:8], 16) / 0xFFFFFFFF * 2 - 1) * self.jitter
+        delay_ms = (self.latency_ms + self.ms_per_token * tokens) * (1 + spread)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        files = self.FILE_MARKER.findall(prompt)
+        if not files:
+            return f"- Stub summary {digest[:8]} of a {tokens}-token prompt"
+
+        reply = "".join(f"### FILE {number}\n- Stub summary {digest[:8]} of {name}\n" for number, name in files)
+        if "FOLDER OVERVIEW" in prompt:
+            reply += f"### FOLDER OVERVIEW\nStub overview of {len(files)} documents\n"
+        return reply
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"calls": self.calls, "prompt_tokens": self.prompt_tokens}
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    OpenAIBackend.name: OpenAIBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def create_backend(spec: str) -> LLMBackend:
+    """Build a backend from a spec such as "gemini", "openai:gpt-4o-mini" or "stub".
+
+    Options come from the settings block of the same name; a model after the
+    colon overrides the configured one.
+    """
+    name, _, model = spec.strip().partition(':')
+    name = name.lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}")
+
+    options = dict(get_section(name))
+    # Only the prompt-shaping settings are backend options
+    options.pop('max_content_length', None)
+    if model:
+        options['model'] = model
+
+    return BACKENDS[name](**options)
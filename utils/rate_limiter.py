@@ -0,0 +1,227 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Holds up to capacity tokens, refilled continuously at rate tokens per second"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def charge(self, cost: float) -> float:
+        """Cost actually taken; a command dearer than the whole bucket takes all of it"""
+        return min(cost, self.capacity)
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until cost tokens are available (0 if they already are)"""
+        cost = self.charge(cost)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-sender and global token buckets, charged per command.
+
+    Every sender gets a bucket of per_sender_per_minute tokens and all senders
+    share one of global_per_minute tokens. Commands cost command_costs[command]
+    tokens (default_cost otherwise), so cheap commands such as LIST can be sent
+    more often than summaries. Bulk commands pay that cost once per item they
+    name. A request is charged only if both buckets can pay.
+    A limit of 0 disables that bucket.
+
+    With a db_path the buckets live in SQLite, so every server worker using
+    the file draws on the same buckets; otherwise they are per process.
+    """
+
+    DEFAULT_COSTS = {
+        "HELP": 0,
+        "LIST": 1,
+        "DELETE": 1,
+        "MOVE": 1,
+        "COPY": 1,
+        "FILESUMMARY": 3,
+        "FOLDERSUMMARY": 5,
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_buckets_updated ON buckets (updated);
+    """
+
+    # Shared buckets untouched for a minute are full again, so their rows can go
+    PRUNE_INTERVAL = 1024
+
+    def __init__(self, per_sender_per_minute: float = 10, global_per_minute: float = 300,
+                 command_costs: Dict[str, float] = None, default_cost: float = 1, max_senders: int = 10000,
+                 db_path: str = None):
+        self.per_sender_per_minute = per_sender_per_minute
+        self.global_per_minute = global_per_minute
+        self.command_costs = {**self.DEFAULT_COSTS, **(command_costs or {})}
+        self.default_cost = default_cost
+        self.max_senders = max_senders
+        self.db_path = db_path
+        self._senders: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._global = TokenBucket(global_per_minute, global_per_minute / 60, time.monotonic())
+        self._lock = threading.Lock()
+        self._conn = self._connect() if db_path else None
+        self._shared_charges = 0
+        self.allowed = 0
+        self.rejected = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def reset(self):
+        """Open a fresh connection in a forked worker (the parent keeps the inherited one)"""
+        self._lock = threading.Lock()
+        self._conn = self._connect() if self.db_path else None
+
+    def cost(self, command: str) -> float:
+        return self.command_costs.get(command, self.default_cost)
+
+    def acquire(self, sender: Optional[str], command: str, items: int = 1) -> Dict:
+        """Charge a command acting on items files or patterns to a sender.
+
+        Returns {"allowed": True} or {"allowed": False, "scope": "sender" | "global",
+        "retry_after": seconds}. Requests without a sender only use the global bucket.
+        """
+        cost = self.cost(command) * max(1, items)
+        if cost <= 0:
+            return {"allowed": True}
+
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    result = self._acquire_shared(sender, cost)
+                except sqlite3.Error as e:
+                    # Fall back to this process's buckets rather than refusing every command
+                    logger.error("Error reading shared rate limits: %s", e)
+                    result = self._acquire_local(sender, cost)
+            else:
+                result = self._acquire_local(sender, cost)
+
+            if result["allowed"]:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+            return result
+
+    def _acquire_local(self, sender: Optional[str], cost: float) -> Dict:
+        now = time.monotonic()
+        buckets = [("global", self._global)] if self.global_per_minute > 0 else []
+        if sender and self.per_sender_per_minute > 0:
+            buckets.insert(0, ("sender", self._sender_bucket(sender, now)))
+
+        for scope, bucket in buckets:
+            bucket.refill(now)
+            wait = bucket.wait_time(cost)
+            if wait:
+                return {"allowed": False, "scope": scope, "retry_after": wait}
+
+        for _, bucket in buckets:
+            bucket.tokens -= bucket.charge(cost)
+        return {"allowed": True}
+
+    def _acquire_shared(self, sender: Optional[str], cost: float) -> Dict:
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        limits = [("global", "global", self.global_per_minute)] if self.global_per_minute > 0 else []
+        if sender and self.per_sender_per_minute > 0:
+            limits.insert(0, ("sender", f"sender:{sender}", self.per_sender_per_minute))
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            buckets = []
+            for scope, name, per_minute in limits:
+                bucket = TokenBucket(per_minute, per_minute / 60, now)
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                if row:
+                    bucket.tokens, bucket.updated = row[0], min(row[1], now)
+                    bucket.refill(now)
+
+                wait = bucket.wait_time(cost)
+                if wait:
+                    self._conn.execute("ROLLBACK")
+                    return {"allowed": False, "scope": scope, "retry_after": wait}
+                buckets.append((name, bucket))
+
+            for name, bucket in buckets:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (name, bucket.tokens - bucket.charge(cost), now)
+                )
+
+            self._shared_charges += 1
+            if self._shared_charges % self.PRUNE_INTERVAL == 0:
+                self._conn.execute("DELETE FROM buckets WHERE updated < ?", (now - 60,))
+            self._conn.execute("COMMIT")
+            return {"allowed": True}
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _sender_bucket(self, sender: str, now: float) -> TokenBucket:
+        bucket = self._senders.get(sender)
+        if bucket is None:
+            bucket = TokenBucket(self.per_sender_per_minute, self.per_sender_per_minute / 60, now)
+            self._senders[sender] = bucket
+            # A forgotten sender just starts again with a full bucket
+            while len(self._senders) > self.max_senders:
+                self._senders.popitem(last=False)
+        else:
+            self._senders.move_to_end(sender)
+        return bucket
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "senders": len(self._senders),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "global_tokens": round(self._global.tokens, 2),
+            }
+            if self._conn is not None:
+                try:
+                    stats["senders"] = self._conn.execute(
+                        "SELECT COUNT(*) FROM buckets WHERE name LIKE 'sender:%'"
+                    ).fetchone()[0]
+                    row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = 'global'").fetchone()
+                    if row:
+                        bucket = TokenBucket(self.global_per_minute, self.global_per_minute / 60, row[1])
+                        bucket.tokens = row[0]
+                        bucket.refill(max(time.time(), row[1]))
+                        stats["global_tokens"] = round(bucket.tokens, 2)
+                    else:
+                        stats["global_tokens"] = self.global_per_minute
+                except sqlite3.Error as e:
+                    logger.error("Error reading shared rate limits: %s", e)
+            return stats
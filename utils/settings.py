@@ -0,0 +1,36 @@
+import os
+import json
+import logging
+from functools import lru_cache
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SETTINGS_PATH = os.path.join(PROJECT_ROOT, 'config', 'settings.json')
+
+
+def project_path(path: str) -> str:
+    """Resolve a relative data path against the project root rather than the working directory"""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+@lru_cache(maxsize=None)
+def load_settings(path: str = None) -> Dict:
+    """Load config/settings.json (or SETTINGS_PATH) once; missing or invalid files give {}"""
+    path = path or os.getenv('SETTINGS_PATH') or DEFAULT_SETTINGS_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        logger.warning("Settings file not found: %s", path)
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error("Error loading settings from %s: %s", path, e)
+        return {}
+
+
+def get_section(name: str) -> Dict:
+    """Return one top-level block of the settings, or {}"""
+    section = load_settings().get(name)
+    return section if isinstance(section, dict) else {}
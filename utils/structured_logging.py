@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import zlib
+import queue
+import atexit
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from utils.tracing import get_request_id
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request ID and any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry["request_id"] = record.request_id
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a share of DEBUG/INFO records from high-volume loggers.
+
+    rates maps logger name prefixes to the share kept (0.0-1.0). The decision
+    is made per request ID where there is one, so a sampled request keeps all
+    of its lines. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so "utils.google_drive_client" beats "utils"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+
+        rate = next((rate for prefix, rate in self.rates
+                     if record.name == prefix or record.name.startswith(prefix + '.')), 1.0)
+        if rate >= 1.0:
+            return True
+
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            return (zlib.crc32(request_id.encode()) % 10000) < rate * 10000
+        return random.random() < rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Hands records to a background thread without formatting them.
+
+    The request ID is captured here, in the logging thread. Message
+    arguments are formatted by the listener, so they are only rendered for
+    records that are written. When the bounded queue is full the record is
+    dropped and counted rather than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id()
+        return True
+
+
+_lock = threading.Lock()
+_handler: Optional[AsyncQueueHandler] = None
+_output: Optional[logging.Handler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        try:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            sys.stderr.write(f"Ignoring invalid LOG_SAMPLE_RATES entry '{item}'\n")
+    return rates
+
+
+def configure_logging():
+    """Send all logging through one non-blocking handler on the root logger.
+
+    Safe to call more than once; only the first call has an effect. Settings:
+    LOG_LEVEL, LOG_FORMAT (json or text), LOG_SAMPLE_RATES
+    (e.g. "tracing.spans=0.1,utils.google_drive_client=0.5") and
+    LOG_QUEUE_SIZE.
+    """
+    global _handler, _output, _listener
+    with _lock:
+        if _handler is not None:
+            return
+
+        if os.getenv('LOG_FORMAT', 'json').lower() == 'text':
+            formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+        else:
+            formatter = JsonFormatter()
+
+        _output = logging.StreamHandler(sys.stdout)
+        _output.setFormatter(formatter)
+
+        _handler = AsyncQueueHandler(queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000'))))
+        _handler.addFilter(RequestIdFilter())
+        _handler.addFilter(SamplingFilter(_parse_rates(os.getenv('LOG_SAMPLE_RATES', ''))))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+        _listener = QueueListener(_handler.queue, _output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def reset_logging():
+    """Restart the writer thread in a forked process (threads do not survive fork)"""
+    global _listener
+    with _lock:
+        if _handler is None:
+            return
+        _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+        _listener = QueueListener(_handler.queue, _output, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler else 0
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCache:
+    """Size-bounded summary cache with an optional SQLite backend shared across workers"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS summaries (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at);
+    """
+
+    EVICTION_CHECK_INTERVAL = 64
+
+    def __init__(self, max_entries: int = 1024, db_path: str = None, max_disk_entries: int = 100000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = self._connect() if db_path else None
+        self._disk_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a cache key from its components (e.g. file ID, revision, prompt version, model)"""
+        return hashlib.sha256("\x1f".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def reset(self):
+        """Open a fresh connection in a forked worker (the parent keeps the inherited one)"""
+        self._lock = threading.Lock()
+        self._conn = self._connect() if self.db_path else None
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+                    if row:
+                        self._conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                        value = json.loads(row[0])
+                        self._remember(key, value)
+                        self.hits += 1
+                        return value
+                except sqlite3.Error as e:
+                    logger.error("Error reading summary cache: %s", e)
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            self._remember(key, value)
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO summaries (key, value, accessed_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), time.time())
+                    )
+                    # Counting rows is not free, so only check the bound periodically
+                    self._disk_writes += 1
+                    if self._disk_writes % self.EVICTION_CHECK_INTERVAL == 0:
+                        self._evict_disk()
+                except sqlite3.Error as e:
+                    logger.error("Error writing summary cache: %s", e)
+
+    def _remember(self, key: str, value: Dict):
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drop the least recently used rows once the table is over its limit"""
+        count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk": bool(self._conn),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
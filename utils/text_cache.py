@@ -0,0 +1,139 @@
+import os
+import zlib
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractedTextCache:
+    """On-disk, compressed store of extracted document text keyed by file revision.
+
+    Entries are written atomically, so several worker processes can share
+    one directory. Reads refresh an entry's mtime, which drives LRU eviction
+    once the directory grows past max_bytes. Text extracted under a different
+    PDF page cap (max_pages) is a different entry.
+    """
+
+    SUFFIX = '.txt.z'
+
+    # Bump when extraction changes so stale text is not served
+    EXTRACTOR_VERSION = "2"
+
+    EVICTION_CHECK_INTERVAL = 64
+
+    # First byte of every entry
+    COMPLETE = b'C'
+    PARTIAL = b'P'
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, compression_level: int = 6,
+                 max_pages: int = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file_id: str, revision: str) -> str:
+        # Text cut at the page cap looks complete, so the cap is part of the key
+        key = f"{file_id}\x1f{revision}\x1f{self.EXTRACTOR_VERSION}\x1f{self.max_pages or ''}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + self.SUFFIX)
+
+    def get(self, file_id: str, revision: str, max_chars: int = None) -> Optional[str]:
+        """Return cached text, or None if missing or cut shorter than max_chars"""
+        path = self._path(file_id, revision)
+        try:
+            with open(path, 'rb') as fh:
+                data = zlib.decompress(fh.read())
+            complete = data[:1] == self.COMPLETE
+            text = data[1:].decode('utf-8')
+
+            # A budgeted extraction only serves budgets it fully covers
+            if not complete and (max_chars is None or len(text) < max_chars):
+                with self._lock:
+                    self.misses += 1
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            logger.error("Error reading extracted text cache: %s", e)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return text[:max_chars] if max_chars else text
+
+    def set(self, file_id: str, revision: str, text: str, complete: bool = True):
+        """Store text; complete=False marks text that was cut at an extraction budget"""
+        path = self._path(file_id, revision)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            flag = self.COMPLETE if complete else self.PARTIAL
+            data = zlib.compress(flag + text.encode('utf-8'), self.compression_level)
+
+            # Write to a temp file and rename so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Error writing extracted text cache: %s", e)
+            return
+
+        with self._lock:
+            self._writes += 1
+            check = self._writes % self.EVICTION_CHECK_INTERVAL == 0
+        if check:
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the directory fits in max_bytes"""
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,148 @@
+import io
+import codecs
+import logging
+import threading
+import multiprocessing
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PDF_MIME_TYPE = 'application/pdf'
+DOCX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+TEXT_READ_SIZE = 1024 * 1024
+
+
+def _take(pieces: Iterable[str], max_chars: Optional[int]) -> str:
+    """Join text pieces, stopping as soon as max_chars characters are collected"""
+    parts = []
+    length = 0
+    for piece in pieces:
+        parts.append(piece)
+        length += len(piece)
+        if max_chars and length >= max_chars:
+            break
+
+    text = "".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_plain_text(fh: BinaryIO, max_chars: int = None) -> str:
+    """Decode UTF-8 text incrementally (a trailing partial character is dropped)"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    return _take((decoder.decode(chunk) for chunk in iter(lambda: fh.read(TEXT_READ_SIZE), b'')), max_chars)
+
+
+def extract_document_text(mime_type: str, source: Union[str, bytes, BinaryIO],
+                          max_chars: int = None, max_pages: int = None) -> str:
+    """Extract text from a PDF or DOCX given as a path, bytes or binary file object.
+
+    Module-level so it can run in a worker process.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if mime_type == PDF_MIME_TYPE:
+        # Extract text using PyPDF2
+        import PyPDF2
+
+        pdf_reader = PyPDF2.PdfReader(source)
+        pages = islice(pdf_reader.pages, max_pages) if max_pages else pdf_reader.pages
+        return _take(((page.extract_text() or "") + "\n" for page in pages), max_chars)
+
+    if mime_type == DOCX_MIME_TYPE:
+        # Extract text using python-docx
+        from docx import Document
+
+        doc = Document(source)
+        return _take((paragraph.text + "\n" for paragraph in doc.paragraphs), max_chars)
+
+    return ""
+
+
+class ExtractionPool:
+    """Runs PDF/DOCX extraction in worker processes, off the request threads' GIL.
+
+    At most one document per worker is submitted at a time; callers beyond
+    that wait here, so the timeout only covers the extraction itself. With
+    workers=0 extraction runs inline in the calling thread.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 60.0, max_pages: int = None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, workers))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # forkserver children do not inherit the server's threads and locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+            return self._pool
+
+    def extract(self, mime_type: str, fh: BinaryIO, max_chars: int = None) -> str:
+        """Extract text from a downloaded PDF or DOCX.
+
+        Raises TimeoutError when a document takes longer than the timeout;
+        the workers are then replaced so a pathological file cannot pin them.
+        """
+        if self.workers <= 0:
+            return extract_document_text(mime_type, fh, max_chars, self.max_pages)
+
+        source = self._to_source(fh)
+        with self._slots:
+            for attempt in range(2):
+                pool = self._get_pool()
+                # A worker is free, so the document starts right away
+                future = pool.submit(extract_document_text, mime_type, source, max_chars, self.max_pages)
+                try:
+                    return future.result(timeout=self.timeout)
+                except FutureTimeoutError:
+                    self._reset(pool)
+                    raise TimeoutError(f"Extracting {mime_type} took longer than {self.timeout}s")
+                except BrokenProcessPool:
+                    # Another document's timeout may have recycled the pool under us
+                    self._reset(pool)
+                    if attempt:
+                        raise
+
+    def _to_source(self, fh: BinaryIO) -> Union[str, bytes]:
+        """Hand large downloads to workers by path and small in-memory ones as bytes"""
+        name = getattr(fh, 'name', None)
+        if isinstance(name, str):
+            fh.flush()
+            return name
+        return fh.read()
+
+    def _reset(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+
+        logger.error("Recycling extraction worker processes")
+        processes = getattr(pool, '_processes', None) or {}
+        for process in list(processes.values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def reset(self):
+        """Forget the parent's workers in a forked process; new ones start on demand"""
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.workers))
+        self._pool = None
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True)
@@ -0,0 +1,230 @@
+import os
+import re
+import time
+import logging
+import secrets
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+REQUEST_ID_PATTERN = re.compile(r'[^A-Za-z0-9._:-]')
+
+
+class Span:
+    """One timed operation within a trace.
+
+    IDs, timestamps and to_dict() follow the OpenTelemetry data model (OTLP
+    JSON field names), so exported spans can be loaded by OTel tooling.
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Dict[str, Any] = None, request_id: str = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.request_id = request_id or trace_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status = "UNSET"
+        self.status_message = None
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_status(self, status: str, message: str = None):
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, error: BaseException):
+        self.events.append({
+            "name": "exception",
+            "timeUnixNano": time.time_ns(),
+            "attributes": {"exception.type": type(error).__name__, "exception.message": str(error)},
+        })
+        self.set_status("ERROR", str(error))
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value for calls made within this span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "attributes": {"request.id": self.request_id, **self.attributes},
+            "status": {"code": self.status},
+        }
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class InMemorySpanExporter:
+    """Keeps the most recent finished spans, for tests and debugging"""
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self, trace_id: str = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        return [span for span in spans if trace_id is None or span.trace_id == trace_id]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class LoggingSpanExporter:
+    """Logs every finished span; with JSON logging the span is a nested "span" object"""
+
+    def __init__(self, log: logging.Logger = None):
+        self.log = log or logging.getLogger('tracing.spans')
+
+    def export(self, span: Span):
+        if self.log.isEnabledFor(logging.INFO):
+            self.log.info("%s finished in %.1f ms", span.name, span.duration_ms, extra={"span": span.to_dict()})
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    """Creates spans and tracks the active one in a context variable.
+
+    The active span follows the request through function calls and asyncio
+    tasks. Work handed to threads needs propagate(); the job queue and the
+    summarizer's pools do this already.
+    """
+
+    def __init__(self, exporters: List = None):
+        self.exporters = list(exporters or [])
+
+    @contextmanager
+    def start_trace(self, name: str, request_id: str = None, traceparent: str = None,
+                    attributes: Dict[str, Any] = None) -> Iterator[Span]:
+        """Start the root span of a request, continuing the caller's trace when given a traceparent"""
+        # Caller supplied IDs end up in logs, so keep them short and plain
+        request_id = REQUEST_ID_PATTERN.sub('', request_id or '')[:64] or None
+        match = TRACEPARENT_PATTERN.match((traceparent or "").strip().lower())
+        trace_id, parent_id = (match.group(1), match.group(2)) if match else (secrets.token_hex(16), None)
+
+        span = Span(name, trace_id, parent_id=parent_id, attributes=attributes, request_id=request_id)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Dict[str, Any] = None) -> Iterator[Span]:
+        """Start a child of the active span (or a new trace when there is none)"""
+        parent = _current_span.get()
+        if parent is None:
+            span = Span(name, secrets.token_hex(16), attributes=attributes)
+        else:
+            span = Span(name, parent.trace_id, parent_id=parent.span_id,
+                        attributes=attributes, request_id=parent.request_id)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_time_ns = time.time_ns()
+            if span.status == "UNSET":
+                span.status = "OK"
+            # Exported while still active, so log lines about it carry its request ID
+            self._export(span)
+            _current_span.reset(token)
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.error("Error exporting span %s: %s", span.name, e)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_request_id() -> Optional[str]:
+    """ID of the request being handled by this thread or task, if any"""
+    span = _current_span.get()
+    return span.request_id if span else None
+
+
+def traced(name: str) -> Callable:
+    """Decorator running the function in a child span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind func to the caller's context so spans it starts in another thread join this trace"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call gets a copy
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _create_exporters(spec: str) -> List:
+    exporters = []
+    for name in filter(None, (part.strip().lower() for part in spec.split(','))):
+        if name == 'log':
+            exporters.append(LoggingSpanExporter())
+        elif name == 'memory':
+            exporters.append(InMemorySpanExporter())
+        elif name != 'none':
+            logger.error("Unknown TRACING_EXPORTER '%s'", name)
+    return exporters
+
+
+# none (default), log and/or memory, comma separated
+tracer = Tracer(_create_exporters(os.getenv('TRACING_EXPORTER', 'none')))